@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Resumable backfill of channel history into a new language channel.
+
+A backfill runs in two phases. The scan phase pages conversations.history of
+the source channels and spools their messages to disk, checkpointing the
+cursor after every page. The post phase deduplicates the spooled messages by
+channel and timestamp, sorts them oldest first, translates them in batched
+DeepL requests on a bounded worker pool and posts them to the target channel
+at a fixed pace, checkpointing the timestamp of the last posted message after
+every post. An interrupted backfill resumes from the checkpoint; at most one
+message may be posted twice.
+
+Usage:
+    python backfill.py --source general --target general-de --lang DE --dry-run
+    python backfill.py --source general --target general-de --lang DE \\
+        --checkpoint /tmp/general-de.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Dict, Iterator, List, Optional
+
+from slack_sdk import WebClient
+
+from deepl_client import MAX_TEXTS_PER_REQUEST
+from slack_markup import replace_markdown, revert_markdown
+from slack_transport import SlackTransport
+from translation_backend import BackendRouter, DeeplBackend, resolve_endpoint
+from workspace import ChannelDirectory, UserCache
+
+# DeepL limits a request body to 128 KiB; stay well below it
+MAX_BATCH_CHARACTERS = 30000
+
+
+class BackfillCheckpoint:
+    """
+    Progress of a backfill, persisted as JSON next to a message spool.
+
+    With path None nothing is written, which is used for dry runs.
+
+    Attributes:
+        cursors: Next conversations.history cursor per source channel
+        scanned: Source channels whose history has been fully read
+        posted: Number of messages posted so far
+        last_posted: [ts, channel] of the last posted message, or None
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.cursors: Dict[str, Optional[str]] = {}
+        self.scanned: List[str] = []
+        self.posted = 0
+        self.last_posted: Optional[List[str]] = None
+        self._messages: List[dict] = []
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                saved = json.load(f)
+            self.cursors = saved["cursors"]
+            self.scanned = saved["scanned"]
+            self.posted = saved["posted"]
+            self.last_posted = saved.get("last_posted")
+            if self.last_posted is None and self.posted:
+                # Checkpoints written before last_posted stored a position
+                message = self.messages()[self.posted - 1]
+                self.last_posted = [message["ts"], message["channel"]]
+
+    @property
+    def spool_path(self) -> Optional[str]:
+        return f"{self.path}.messages.jsonl" if self.path else None
+
+    def save(self) -> None:
+        """Write the checkpoint atomically."""
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "cursors": self.cursors,
+                    "scanned": self.scanned,
+                    "posted": self.posted,
+                    "last_posted": self.last_posted,
+                },
+                f,
+            )
+        os.replace(tmp_path, self.path)
+
+    def add_messages(self, messages: List[dict]) -> None:
+        """Append scanned messages to the spool."""
+        if not self.path:
+            self._messages.extend(messages)
+            return
+        with open(self.spool_path, "a", encoding="utf-8") as f:
+            for message in messages:
+                f.write(json.dumps(message, ensure_ascii=False) + "\n")
+
+    def messages(self) -> List[dict]:
+        """
+        Return the spooled messages, oldest first.
+
+        A page spooled again after a crash before its cursor was saved is
+        dropped by channel and timestamp.
+        """
+        if not self.path:
+            messages = list(self._messages)
+        elif os.path.exists(self.spool_path):
+            with open(self.spool_path, encoding="utf-8") as f:
+                messages = [json.loads(line) for line in f if line.strip()]
+        else:
+            messages = []
+        unique = {(m["channel"], m["ts"]): m for m in messages}
+        # Several source channels are merged by timestamp
+        return sorted(unique.values(), key=message_key)
+
+    def pending(self) -> List[dict]:
+        """Return the spooled messages after the last posted one, oldest first."""
+        messages = self.messages()
+        if self.last_posted is None:
+            return messages
+        ts, channel = self.last_posted
+        last = message_key({"ts": ts, "channel": channel})
+        return [m for m in messages if message_key(m) > last]
+
+    def mark_posted(self, message: dict) -> None:
+        """Record message as posted and save the checkpoint."""
+        self.last_posted = [message["ts"], message["channel"]]
+        self.posted += 1
+        self.save()
+
+
+def message_key(message: dict) -> tuple:
+    """Sort key of a spooled message: timestamp, then source channel."""
+    return (float(message["ts"]), message["channel"])
+
+
+def backfillable(message: dict) -> bool:
+    """
+    Return True for messages the multichannel handler would translate.
+
+    Bot posts (including earlier translations), joins and other subtypes are
+    skipped.
+    """
+    return (
+        not message.get("subtype")
+        and not message.get("bot_id")
+        and bool(message.get("text"))
+    )
+
+
+def scan_history(
+    client: WebClient,
+    channel_id: str,
+    checkpoint: BackfillCheckpoint,
+    oldest: Optional[str] = None,
+    page_size: int = 200,
+) -> int:
+    """
+    Spool the history of one source channel, resuming from the checkpoint.
+
+    Args:
+        client: Slack WebClient
+        channel_id: Source channel ID
+        checkpoint: Checkpoint receiving messages and cursors
+        oldest: Only read messages after this Slack timestamp
+        page_size: Messages per conversations.history page
+
+    Returns:
+        Number of messages spooled in this call
+    """
+    if channel_id in checkpoint.scanned:
+        return 0
+
+    spooled = 0
+    cursor = checkpoint.cursors.get(channel_id)
+    while True:
+        kwargs = {"channel": channel_id, "limit": page_size}
+        if cursor:
+            kwargs["cursor"] = cursor
+        if oldest:
+            kwargs["oldest"] = oldest
+        response = client.conversations_history(**kwargs)
+
+        messages = [
+            {
+                "ts": m["ts"],
+                "channel": channel_id,
+                "user": m.get("user", ""),
+                "text": m["text"],
+            }
+            for m in response["messages"]
+            if backfillable(m)
+        ]
+        checkpoint.add_messages(messages)
+        spooled += len(messages)
+
+        cursor = (response.get("response_metadata") or {}).get("next_cursor")
+        if not cursor:
+            checkpoint.scanned.append(channel_id)
+            checkpoint.cursors.pop(channel_id, None)
+            checkpoint.save()
+            return spooled
+        checkpoint.cursors[channel_id] = cursor
+        checkpoint.save()
+
+
+def batches(
+    messages: List[dict],
+    batch_size: int = MAX_TEXTS_PER_REQUEST,
+    max_characters: int = MAX_BATCH_CHARACTERS,
+) -> Iterator[List[dict]]:
+    """Split messages into translation batches by count and size."""
+    batch: List[dict] = []
+    characters = 0
+    for message in messages:
+        size = len(replace_markdown(message["text"]))
+        if batch and (len(batch) >= batch_size or characters + size > max_characters):
+            yield batch
+            batch, characters = [], 0
+        batch.append(message)
+        characters += size
+    if batch:
+        yield batch
+
+
+def estimate(messages: List[dict]) -> Dict[str, int]:
+    """
+    Estimate the DeepL characters billed for translating messages once.
+
+    DeepL bills source characters; the markup placeholders sent with each
+    text are counted, so this is an upper bound.
+    """
+    batch_list = list(batches(messages))
+    return {
+        "messages": len(messages),
+        "characters": sum(len(replace_markdown(m["text"])) for m in messages),
+        "requests": len(batch_list),
+    }
+
+
+def post_translations(
+    client: WebClient,
+    router: BackendRouter,
+    target_id: str,
+    target_lang: str,
+    checkpoint: BackfillCheckpoint,
+    users: UserCache,
+    workers: int = 4,
+    post_interval: float = 1.0,
+) -> int:
+    """
+    Translate the spooled messages not posted yet and post them in order.
+
+    Up to workers batches are translated ahead of the poster; posts are at
+    least post_interval seconds apart.
+
+    Returns:
+        Number of messages posted in this call
+    """
+    pending = checkpoint.pending()
+    posted = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="backfill") as pool:
+        batch_iter = batches(pending)
+        in_flight: Deque[tuple] = deque()
+
+        def refill() -> None:
+            while len(in_flight) < workers:
+                batch = next(batch_iter, None)
+                if batch is None:
+                    return
+                texts = [replace_markdown(m["text"]) for m in batch]
+                future: Future = pool.submit(router.translate_texts, texts, target_lang)
+                in_flight.append((batch, future))
+
+        refill()
+        next_post = 0.0
+        while in_flight:
+            batch, future = in_flight.popleft()
+            translated = future.result()
+            refill()
+            for message, text in zip(batch, translated):
+                speaker = users.name(client, message["user"])
+                delay = next_post - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                client.chat_postMessage(
+                    channel=target_id,
+                    text=f"{speaker} said:\n{revert_markdown(text)}",
+                )
+                next_post = time.monotonic() + post_interval
+                checkpoint.mark_posted(message)
+                posted += 1
+    return posted
+
+
+def run_backfill(
+    client: WebClient,
+    router: Optional[BackendRouter],
+    sources: List[str],
+    target: str,
+    target_lang: str,
+    checkpoint: BackfillCheckpoint,
+    oldest: Optional[str] = None,
+    workers: int = 4,
+    post_interval: float = 1.0,
+    dry_run: bool = False,
+) -> Dict[str, int]:
+    """
+    Backfill the history of source channels into the target channel.
+
+    Args:
+        client: Slack WebClient
+        router: Translation router (unused in dry runs)
+        sources: Source channel names or IDs
+        target: Target channel name or ID
+        target_lang: Target language code
+        checkpoint: Checkpoint to resume from and update
+        oldest: Only backfill messages after this Slack timestamp
+        workers: Number of batches translated concurrently
+        post_interval: Minimum seconds between posts
+        dry_run: Only scan and estimate billed characters
+
+    Returns:
+        Estimate of the remaining work in a dry run, otherwise the number of
+        posted messages
+
+    Raises:
+        LookupError: If a channel is not found
+    """
+    directory = ChannelDirectory()
+    directory.load(client)
+
+    def channel_id(channel: str) -> str:
+        if channel in directory.id_dict:
+            return channel
+        if channel in directory.name_dict:
+            return directory.name_dict[channel]
+        raise LookupError(f"Channel not found: {channel}")
+
+    target_id = channel_id(target)
+    for source in sources:
+        scan_history(client, channel_id(source), checkpoint, oldest=oldest)
+
+    if dry_run:
+        return estimate(checkpoint.pending())
+
+    posted = post_translations(
+        client,
+        router,
+        target_id,
+        target_lang,
+        checkpoint,
+        UserCache(),
+        workers=workers,
+        post_interval=post_interval,
+    )
+    return {"posted": posted, "total": checkpoint.posted}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Backfill channel history into a language channel"
+    )
+    parser.add_argument("--source", action="append", required=True)
+    parser.add_argument("--target", required=True)
+    parser.add_argument("--lang", required=True)
+    parser.add_argument("--checkpoint", help="Checkpoint file (required to post)")
+    parser.add_argument("--oldest", help="Only messages after this Slack timestamp")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--post-interval", type=float, default=1.0)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    if not args.dry_run and not args.checkpoint:
+        parser.error("--checkpoint is required unless --dry-run is given")
+    logging.basicConfig(level=logging.INFO)
+
+    # Wait out Slack's rate limits instead of failing the backfill
+    slack_client = SlackTransport(max_retries=5, max_retry_after=300).client(
+        os.environ.get("SLACK_BOT_TOKEN")
+    )
+    translation_router = BackendRouter(
+        [
+            DeeplBackend(os.environ.get("DEEPL_TOKEN"), resolve_endpoint(e))
+            for e in os.environ.get("DEEPL_ENDPOINTS", "pro").split(",")
+        ]
+    )
+
+    result = run_backfill(
+        slack_client,
+        translation_router,
+        args.source,
+        args.target,
+        args.lang,
+        # Dry runs keep their scan in memory
+        BackfillCheckpoint(None if args.dry_run else args.checkpoint),
+        oldest=args.oldest,
+        workers=args.workers,
+        post_interval=args.post_interval,
+        dry_run=args.dry_run,
+    )
+    print(json.dumps(result))
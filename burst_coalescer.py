@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Coalescing of rapid consecutive messages from the same speaker.
+
+People often type one thought as several quick one-line messages. Each
+channel holds at most one open burst: top-level text messages of the same
+user are added to it while they keep arriving within the debounce window,
+and the burst is flushed as one merged message when the window passes,
+when it has been open for max_latency, or when it is full. A message of
+another user, a thread reply or a file share flushes the open burst first,
+so that translations keep the channel's order.
+
+Flushes run under the coalescer's lock, so the flush callback must only
+queue work (it runs on the caller's or the timer thread).
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+class Burst:
+    """
+    Consecutive messages of one user in one channel.
+
+    Attributes:
+        messages: Slack message events in arrival order
+        context: Value given with the first message, passed to the flush
+        started: time.monotonic() of the first message
+        deadline: time.monotonic() at which the burst is flushed
+    """
+
+    __slots__ = ("messages", "context", "started", "deadline")
+
+    def __init__(self, message: dict, context: Any, now: float, deadline: float):
+        self.messages = [message]
+        self.context = context
+        self.started = now
+        self.deadline = deadline
+
+    @property
+    def user(self) -> Optional[str]:
+        return self.messages[0].get("user")
+
+    def merged(self) -> dict:
+        """Return the first message with the texts of all messages."""
+        merged = dict(self.messages[0])
+        merged["text"] = "\n".join(m["text"] for m in self.messages)
+        return merged
+
+
+def coalescable(message: dict) -> bool:
+    """Return True for top-level text messages without files."""
+    return bool(
+        message.get("text")
+        and message.get("user")
+        and not message.get("subtype")
+        and not message.get("files")
+        and not message.get("thread_ts")
+    )
+
+
+class BurstCoalescer:
+    """Debounces messages per (channel, user) and flushes merged bursts."""
+
+    def __init__(
+        self,
+        flush: Callable[[dict, Any], None],
+        window: float = 3.0,
+        max_latency: float = 10.0,
+        max_messages: int = 20,
+    ):
+        """
+        Args:
+            flush: Called with the merged message and the context of the
+                first message of each burst
+            window: Seconds of silence after which a burst is flushed
+            max_latency: Seconds after the first message at which a burst is
+                flushed even if messages keep arriving
+            max_messages: Largest number of messages merged into one
+        """
+        self.flush = flush
+        self.window = window
+        self.max_latency = max_latency
+        self.max_messages = max_messages
+        self._bursts: Dict[str, Burst] = {}
+        self._wake = threading.Condition()
+        self._stopped = True
+        self._thread: Optional[threading.Thread] = None
+        self._messages = 0
+        self._flushes = 0
+
+    def start(self) -> None:
+        """Start the timer thread."""
+        self._stopped = False
+        self._thread = threading.Thread(
+            target=self._run, name="burst-coalescer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> int:
+        """
+        Flush all open bursts and stop the timer thread.
+
+        Returns:
+            Number of bursts flushed
+        """
+        with self._wake:
+            self._stopped = True
+            flushed = self._flush_channels(list(self._bursts))
+            self._wake.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return flushed
+
+    def add(self, message: dict, context: Any = None) -> bool:
+        """
+        Add a message to the burst of its channel.
+
+        A message that cannot join the open burst flushes it first.
+
+        Args:
+            message: Slack message event
+            context: Passed to the flush callback with the burst
+
+        Returns:
+            True if the message was buffered; False if it was not, in which
+            case the caller handles it now
+        """
+        channel = message["channel"]
+        now = time.monotonic()
+        with self._wake:
+            burst = self._bursts.get(channel)
+            if self._stopped or not coalescable(message):
+                if burst is not None:
+                    self._flush_channels([channel])
+                return False
+
+            self._messages += 1
+            if (
+                burst is not None
+                and burst.user == message["user"]
+                and len(burst.messages) < self.max_messages
+            ):
+                burst.messages.append(message)
+                burst.deadline = min(
+                    now + self.window, burst.started + self.max_latency
+                )
+                return True
+
+            if burst is not None:
+                self._flush_channels([channel])
+            self._bursts[channel] = Burst(
+                message, context, now, now + min(self.window, self.max_latency)
+            )
+            self._wake.notify_all()
+            return True
+
+    def _flush_channels(self, channels: List[str]) -> int:
+        # Called with the lock held
+        for channel in channels:
+            burst = self._bursts.pop(channel)
+            self._flushes += 1
+            try:
+                self.flush(burst.merged(), burst.context)
+            except Exception as e:
+                logging.error("Failed to flush message burst: %s", type(e).__name__)
+        return len(channels)
+
+    def _run(self) -> None:
+        with self._wake:
+            while not self._stopped:
+                now = time.monotonic()
+                self._flush_channels(
+                    [c for c, b in self._bursts.items() if b.deadline <= now]
+                )
+                next_deadline = min(
+                    (b.deadline for b in self._bursts.values()), default=None
+                )
+                self._wake.wait(None if next_deadline is None else next_deadline - now)
+
+    def stats(self) -> Dict[str, float]:
+        """Return buffered messages, flushed bursts and open bursts."""
+        with self._wake:
+            return {
+                "messages": self._messages,
+                "bursts": self._flushes,
+                "open": len(self._bursts),
+                "messages_per_burst": (
+                    round(self._messages / self._flushes, 2) if self._flushes else 0.0
+                ),
+            }
@@ -9,14 +9,33 @@ DeepL API client with robust error handling, timeouts, and retries.
 
 This module provides functions to interact with the DeepL translation API
 with proper error handling, connection timeouts, and retry logic.
+
+All requests go through a process-wide AdaptiveLimiter that caps in-flight
+requests and honours DeepL's Retry-After for every thread.
 """
 
 import logging
+import uuid
 import requests
-from typing import Tuple
+from typing import Iterable, Iterator, List, Optional, Tuple
 from urllib3.util.retry import Retry
 from requests.adapters import HTTPAdapter
 
+from rate_limiter import AdaptiveLimiter, parse_retry_after
+
+# Process-wide limiter shared by every DeepL request
+limiter = AdaptiveLimiter()
+
+# Number of times a throttled (HTTP 429) request is retried
+MAX_THROTTLE_RETRIES = 3
+
+# DeepL accepts at most 50 texts in one translate request
+MAX_TEXTS_PER_REQUEST = 50
+
+# DeepL API base URLs
+DEEPL_PRO_URL = "https://api.deepl.com/v2"
+DEEPL_FREE_URL = "https://api-free.deepl.com/v2"
+
 
 class DeeplClientError(Exception):
     """
@@ -29,8 +48,147 @@ class DeeplClientError(Exception):
     pass
 
 
+class DeeplQuotaExceededError(DeeplClientError):
+    """
+    Raised when DeepL rejects a request because the character quota of the
+    current billing period is exhausted (HTTP 456).
+
+    Retrying does not help until the quota is reset or raised.
+    """
+
+    pass
+
+
+class _MultipartBody:
+    """
+    multipart/form-data body streaming one file of known size.
+
+    requests sends iterables with a length as a Content-Length body, one
+    chunk at a time, so the file is never held in memory.
+    """
+
+    def __init__(self, fields: dict, filename: str, chunks: Iterable[bytes], size: int):
+        boundary = uuid.uuid4().hex
+        filename = filename.replace('"', "").replace("\r", "").replace("\n", "")
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        self._head = (
+            "".join(
+                f"--{boundary}\r\n"
+                f'Content-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+                for name, value in fields.items()
+            ).encode()
+            + (
+                f"--{boundary}\r\n"
+                f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+                "Content-Type: application/octet-stream\r\n\r\n"
+            ).encode()
+        )
+        self._tail = f"\r\n--{boundary}--\r\n".encode()
+        self._chunks = chunks
+        self._size = size
+
+    def __len__(self) -> int:
+        return len(self._head) + self._size + len(self._tail)
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield self._head
+        sent = 0
+        for chunk in self._chunks:
+            sent += len(chunk)
+            if sent > self._size:
+                raise DeeplClientError("Document is larger than its declared size")
+            yield chunk
+        if sent != self._size:
+            raise DeeplClientError("Document is smaller than its declared size")
+        yield self._tail
+
+
+def _create_session(retry: bool = True) -> requests.Session:
+    """
+    Create a requests session with a retry strategy for server errors.
+
+    Rate limiting (429) is not retried here; it is handled by _post() so that
+    Retry-After is shared through the limiter. Sessions sending streamed
+    bodies are created with retry False, since a stream cannot be replayed.
+    """
+    if not retry:
+        return requests.Session()
+
+    # Configure retry strategy for network resilience
+    retry_strategy = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[500, 502, 503, 504],
+        allowed_methods=["POST"],
+    )
+
+    # Create session with retry adapter
+    session = requests.Session()
+    adapter = HTTPAdapter(max_retries=retry_strategy)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    return session
+
+
+def _post(
+    session: requests.Session,
+    url: str,
+    data: "dict | _MultipartBody",
+    timeout: int,
+    stream: bool = False,
+) -> requests.Response:
+    """
+    POST to DeepL through the shared limiter.
+
+    Throttled responses pause every caller for Retry-After seconds and are
+    retried up to MAX_THROTTLE_RETRIES times; the last response is returned
+    so the caller can raise for its status. Streamed multipart bodies are
+    sent once.
+
+    Raises:
+        DeeplClientError: If no request slot frees up within timeout
+        DeeplQuotaExceededError: If the DeepL quota is exhausted
+    """
+    # Prepare headers (avoid logging auth_key)
+    headers = {"User-Agent": "linguafrancatto/2.1"}
+    retries = MAX_THROTTLE_RETRIES
+    if isinstance(data, _MultipartBody):
+        headers["Content-Type"] = data.content_type
+        retries = 0
+
+    for attempt in range(retries + 1):
+        with limiter.slot(timeout) as acquired:
+            if not acquired:
+                logging.error("Timed out waiting for a DeepL API request slot")
+                raise DeeplClientError("Timed out waiting for rate limit")
+            response = session.post(
+                url, data=data, headers=headers, timeout=timeout, stream=stream
+            )
+
+        if response.status_code != 429:
+            # Only successful answers may raise the limit, not 456 or 5xx
+            if 200 <= response.status_code < 300:
+                limiter.record_success()
+            break
+
+        limiter.record_throttle(parse_retry_after(response.headers.get("Retry-After")))
+        logging.warning("DeepL API rate limited (attempt %s)", attempt + 1)
+
+    if response.status_code == 456:
+        logging.error("DeepL API quota exceeded")
+        raise DeeplQuotaExceededError("Quota exceeded")
+
+    return response
+
+
 def translate_text(
-    auth_key: str, text: str, target_lang: str, timeout: int = 10
+    auth_key: str,
+    text: str,
+    target_lang: str,
+    timeout: int = 10,
+    base_url: str = DEEPL_PRO_URL,
+    formality: Optional[str] = None,
 ) -> str:
     """
     Translate text using the DeepL API with robust error handling.
@@ -40,6 +198,8 @@ def translate_text(
         text: Text to translate
         target_lang: Target language code (e.g., 'EN', 'FR', 'JA')
         timeout: Request timeout in seconds (default: 10)
+        base_url: DeepL API base URL (default: DEEPL_PRO_URL)
+        formality: Formality option such as 'more' or 'less' (default: None)
 
     Returns:
         Translated text as a string
@@ -47,35 +207,73 @@ def translate_text(
     Raises:
         DeeplClientError: If the API request fails or returns invalid data
     """
-    url = "https://api.deepl.com/v2/translate"
+    return _translate(auth_key, text, target_lang, timeout, base_url, formality)[0]
 
-    # Configure retry strategy for network resilience
-    retry_strategy = Retry(
-        total=3,
-        backoff_factor=0.5,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=["POST"],
+
+def translate_texts(
+    auth_key: str,
+    texts: List[str],
+    target_lang: str,
+    timeout: int = 30,
+    base_url: str = DEEPL_PRO_URL,
+    formality: Optional[str] = None,
+) -> List[str]:
+    """
+    Translate several texts in one DeepL API request.
+
+    Args:
+        auth_key: DeepL API authentication key
+        texts: Texts to translate (at most MAX_TEXTS_PER_REQUEST)
+        target_lang: Target language code (e.g., 'EN', 'FR', 'JA')
+        timeout: Request timeout in seconds (default: 30)
+        base_url: DeepL API base URL (default: DEEPL_PRO_URL)
+        formality: Formality option such as 'more' or 'less' (default: None)
+
+    Returns:
+        Translated texts, in the order of texts
+
+    Raises:
+        DeeplClientError: If the API request fails or returns invalid data
+    """
+    if not texts:
+        return []
+    if len(texts) > MAX_TEXTS_PER_REQUEST:
+        raise ValueError(f"At most {MAX_TEXTS_PER_REQUEST} texts per request")
+
+    translated = _translate(
+        auth_key, list(texts), target_lang, timeout, base_url, formality
     )
+    if len(translated) != len(texts):
+        logging.error("DeepL API returned a different number of translations")
+        raise DeeplClientError("Invalid response from DeepL API: translation count")
+    return translated
 
-    # Create session with retry adapter
-    session = requests.Session()
-    adapter = HTTPAdapter(max_retries=retry_strategy)
-    session.mount("https://", adapter)
 
-    # Prepare headers (avoid logging auth_key)
-    headers = {"User-Agent": "linguafrancatto/2.1"}
+def _translate(
+    auth_key: str,
+    text: "str | List[str]",
+    target_lang: str,
+    timeout: int,
+    base_url: str,
+    formality: Optional[str],
+) -> List[str]:
+    url = f"{base_url}/translate"
+
+    session = _create_session()
 
-    # Prepare form data
+    # Prepare form data (a list of texts is sent as repeated 'text' fields)
     data = {
         "auth_key": auth_key,
         "text": text,
         "target_lang": target_lang,
         "tag_handling": "xml",
     }
+    if formality:
+        data["formality"] = formality
 
     try:
         # Make POST request with form-encoded data
-        response = session.post(url, data=data, headers=headers, timeout=timeout)
+        response = _post(session, url, data, timeout)
         response.raise_for_status()
 
         # Parse JSON response
@@ -88,32 +286,34 @@ def translate_text(
                 "Invalid response from DeepL API: missing translations"
             )
 
-        translated_text = result["translations"][0]["text"]
-        return translated_text
+        return [translation["text"] for translation in result["translations"]]
 
     except requests.exceptions.Timeout as e:
         logging.error("DeepL API request timed out")
         raise DeeplClientError(f"Request timed out: {str(e)}") from e
     except requests.exceptions.HTTPError as e:
-        logging.error(f"DeepL API HTTP error: {e.response.status_code}")
+        logging.error("DeepL API HTTP error: %s", e.response.status_code)
         raise DeeplClientError(f"HTTP error: {e.response.status_code}") from e
     except requests.exceptions.RequestException as e:
-        logging.error(f"DeepL API request failed: {type(e).__name__}")
+        logging.error("DeepL API request failed: %s", type(e).__name__)
         raise DeeplClientError(f"Request failed: {str(e)}") from e
-    except (KeyError, IndexError, ValueError) as e:
+    except (KeyError, IndexError, TypeError, ValueError) as e:
         logging.error("Failed to parse DeepL API response")
         raise DeeplClientError(f"Failed to parse API response: {str(e)}") from e
     finally:
         session.close()
 
 
-def get_usage(auth_key: str, timeout: int = 10) -> Tuple[int, int]:
+def get_usage(
+    auth_key: str, timeout: int = 10, base_url: str = DEEPL_PRO_URL
+) -> Tuple[int, int]:
     """
     Get DeepL API usage statistics.
 
     Args:
         auth_key: DeepL API authentication key
         timeout: Request timeout in seconds (default: 10)
+        base_url: DeepL API base URL (default: DEEPL_PRO_URL)
 
     Returns:
         Tuple of (character_count, character_limit)
@@ -121,30 +321,16 @@ def get_usage(auth_key: str, timeout: int = 10) -> Tuple[int, int]:
     Raises:
         DeeplClientError: If the API request fails or returns invalid data
     """
-    url = "https://api.deepl.com/v2/usage"
+    url = f"{base_url}/usage"
 
-    # Configure retry strategy
-    retry_strategy = Retry(
-        total=3,
-        backoff_factor=0.5,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=["POST"],
-    )
-
-    # Create session with retry adapter
-    session = requests.Session()
-    adapter = HTTPAdapter(max_retries=retry_strategy)
-    session.mount("https://", adapter)
-
-    # Prepare headers
-    headers = {"User-Agent": "linguafrancatto/2.1"}
+    session = _create_session()
 
     # Use POST with form data to avoid exposing auth_key in URL
     data = {"auth_key": auth_key}
 
     try:
         # Make POST request
-        response = session.post(url, data=data, headers=headers, timeout=timeout)
+        response = _post(session, url, data, timeout)
         response.raise_for_status()
 
         # Parse JSON response
@@ -166,13 +352,219 @@ def get_usage(auth_key: str, timeout: int = 10) -> Tuple[int, int]:
         logging.error("DeepL API usage request timed out")
         raise DeeplClientError(f"Request timed out: {str(e)}") from e
     except requests.exceptions.HTTPError as e:
-        logging.error(f"DeepL API usage HTTP error: {e.response.status_code}")
+        logging.error("DeepL API usage HTTP error: %s", e.response.status_code)
         raise DeeplClientError(f"HTTP error: {e.response.status_code}") from e
     except requests.exceptions.RequestException as e:
-        logging.error(f"DeepL API usage request failed: {type(e).__name__}")
+        logging.error("DeepL API usage request failed: %s", type(e).__name__)
         raise DeeplClientError(f"Request failed: {str(e)}") from e
     except (KeyError, ValueError) as e:
         logging.error("Failed to parse DeepL API usage response")
         raise DeeplClientError(f"Failed to parse API response: {str(e)}") from e
     finally:
         session.close()
+
+
+def probe(auth_key: str, timeout: int = 10, base_url: str = DEEPL_PRO_URL) -> int:
+    """
+    Check that the DeepL API answers, bypassing the shared limiter.
+
+    Meant for readiness probes: rate limiting (429) and an exhausted quota
+    (456) are account-wide and say nothing about this instance, so they
+    count as answers, and the probe neither waits for a request slot nor
+    feeds the limiter.
+
+    Args:
+        auth_key: DeepL API authentication key
+        timeout: Request timeout in seconds (default: 10)
+        base_url: DeepL API base URL (default: DEEPL_PRO_URL)
+
+    Returns:
+        HTTP status code of the answer
+
+    Raises:
+        DeeplClientError: If the request fails or DeepL answers with another error
+    """
+    session = _create_session(retry=False)
+    try:
+        response = session.post(
+            f"{base_url}/usage",
+            data={"auth_key": auth_key},
+            headers={"User-Agent": "linguafrancatto/2.1"},
+            timeout=timeout,
+        )
+    except requests.exceptions.RequestException as e:
+        raise DeeplClientError(f"Request failed: {type(e).__name__}") from e
+    finally:
+        session.close()
+
+    if response.status_code < 400 or response.status_code in (429, 456):
+        return response.status_code
+    raise DeeplClientError(f"HTTP error: {response.status_code}")
+
+
+def upload_document(
+    auth_key: str,
+    chunks: Iterable[bytes],
+    size: int,
+    filename: str,
+    target_lang: str,
+    timeout: int = 60,
+    base_url: str = DEEPL_PRO_URL,
+) -> Tuple[str, str]:
+    """
+    Stream a document to the DeepL document API for translation.
+
+    Args:
+        auth_key: DeepL API authentication key
+        chunks: Contents of the document, in chunks
+        size: Size of the document in bytes
+        filename: File name; DeepL infers the format from its extension
+        target_lang: Target language code (e.g., 'EN', 'FR', 'JA')
+        timeout: Request timeout in seconds (default: 60)
+        base_url: DeepL API base URL (default: DEEPL_PRO_URL)
+
+    Returns:
+        Tuple of (document_id, document_key)
+
+    Raises:
+        DeeplClientError: If the upload fails or the response is invalid
+    """
+    url = f"{base_url}/document"
+
+    # The body is a one-shot stream, so transport errors are not retried
+    session = _create_session(retry=False)
+    body = _MultipartBody(
+        {"auth_key": auth_key, "target_lang": target_lang}, filename, chunks, size
+    )
+
+    try:
+        response = _post(session, url, body, timeout)
+        response.raise_for_status()
+        result = response.json()
+        return (result["document_id"], result["document_key"])
+
+    except requests.exceptions.Timeout as e:
+        logging.error("DeepL API document upload timed out")
+        raise DeeplClientError(f"Request timed out: {str(e)}") from e
+    except requests.exceptions.HTTPError as e:
+        logging.error("DeepL API document HTTP error: %s", e.response.status_code)
+        raise DeeplClientError(f"HTTP error: {e.response.status_code}") from e
+    except requests.exceptions.RequestException as e:
+        logging.error("DeepL API document upload failed: %s", type(e).__name__)
+        raise DeeplClientError(f"Request failed: {str(e)}") from e
+    except (KeyError, TypeError, ValueError) as e:
+        logging.error("Failed to parse DeepL API document response")
+        raise DeeplClientError(f"Failed to parse API response: {str(e)}") from e
+    finally:
+        session.close()
+
+
+def document_status(
+    auth_key: str,
+    document_id: str,
+    document_key: str,
+    timeout: int = 10,
+    base_url: str = DEEPL_PRO_URL,
+) -> dict:
+    """
+    Get the translation status of an uploaded document.
+
+    Args:
+        auth_key: DeepL API authentication key
+        document_id: Document ID returned by upload_document()
+        document_key: Document key returned by upload_document()
+        timeout: Request timeout in seconds (default: 10)
+        base_url: DeepL API base URL (default: DEEPL_PRO_URL)
+
+    Returns:
+        Status object with 'status' ('queued', 'translating', 'done' or
+        'error') and, depending on it, 'seconds_remaining',
+        'billed_characters' or 'error_message'
+
+    Raises:
+        DeeplClientError: If the API request fails or returns invalid data
+    """
+    url = f"{base_url}/document/{document_id}"
+
+    session = _create_session()
+    data = {"auth_key": auth_key, "document_key": document_key}
+
+    try:
+        response = _post(session, url, data, timeout)
+        response.raise_for_status()
+        result = response.json()
+        if "status" not in result:
+            logging.error("DeepL API returned invalid document status")
+            raise DeeplClientError("Invalid response from DeepL API: missing status")
+        return result
+
+    except requests.exceptions.Timeout as e:
+        logging.error("DeepL API document status request timed out")
+        raise DeeplClientError(f"Request timed out: {str(e)}") from e
+    except requests.exceptions.HTTPError as e:
+        logging.error(
+            "DeepL API document status HTTP error: %s", e.response.status_code
+        )
+        raise DeeplClientError(f"HTTP error: {e.response.status_code}") from e
+    except requests.exceptions.RequestException as e:
+        logging.error("DeepL API document status request failed: %s", type(e).__name__)
+        raise DeeplClientError(f"Request failed: {str(e)}") from e
+    except ValueError as e:
+        logging.error("Failed to parse DeepL API document status")
+        raise DeeplClientError(f"Failed to parse API response: {str(e)}") from e
+    finally:
+        session.close()
+
+
+def download_document(
+    auth_key: str,
+    document_id: str,
+    document_key: str,
+    chunk_size: int = 65536,
+    timeout: int = 60,
+    base_url: str = DEEPL_PRO_URL,
+) -> Iterator[bytes]:
+    """
+    Stream a translated document from DeepL.
+
+    DeepL deletes the document once it has been downloaded, so the result
+    can only be read once.
+
+    Args:
+        auth_key: DeepL API authentication key
+        document_id: Document ID returned by upload_document()
+        document_key: Document key returned by upload_document()
+        chunk_size: Bytes per yielded chunk
+        timeout: Request timeout in seconds (default: 60)
+        base_url: DeepL API base URL (default: DEEPL_PRO_URL)
+
+    Yields:
+        Contents of the translated document
+
+    Raises:
+        DeeplClientError: If the API request fails
+    """
+    url = f"{base_url}/document/{document_id}/result"
+
+    session = _create_session()
+    data = {"auth_key": auth_key, "document_key": document_key}
+
+    try:
+        response = _post(session, url, data, timeout, stream=True)
+        response.raise_for_status()
+        with response:
+            yield from response.iter_content(chunk_size)
+
+    except requests.exceptions.Timeout as e:
+        logging.error("DeepL API document download timed out")
+        raise DeeplClientError(f"Request timed out: {str(e)}") from e
+    except requests.exceptions.HTTPError as e:
+        logging.error(
+            "DeepL API document download HTTP error: %s", e.response.status_code
+        )
+        raise DeeplClientError(f"HTTP error: {e.response.status_code}") from e
+    except requests.exceptions.RequestException as e:
+        logging.error("DeepL API document download failed: %s", type(e).__name__)
+        raise DeeplClientError(f"Request failed: {str(e)}") from e
+    finally:
+        session.close()
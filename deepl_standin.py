@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Local stand-in for the DeepL API, for tests and benchmarks.
+
+The stand-in implements /v2/translate, /v2/usage and the /v2/document
+upload, status and result endpoints. Translations are the input text
+prefixed with the target language, e.g. '[FR] Hello', and every request can
+be delayed to simulate a slow endpoint. Documents report 'translating' for
+a configurable number of status polls before they are done.
+
+Usage:
+    python deepl_standin.py --port 8080 --delay 0.2
+    DEEPL_ENDPOINTS=http://127.0.0.1:8080/v2 python main.py
+"""
+
+import argparse
+import email.parser
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qs
+
+
+class DeeplStandin:
+    """
+    Threaded HTTP server emulating the DeepL API.
+
+    Attributes:
+        delay: Seconds to wait before answering, or a callable returning it
+        character_count: Characters translated so far
+        character_limit: Character limit reported by /v2/usage
+        requests: Number of requests served
+        document_polls: Status polls answered 'translating' per document
+        documents: Document ID -> uploaded document state
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        delay: "float | Callable[[], float]" = 0.0,
+        character_limit: int = 500000,
+        document_polls: int = 1,
+    ):
+        self.delay = delay
+        self.character_count = 0
+        self.character_limit = character_limit
+        self.requests = 0
+        self.document_polls = document_polls
+        self.documents: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to configure as a DeepL endpoint."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v2"
+
+    def start(self) -> "DeeplStandin":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="deepl-standin", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _sleep(self) -> None:
+        delay = self.delay() if callable(self.delay) else self.delay
+        if delay:
+            time.sleep(delay)
+
+    def _handler_class(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status: int, body: dict) -> None:
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length)
+                with standin._lock:
+                    standin.requests += 1
+                standin._sleep()
+
+                content_type = self.headers.get("Content-Type", "")
+                if content_type.startswith("multipart/form-data"):
+                    self._upload_document(content_type, body)
+                    return
+                form = parse_qs(body.decode())
+
+                if "/document/" in self.path:
+                    self._document(form)
+                elif self.path.endswith("/translate"):
+                    texts = form.get("text", [])
+                    target_lang = form.get("target_lang", [""])[0]
+                    with standin._lock:
+                        standin.character_count += sum(len(t) for t in texts)
+                    self._reply(
+                        200,
+                        {
+                            "translations": [
+                                {
+                                    "detected_source_language": "EN",
+                                    "text": f"[{target_lang}] {text}",
+                                }
+                                for text in texts
+                            ]
+                        },
+                    )
+                elif self.path.endswith("/usage"):
+                    self._reply(
+                        200,
+                        {
+                            "character_count": standin.character_count,
+                            "character_limit": standin.character_limit,
+                        },
+                    )
+                else:
+                    self._reply(404, {"message": "Not found"})
+
+            def _upload_document(self, content_type: str, body: bytes) -> None:
+                message = email.parser.BytesParser().parsebytes(
+                    f"Content-Type: {content_type}\r\n\r\n".encode() + body
+                )
+                fields = {
+                    part.get_param("name", header="content-disposition"): part
+                    for part in message.get_payload()
+                }
+                if "file" not in fields or "target_lang" not in fields:
+                    self._reply(400, {"message": "Missing file or target_lang"})
+                    return
+                document_id = uuid.uuid4().hex.upper()
+                document = {
+                    "key": uuid.uuid4().hex,
+                    "filename": fields["file"].get_filename(),
+                    "target_lang": fields["target_lang"].get_payload(),
+                    "content": fields["file"].get_payload(decode=True),
+                    "polls": 0,
+                }
+                with standin._lock:
+                    standin.documents[document_id] = document
+                self._reply(
+                    200, {"document_id": document_id, "document_key": document["key"]}
+                )
+
+            def _document(self, form: dict) -> None:
+                document_id = self.path.split("/document/")[1].split("/")[0]
+                document_key = form.get("document_key", [""])[0]
+                with standin._lock:
+                    document = standin.documents.get(document_id)
+                    if document is None or document["key"] != document_key:
+                        document = None
+                    elif not self.path.endswith("/result"):
+                        document["polls"] += 1
+                if document is None:
+                    self._reply(404, {"message": "Document not found"})
+                    return
+
+                if not self.path.endswith("/result"):
+                    if document["polls"] <= standin.document_polls:
+                        status = {"status": "translating", "seconds_remaining": 1}
+                    else:
+                        status = {
+                            "status": "done",
+                            "billed_characters": len(document["content"]),
+                        }
+                    self._reply(200, {"document_id": document_id, **status})
+                    return
+
+                # Results can be downloaded once
+                with standin._lock:
+                    standin.documents.pop(document_id, None)
+                payload = f"[{document['target_lang']}] ".encode() + document["content"]
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local DeepL API stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    standin = DeeplStandin(args.host, args.port, args.delay)
+    print(f"DeepL stand-in listening on {standin.base_url}")
+    standin.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        standin.stop()
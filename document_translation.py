@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Translation of files and text snippets shared in multichannel groups.
+
+Files are streamed from Slack straight into a DeepL /v2/document upload in
+chunks, so no file is held in memory. DeepL translates documents
+asynchronously; a single poller thread checks every pending document at the
+interval DeepL suggests, off the Slack request path and the translation
+workers. Translated documents are downloaded into a spool that moves to
+disk above SPOOL_MEMORY bytes and streamed up to each channel of the target
+language.
+"""
+
+import heapq
+import itertools
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, IO, Iterator, List, Optional, Set
+
+import requests
+from slack_sdk import WebClient
+from slack_sdk.errors import SlackApiError
+
+import deepl_client
+from deepl_client import DEEPL_PRO_URL, DeeplClientError
+
+# File extensions accepted by the DeepL document API
+SUPPORTED_EXTENSIONS = frozenset(
+    {"docx", "pptx", "xlsx", "pdf", "htm", "html", "txt", "xlf", "xliff", "srt"}
+)
+
+# Bytes read from or written to the network at a time
+CHUNK_SIZE = 64 * 1024
+
+# Translated documents larger than this are spooled to disk
+SPOOL_MEMORY = 1024 * 1024
+
+# Longest wait between two status polls of a document
+MAX_POLL_DELAY = 60.0
+
+
+class DocumentTranslationError(Exception):
+    """Raised when a file cannot be read from or posted to Slack."""
+
+    pass
+
+
+def document_filename(file: dict) -> Optional[str]:
+    """
+    Return the file name to upload to DeepL, or None if DeepL cannot
+    translate the file.
+
+    Plain-text snippets are uploaded as .txt files.
+    """
+    name = file.get("name") or file.get("title") or "snippet"
+    if file.get("mode") == "snippet" and file.get("filetype") == "text":
+        return name if name.lower().endswith(".txt") else f"{name}.txt"
+    extension = os.path.splitext(name)[1].lstrip(".").lower()
+    return name if extension in SUPPORTED_EXTENSIONS else None
+
+
+def slack_file_chunks(
+    token: str, url: str, chunk_size: int = CHUNK_SIZE, timeout: int = 30
+) -> Iterator[bytes]:
+    """
+    Stream a private Slack file.
+
+    Raises:
+        DocumentTranslationError: If the download fails
+    """
+    try:
+        with requests.get(
+            url,
+            headers={"Authorization": f"Bearer {token}"},
+            stream=True,
+            timeout=timeout,
+        ) as response:
+            response.raise_for_status()
+            yield from response.iter_content(chunk_size)
+    except requests.exceptions.RequestException as e:
+        logging.error("Slack file download failed: %s", type(e).__name__)
+        raise DocumentTranslationError(f"Download failed: {type(e).__name__}") from e
+
+
+class _SizedStream:
+    """Iterable body with a length, sent by requests with Content-Length."""
+
+    def __init__(self, source: IO[bytes], size: int):
+        self._source = source
+        self._size = size
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[bytes]:
+        return iter(lambda: self._source.read(CHUNK_SIZE), b"")
+
+
+def upload_to_slack(
+    client: WebClient,
+    channel_id: str,
+    filename: str,
+    source: IO[bytes],
+    size: int,
+    comment: str,
+    timeout: int = 60,
+) -> None:
+    """
+    Stream a file to a channel with Slack's external upload flow.
+
+    Args:
+        client: WebClient of the workspace
+        channel_id: Channel to share the file in
+        filename: File name shown in Slack
+        source: File object positioned at the start of the contents
+        size: Size of the contents in bytes
+        comment: Message posted with the file
+
+    Raises:
+        DocumentTranslationError: If the upload fails
+    """
+    try:
+        upload = client.files_getUploadURLExternal(filename=filename, length=size)
+        response = requests.post(
+            upload["upload_url"], data=_SizedStream(source, size), timeout=timeout
+        )
+        response.raise_for_status()
+        client.files_completeUploadExternal(
+            files=[{"id": upload["file_id"], "title": filename}],
+            channel_id=channel_id,
+            initial_comment=comment,
+        )
+    except (SlackApiError, requests.exceptions.RequestException) as e:
+        logging.error("Slack file upload failed: %s", type(e).__name__)
+        raise DocumentTranslationError(f"Upload failed: {type(e).__name__}") from e
+
+
+class DocumentJob:
+    """One file translated into one language for one or more channels."""
+
+    __slots__ = (
+        "client",
+        "file",
+        "filename",
+        "target_lang",
+        "channels",
+        "comment",
+        "source_channel",
+        "user",
+        "team_id",
+        "document_id",
+        "document_key",
+        "deadline",
+    )
+
+    def __init__(
+        self,
+        client: WebClient,
+        file: dict,
+        filename: str,
+        target_lang: str,
+        channels: List[str],
+        comment: str,
+        source_channel: str,
+        user: str,
+        team_id: str,
+        deadline: float,
+    ):
+        self.client = client
+        self.file = file
+        self.filename = filename
+        self.target_lang = target_lang
+        self.channels = channels
+        self.comment = comment
+        self.source_channel = source_channel
+        self.user = user
+        self.team_id = team_id
+        self.document_id: Optional[str] = None
+        self.document_key: Optional[str] = None
+        self.deadline = deadline
+
+
+class DocumentTranslator:
+    """
+    Uploads, polls and delivers document translations in the background.
+
+    Uploads and deliveries run on a small worker pool; status polls run on
+    one poller thread. At most max_pending documents are in progress at
+    once; further files are rejected.
+    """
+
+    def __init__(
+        self,
+        auth_key: str,
+        base_url: str = DEEPL_PRO_URL,
+        max_bytes: int = 10 * 1024 * 1024,
+        poll_interval: float = 5.0,
+        max_pending: int = 20,
+        workers: int = 2,
+        timeout: float = 900.0,
+        on_billed: Optional[Callable[[int, str, str, str, str], None]] = None,
+    ):
+        """
+        Args:
+            auth_key: DeepL API authentication key
+            base_url: DeepL API base URL
+            max_bytes: Largest file translated, in bytes
+            poll_interval: Shortest wait between two status polls
+            max_pending: Largest number of documents in progress
+            workers: Threads uploading and delivering documents
+            timeout: Seconds after which a document is given up
+            on_billed: Called with (characters, target_lang, source_channel,
+                user, team_id) when DeepL reports the billed characters
+        """
+        self.auth_key = auth_key
+        self.base_url = base_url
+        self.max_bytes = max_bytes
+        self.poll_interval = poll_interval
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.on_billed = on_billed
+        self._pool = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="documents"
+        )
+        self._futures: Set[Future] = set()
+        self._polls: List[tuple] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._pending = 0
+        self._counts = {"translated": 0, "failed": 0, "rejected": 0}
+        self._stopped = False
+        self._poller: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the poller thread."""
+        self._poller = threading.Thread(
+            target=self._poll_loop, name="document-poller", daemon=True
+        )
+        self._poller.start()
+
+    def stop(self, timeout: Optional[float] = None) -> Dict[str, int]:
+        """
+        Stop polling and drop documents still in progress.
+
+        Returns:
+            Number of abandoned documents
+        """
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._poller is not None:
+            self._poller.join(timeout)
+        # ThreadPoolExecutor.shutdown(cancel_futures=True) needs Python 3.9
+        for future in list(self._futures):
+            future.cancel()
+        self._pool.shutdown(wait=False)
+        with self._cond:
+            return {"abandoned": self._pending}
+
+    def stats(self) -> Dict[str, int]:
+        """Return counters for the readiness report."""
+        with self._cond:
+            return {
+                "pending": self._pending,
+                "polling": len(self._polls),
+                **self._counts,
+            }
+
+    def submit(
+        self,
+        client: WebClient,
+        file: dict,
+        target_lang: str,
+        channels: List[str],
+        comment: str,
+        source_channel: str = "",
+        user: str = "",
+        team_id: str = "",
+    ) -> bool:
+        """
+        Translate a shared Slack file and post it to channels.
+
+        Args:
+            client: WebClient of the workspace
+            file: File object of the message event
+            target_lang: Target language code
+            channels: Channel IDs of the target language
+            comment: Message posted with the translated file
+            source_channel: Channel ID the consumption is attributed to
+            user: User ID the consumption is attributed to
+            team_id: Slack team ID the consumption is attributed to
+
+        Returns:
+            False if the file is not translated (unsupported type, too
+            large, or too many documents in progress)
+        """
+        filename = document_filename(file)
+        size = file.get("size", 0)
+        # The upload is streamed with a declared length, so the size is needed
+        if filename is None or not file.get("url_private_download") or not size:
+            return False
+        if size > self.max_bytes:
+            logging.warning(
+                "Skipping document of %d bytes (limit %d)", size, self.max_bytes
+            )
+            with self._cond:
+                self._counts["rejected"] += 1
+            return False
+
+        with self._cond:
+            if self._stopped or self._pending >= self.max_pending:
+                logging.warning("Too many documents in progress, skipping one")
+                self._counts["rejected"] += 1
+                return False
+            self._pending += 1
+
+        job = DocumentJob(
+            client,
+            file,
+            filename,
+            target_lang,
+            channels,
+            comment,
+            source_channel,
+            user,
+            team_id,
+            deadline=time.monotonic() + self.timeout,
+        )
+        self._submit(self._upload, job)
+        return True
+
+    def _submit(self, fn: Callable[[DocumentJob], None], job: DocumentJob) -> None:
+        # Queued futures are tracked so that stop() can cancel them
+        future = self._pool.submit(fn, job)
+        self._futures.add(future)
+        future.add_done_callback(self._futures.discard)
+
+    def _finish(self, job: DocumentJob, ok: bool) -> None:
+        with self._cond:
+            self._pending -= 1
+            self._counts["translated" if ok else "failed"] += 1
+
+    def _schedule_poll(self, job: DocumentJob, delay: float) -> None:
+        with self._cond:
+            heapq.heappush(
+                self._polls, (time.monotonic() + delay, next(self._seq), job)
+            )
+            self._cond.notify_all()
+
+    def _upload(self, job: DocumentJob) -> None:
+        ok = False
+        try:
+            job.document_id, job.document_key = deepl_client.upload_document(
+                self.auth_key,
+                slack_file_chunks(job.client.token, job.file["url_private_download"]),
+                job.file["size"],
+                job.filename,
+                job.target_lang,
+                base_url=self.base_url,
+            )
+            self._schedule_poll(job, self.poll_interval)
+            ok = True
+        except (DeeplClientError, DocumentTranslationError) as e:
+            logging.error("Document upload failed: %s", type(e).__name__)
+        except Exception as e:
+            logging.error("Unexpected error in document upload: %s", type(e).__name__)
+        finally:
+            # Scheduled documents are finished by the poller
+            if not ok:
+                self._finish(job, ok=False)
+
+    def _poll_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    now = time.monotonic()
+                    if self._polls and self._polls[0][0] <= now:
+                        break
+                    self._cond.wait(self._polls[0][0] - now if self._polls else None)
+                if self._stopped:
+                    return
+                _, _, job = heapq.heappop(self._polls)
+            try:
+                self._poll(job)
+            except Exception as e:
+                logging.error("Unexpected error in document poll: %s", type(e).__name__)
+                self._finish(job, ok=False)
+
+    def _poll(self, job: DocumentJob) -> None:
+        try:
+            status = deepl_client.document_status(
+                self.auth_key, job.document_id, job.document_key, base_url=self.base_url
+            )
+        except DeeplClientError:
+            # Transient; polled again until the deadline
+            status = {"status": "translating"}
+
+        if status["status"] == "done":
+            if self.on_billed is not None:
+                self.on_billed(
+                    status.get("billed_characters", 0),
+                    job.target_lang,
+                    job.source_channel,
+                    job.user,
+                    job.team_id,
+                )
+            try:
+                self._submit(self._deliver, job)
+            except RuntimeError:
+                # Stopped
+                pass
+        elif status["status"] == "error":
+            logging.error(
+                "DeepL could not translate a document: %s",
+                status.get("error_message", "unknown error"),
+            )
+            self._finish(job, ok=False)
+        elif time.monotonic() > job.deadline:
+            logging.error("Document translation timed out")
+            self._finish(job, ok=False)
+        else:
+            delay = max(self.poll_interval, status.get("seconds_remaining") or 0)
+            self._schedule_poll(job, min(delay, MAX_POLL_DELAY))
+
+    def _deliver(self, job: DocumentJob) -> None:
+        ok = False
+        try:
+            # The result can be downloaded only once, but goes to every channel
+            with tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY) as spool:
+                size = 0
+                for chunk in deepl_client.download_document(
+                    self.auth_key,
+                    job.document_id,
+                    job.document_key,
+                    chunk_size=CHUNK_SIZE,
+                    base_url=self.base_url,
+                ):
+                    spool.write(chunk)
+                    size += len(chunk)
+                for channel_id in job.channels:
+                    spool.seek(0)
+                    upload_to_slack(
+                        job.client, channel_id, job.filename, spool, size, job.comment
+                    )
+            ok = True
+        except (DeeplClientError, DocumentTranslationError) as e:
+            logging.error("Document delivery failed: %s", type(e).__name__)
+        except Exception as e:
+            logging.error("Unexpected error in document delivery: %s", type(e).__name__)
+        finally:
+            self._finish(job, ok)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+First-stage filter of Slack events, run before Bolt's listener matching.
+
+Most message events are posted in channels outside every multichannel group
+and contain no keyword, so no listener acts on them. The filter finds those
+with one set lookup and one regex scan, and has them acknowledged at once
+instead of being matched against every listener. It also drops the bot's
+own events, so translations posted by the bot never come back as messages
+to translate.
+
+The channel-ID sets and the keyword regex are derived from the current
+Routing and channel directory, and rebuilt when either of them is replaced.
+"""
+
+import re
+import threading
+from collections import Counter
+from typing import Callable, Dict, FrozenSet, Iterable, Optional, Pattern, Tuple
+
+from routing import Routing
+from workspace import ChannelDirectory
+
+# Rejection reasons
+SELF = "self"
+SUBTYPE = "subtype"
+NO_ROUTE = "no_route"
+
+# Message subtypes handled by the multichannel listener
+ROUTED_SUBTYPES = frozenset({None, "file_share"})
+
+
+class EventFilter:
+    """
+    Decides whether a Slack event can lead to any action.
+
+    Events that are not message events pass, except the bot's own.
+    """
+
+    def __init__(
+        self,
+        routing: Callable[[], Routing],
+        channels: Callable[[str], Optional[ChannelDirectory]],
+        commands: Iterable[str],
+    ):
+        """
+        Args:
+            routing: Returns the current Routing
+            channels: Returns the channel directory of a team_id, or None if
+                the workspace is unknown
+            commands: Admin command keywords, matched anywhere in the text
+                like Bolt's message() listeners
+        """
+        self.routing = routing
+        self.channels = channels
+        self.commands = [re.escape(command) for command in commands]
+        self._keywords: Tuple[Optional[Routing], Optional[Pattern[str]]] = (
+            None,
+            None,
+        )
+        self._channel_ids: Dict[str, Tuple[Routing, dict, FrozenSet[str]]] = {}
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def keyword_pattern(self, routing: Routing) -> Pattern[str]:
+        """Return one regex matching the commands and the trigger keywords."""
+        cached_routing, pattern = self._keywords
+        if cached_routing is not routing or pattern is None:
+            alternatives = self.commands + [routing.triggers.pattern.pattern]
+            pattern = re.compile("|".join(alternatives))
+            self._keywords = (routing, pattern)
+        return pattern
+
+    def channel_ids(self, team_id: str, routing: Routing) -> Optional[FrozenSet[str]]:
+        """
+        Return the IDs of the channels of a workspace in a multichannel group.
+
+        Returns:
+            Channel IDs, or None if the workspace is unknown
+        """
+        directory = self.channels(team_id)
+        if directory is None:
+            return None
+        name_dict = directory.name_dict
+        cached = self._channel_ids.get(team_id)
+        if cached is not None and cached[0] is routing and cached[1] is name_dict:
+            return cached[2]
+        ids = frozenset(
+            channel_id
+            for name, channel_id in name_dict.items()
+            if routing.group_of(name) is not None
+        )
+        self._channel_ids[team_id] = (routing, name_dict, ids)
+        return ids
+
+    def check(
+        self,
+        event: dict,
+        team_id: str = "",
+        bot_id: Optional[str] = None,
+        bot_user_id: Optional[str] = None,
+    ) -> Optional[str]:
+        """
+        Classify an event and count the outcome.
+
+        Args:
+            event: The "event" of an event envelope
+            team_id: Workspace the event belongs to
+            bot_id: Bot ID of the app in that workspace
+            bot_user_id: Bot user ID of the app in that workspace
+
+        Returns:
+            None if the event may be acted on, otherwise the reason to drop it
+        """
+        reason = self._reason(event, team_id, bot_id, bot_user_id)
+        with self._lock:
+            self._counts[reason or "passed"] += 1
+        return reason
+
+    def _reason(
+        self,
+        event: dict,
+        team_id: str,
+        bot_id: Optional[str],
+        bot_user_id: Optional[str],
+    ) -> Optional[str]:
+        if (bot_id and event.get("bot_id") == bot_id) or (
+            bot_user_id and event.get("user") == bot_user_id
+        ):
+            return SELF
+        if event.get("type") != "message":
+            return None
+
+        routing = self.routing()
+        text = event.get("text")
+        if text and self.keyword_pattern(routing).search(text):
+            return None
+        if event.get("subtype") not in ROUTED_SUBTYPES:
+            return SUBTYPE
+        channel_ids = self.channel_ids(team_id, routing)
+        # Unknown workspaces are left to the listeners
+        if channel_ids is None or event.get("channel") in channel_ids:
+            return None
+        return NO_ROUTE
+
+    def stats(self) -> Dict[str, object]:
+        """Return the passed count and the rejected counts by reason."""
+        with self._lock:
+            counts = dict(self._counts)
+        passed = counts.pop("passed", 0)
+        return {"passed": passed, "rejected": counts}
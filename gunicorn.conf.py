@@ -0,0 +1,58 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Gunicorn configuration for linguafrancatto.
+
+Use it with:
+    gunicorn -c gunicorn.conf.py main:app
+
+Several workers are only started with a shared STATE_BACKEND
+(e.g. sqlite:///tmp/linguafrancatto_state.db); with the default in-memory
+backend each worker would deduplicate events, rate-limit DeepL and replay
+the outbox on its own, so a single worker is run.
+"""
+
+import multiprocessing
+import os
+import sys
+
+bind = f":{os.environ.get('PORT', '8080')}"
+
+# Each worker is a separate process with its own translation worker pool
+shared_state = os.environ.get("STATE_BACKEND", "memory") != "memory"
+workers = int(
+    os.environ.get(
+        "WEB_CONCURRENCY",
+        min(4, multiprocessing.cpu_count() * 2) if shared_state else 1,
+    )
+)
+if workers > 1 and not shared_state:
+    raise RuntimeError(
+        f"WEB_CONCURRENCY={workers} needs a shared STATE_BACKEND "
+        "(e.g. sqlite:///tmp/linguafrancatto_state.db)"
+    )
+
+# Handlers spend most of their time waiting on Slack and DeepL, so threads
+# serve concurrent events cheaply within each worker
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "8"))
+
+# The app starts background threads and opens SQLite connections at import
+# time; neither survives fork(), so every worker loads the app itself
+preload_app = False
+
+# Bolt acknowledges events before translating, so requests are short; the
+# timeout only guards against stuck workers
+timeout = 60
+# Must exceed SHUTDOWN_DEADLINE so that queued translations can drain
+graceful_timeout = 30
+keepalive = 75
+
+
+def worker_exit(server, worker):
+    # The app drains on SIGTERM itself; this covers other graceful exits
+    main = sys.modules.get("main")
+    if main is not None:
+        main.shutdown_coordinator.shutdown("worker_exit")
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Background dependency probes for the readiness endpoint.
+
+Probes call DeepL and Slack on a background thread and cache the outcome
+and latency of the last call, so that /readyz only reads cached values and
+never waits for a dependency.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+
+class LatencyProbe:
+    """
+    A dependency check with its last cached result.
+
+    Attributes:
+        name: Name of the dependency in the readiness report
+    """
+
+    def __init__(self, name: str, check: Callable[[], object]):
+        """
+        Args:
+            name: Name of the dependency
+            check: Callable that raises if the dependency is unhealthy
+        """
+        self.name = name
+        self.check = check
+        self._ok: Optional[bool] = None
+        self._latency: Optional[float] = None
+        self._error: Optional[str] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def run(self) -> bool:
+        """Run the check once and cache its outcome."""
+        started = time.monotonic()
+        try:
+            self.check()
+            ok, error = True, None
+        except Exception as e:
+            logging.warning("Health probe %s failed: %s", self.name, type(e).__name__)
+            ok, error = False, type(e).__name__
+        finished = time.monotonic()
+        with self._lock:
+            self._ok, self._error = ok, error
+            self._latency = finished - started
+            self._checked_at = finished
+        return ok
+
+    def snapshot(self) -> Dict[str, object]:
+        """
+        Return the cached outcome.
+
+        'ok' is None until the first check has finished.
+        """
+        with self._lock:
+            return {
+                "ok": self._ok,
+                "latency": self._latency,
+                "error": self._error,
+                "age": (
+                    time.monotonic() - self._checked_at if self._checked_at else None
+                ),
+            }
+
+
+class HealthMonitor:
+    """Background thread running every probe at a fixed interval."""
+
+    def __init__(self, probes: List[LatencyProbe], interval: float = 30.0):
+        """
+        Args:
+            probes: Probes to run
+            interval: Seconds between probe rounds
+        """
+        self.probes = probes
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the probe thread."""
+        self._thread = threading.Thread(
+            target=self._run, name="health-monitor", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Ask the probe thread to stop and wait for it."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_once(self) -> None:
+        """Run every probe once."""
+        for probe in self.probes:
+            probe.run()
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        """Return the cached outcome of every probe."""
+        return {probe.name: probe.snapshot() for probe in self.probes}
+
+    def healthy(self, max_latency: float, max_age: float) -> bool:
+        """
+        Return False if a probe failed, is slower than max_latency, or has
+        not run for max_age seconds. Probes that have not run yet pass.
+        """
+        for result in self.snapshot().values():
+            if result["ok"] is None:
+                continue
+            if not result["ok"] or result["latency"] > max_latency:
+                return False
+            if result["age"] > max_age:
+                return False
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
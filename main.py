@@ -9,18 +9,56 @@
 # icecake0141 / 2020
 # https://github.com/icecake0141/linguafrancatto
 
+import contextvars
 import logging
 import os
 import re
+import socket
 import time
-from flask import Flask, request
-from slack_bolt import App, Ack
+from concurrent.futures import CancelledError
+from flask import Flask, jsonify, request
+from slack_bolt import App, Ack, BoltResponse
 from slack_bolt.adapter.flask import SlackRequestHandler
-from slack_sdk import WebClient
+from slack_bolt.oauth.oauth_settings import OAuthSettings
 from slack_sdk.errors import SlackApiError
+from slack_sdk.oauth.installation_store import FileInstallationStore
+from slack_sdk.oauth.state_store import FileOAuthStateStore
 
 import deepl_client
-from deepl_client import DeeplClientError
+from burst_coalescer import BurstCoalescer
+from deepl_client import DeeplClientError, DeeplQuotaExceededError
+from document_translation import DocumentTranslator
+from event_filter import EventFilter
+from health import HealthMonitor, LatencyProbe
+from outbox import (
+    DeferredDeliveryError,
+    Outbox,
+    OutboxJob,
+    OutboxReplayer,
+    PermanentDeliveryError,
+    make_job_key,
+)
+from rate_limiter import AdaptiveLimiter
+from scheduler import BACKFILL, FANOUT, ONDEMAND, TranslationScheduler
+from routing import Routing, RoutingReloader, load_routing, save_groups
+from shutdown import ShutdownCoordinator
+from singleflight import SingleFlight, SingleFlightTimeout, content_key
+from slack_markup import replace_markdown, revert_markdown
+from slack_transport import SlackTransport, permanent_error
+from state import create_state_backend
+from structured_logging import (
+    ContextExecutor,
+    correlation_id,
+    new_correlation_id,
+    redact,
+    sampled,
+    setup_logging,
+    stop_logging,
+)
+from traffic_recorder import TrafficRecorder
+from usage_stats import UsageStats, format_top
+from translation_backend import BackendRouter, DeeplBackend, resolve_endpoint
+from workspace import WorkspaceRegistry
 
 ##################################
 # Google App Engie debugger
@@ -38,54 +76,276 @@ from deepl_client import DeeplClientError
 ###  global variables
 # Debug
 DEBUG = os.environ.get("DEBUG_MODE")
+# Log format: "json" or "text"
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json")
+# Fraction of Slack request bodies logged (redacted) at debug level
+LOG_BODY_SAMPLE_RATE = float(os.environ.get("LOG_BODY_SAMPLE_RATE", "0"))
 
 # DeepL API
-url = "https://api.deepl.com/v2/translate"
-url_usage = "https://api.deepl.com/v2/usage"
 deepl_auth_key = os.environ.get("DEEPL_TOKEN")
+# Comma-separated DeepL endpoints: "pro", "free" or a base URL (e.g. a local stand-in)
+DEEPL_ENDPOINTS = os.environ.get("DEEPL_ENDPOINTS", "pro").split(",")
+# Send a hedged duplicate request for slow on-demand translations
+DEEPL_HEDGE = os.environ.get("DEEPL_HEDGE")
 # formality =os.environ.get("FORMALITY")
+# Maximum number of concurrent DeepL requests per process
+DEEPL_MAX_IN_FLIGHT = int(os.environ.get("DEEPL_MAX_IN_FLIGHT", "8"))
+# Number of translation worker threads
+TRANSLATION_WORKERS = int(os.environ.get("TRANSLATION_WORKERS", "4"))
+
+# JSON trigger table for on-demand translation (built-in keywords if unset)
+TRIGGERS_PATH = os.environ.get("TRIGGERS_PATH")
+
+# JSON routing file (groups, language suffixes, triggers) watched for changes
+ROUTING_PATH = os.environ.get("ROUTING_PATH")
+ROUTING_RELOAD_INTERVAL = float(os.environ.get("ROUTING_RELOAD_INTERVAL", "30"))
+
+# Slack UID of bot admin
+GUARDIAN_UID = os.environ.get("GUARDIAN_UID")
+
+# Slack OAuth for multiple workspaces (single workspace with SLACK_BOT_TOKEN if unset)
+SLACK_CLIENT_ID = os.environ.get("SLACK_CLIENT_ID")
+# Installations must outlive the instance, so there is no default under /tmp
+SLACK_INSTALLATION_DIR = os.environ.get("SLACK_INSTALLATION_DIR")
+# Memory caps per workspace
+MAX_CHANNELS_PER_TEAM = int(os.environ.get("MAX_CHANNELS_PER_TEAM", "5000"))
+MAX_USERS_PER_TEAM = int(os.environ.get("MAX_USERS_PER_TEAM", "1000"))
+# Seconds after which a channel directory is reloaded from conversations.list
+CHANNEL_DIRECTORY_MAX_AGE = float(os.environ.get("CHANNEL_DIRECTORY_MAX_AGE", "3600"))
+
+# State shared by gunicorn workers: "memory" or "sqlite:///path/to/state.db"
+STATE_BACKEND = os.environ.get("STATE_BACKEND", "memory")
+# Seconds during which a redelivered Slack message is ignored
+EVENT_DEDUP_TTL = 3600
+# DeepL requests per second across all workers sharing the state (unlimited if unset)
+DEEPL_RATE_LIMIT = float(os.environ.get("DEEPL_RATE_LIMIT", "0"))
+
+# Outbox for translations that failed while DeepL was unavailable (disabled if unset)
+OUTBOX_PATH = os.environ.get("OUTBOX_PATH")
+OUTBOX_MAX_JOBS = int(os.environ.get("OUTBOX_MAX_JOBS", "1000"))
+
+# Background dependency probes for /readyz (disabled if 0)
+HEALTH_PROBE_INTERVAL = float(os.environ.get("HEALTH_PROBE_INTERVAL", "30"))
+# /readyz fails above this many queued translations or this probe latency (s)
+READY_MAX_QUEUE_DEPTH = int(os.environ.get("READY_MAX_QUEUE_DEPTH", "100"))
+READY_MAX_LATENCY = float(os.environ.get("READY_MAX_LATENCY", "5"))
+
+# Seconds allowed to drain translations when the instance is stopped
+SHUTDOWN_DEADLINE = float(os.environ.get("SHUTDOWN_DEADLINE", "25"))
+
+# Per-channel/user/language consumption counters (per process if unset)
+USAGE_STATS_PATH = os.environ.get("USAGE_STATS_PATH") or ":memory:"
+USAGE_STATS_RETENTION_DAYS = int(os.environ.get("USAGE_STATS_RETENTION_DAYS", "92"))
+
+# Identical concurrent translations share one DeepL request; waiters give up
+# after SINGLE_FLIGHT_TIMEOUT seconds
+SINGLE_FLIGHT_TIMEOUT = float(os.environ.get("SINGLE_FLIGHT_TIMEOUT", "30"))
+SINGLE_FLIGHT_MAX_KEYS = int(os.environ.get("SINGLE_FLIGHT_MAX_KEYS", "1000"))
+
+# Translation of shared files and snippets with the DeepL document API
+DOCUMENT_TRANSLATION = os.environ.get("DOCUMENT_TRANSLATION")
+DOCUMENT_MAX_BYTES = int(os.environ.get("DOCUMENT_MAX_BYTES", str(10 * 1024 * 1024)))
+DOCUMENT_POLL_INTERVAL = float(os.environ.get("DOCUMENT_POLL_INTERVAL", "5"))
+
+# Slack Web API calls are retried this many times per kind of failure;
+# rate limits with a longer Retry-After than SLACK_MAX_RETRY_AFTER fail at once
+SLACK_MAX_RETRIES = int(os.environ.get("SLACK_MAX_RETRIES", "2"))
+SLACK_MAX_RETRY_AFTER = float(os.environ.get("SLACK_MAX_RETRY_AFTER", "30"))
+
+# Consecutive messages of a speaker within BURST_WINDOW seconds are posted as
+# one (0 disables), at most BURST_MAX_LATENCY seconds after the first one
+BURST_WINDOW = float(os.environ.get("BURST_WINDOW", "0"))
+BURST_MAX_LATENCY = float(os.environ.get("BURST_MAX_LATENCY", "10"))
+
+# Sampled recording of event envelopes with surrogate text, for replay
+TRAFFIC_RECORD_PATH = os.environ.get("TRAFFIC_RECORD_PATH")
+TRAFFIC_RECORD_SAMPLE_RATE = float(os.environ.get("TRAFFIC_RECORD_SAMPLE_RATE", "0.1"))
+TRAFFIC_RECORD_MAX_BYTES = int(
+    os.environ.get("TRAFFIC_RECORD_MAX_BYTES", str(10 * 1024 * 1024))
+)
+TRAFFIC_RECORD_BACKUPS = int(os.environ.get("TRAFFIC_RECORD_BACKUPS", "5"))
 
 
 ############
 ############ Initialization ############
-# Initializes your app with your bot token and signing secret
-bolt_app = App(
-    token=os.environ.get("SLACK_BOT_TOKEN"),
-    signing_secret=os.environ.get("SLACK_SIGNING_SECRET"),
+# Logging through a background writer thread
+setup_logging(
+    logging.DEBUG if DEBUG == "True" else logging.INFO,
+    json_format=LOG_FORMAT == "json",
 )
 
-# Instanciate WebClient
-client = WebClient(token=os.environ.get("SLACK_BOT_TOKEN"))
+# Listener threads inherit the correlation ID set by log_request, since Bolt
+# submits listeners after the middleware chain has returned
+listener_executor = ContextExecutor(max_workers=5)
+
+# One WebClient per token with retry handlers, shared rate limits and metrics
+slack_transport = SlackTransport(
+    max_retries=SLACK_MAX_RETRIES, max_retry_after=SLACK_MAX_RETRY_AFTER
+)
+
+# Initializes your app with your bot token and signing secret, or with OAuth
+# installations when the app is distributed to several workspaces
+if SLACK_CLIENT_ID:
+    if not SLACK_INSTALLATION_DIR:
+        raise RuntimeError(
+            "SLACK_INSTALLATION_DIR must be set to persistent storage shared by"
+            " all instances when SLACK_CLIENT_ID is set"
+        )
+    installation_store = FileInstallationStore(base_dir=SLACK_INSTALLATION_DIR)
+    bolt_app = App(
+        signing_secret=os.environ.get("SLACK_SIGNING_SECRET"),
+        oauth_settings=OAuthSettings(
+            client_id=SLACK_CLIENT_ID,
+            client_secret=os.environ.get("SLACK_CLIENT_SECRET"),
+            scopes=["channels:history", "channels:read", "chat:write", "users:read"]
+            + (["files:read", "files:write"] if DOCUMENT_TRANSLATION == "True" else []),
+            installation_store=installation_store,
+            state_store=FileOAuthStateStore(
+                expiration_seconds=600, base_dir=SLACK_INSTALLATION_DIR
+            ),
+        ),
+        client=slack_transport.client(None),
+        listener_executor=listener_executor,
+        # The bot's own events are dropped and counted by event_filter
+        ignoring_self_events_enabled=False,
+    )
+else:
+    installation_store = None
+    bolt_app = App(
+        client=slack_transport.client(os.environ.get("SLACK_BOT_TOKEN")),
+        signing_secret=os.environ.get("SLACK_SIGNING_SECRET"),
+        listener_executor=listener_executor,
+        ignoring_self_events_enabled=False,
+    )
+
+# Shared state (caches, dedup sets, rate-limit buckets, usage counters, leases)
+state = create_state_backend(STATE_BACKEND)
 
 # Instanciate WebClient
 app = Flask(__name__)
 handler = SlackRequestHandler(bolt_app)
 
 # Slack
-# multi channel translation
-list_channel_basename = os.environ.get("MULTI_CHANNEL").split(",")
-
-channels = []
-# retrieve channel object from Slack API
-try:
-    # Call the conversations.list method using the built-in WebClient
-    for paginated_response in client.conversations_list(limit=10):
-        channels += paginated_response["channels"]
-
-except SlackApiError as e:
-    logging.error("Error fetching conversations: {}".format(e))
-    # logger.error("Error fetching conversations: {}".format(e))
-
-name_dict, id_dict = {}, {}
-for i in channels:
-    name_dict[i["name"]] = i["id"]
-    id_dict[i["id"]] = i["name"]
-# not good way :(
-del i
-
-# Logging
-if DEBUG == "True":
-    logging.basicConfig(level=logging.DEBUG)
+# Multichannel groups, language suffixes and keyword triggers, rebuilt in the
+# background when the routing file changes or on Meoroute
+routing = RoutingReloader(
+    lambda: load_routing(
+        ROUTING_PATH, os.environ.get("MULTI_CHANNEL", "").split(","), TRIGGERS_PATH
+    ),
+    path=ROUTING_PATH,
+    interval=ROUTING_RELOAD_INTERVAL,
+    # New groups may name channels created since the directories were loaded
+    on_change=lambda current: workspaces.invalidate(),
+)
+
+
+def workspace_client(team_id):
+    """
+    Create the pooled WebClient of a workspace.
+
+    Args:
+        team_id: Slack team ID
+
+    Returns:
+        WebClient, or None if the app is not installed in the workspace
+    """
+    if installation_store is None:
+        return slack_transport.client(os.environ.get("SLACK_BOT_TOKEN"), team_id)
+
+    bot = installation_store.find_bot(enterprise_id=None, team_id=team_id)
+    if bot is None:
+        return None
+    return slack_transport.client(bot.bot_token, team_id)
+
+
+# Channel directories, user caches and WebClients per workspace
+workspaces = WorkspaceRegistry(
+    workspace_client,
+    max_channels=MAX_CHANNELS_PER_TEAM,
+    max_users=MAX_USERS_PER_TEAM,
+    state=state,
+    max_age=CHANNEL_DIRECTORY_MAX_AGE,
+)
+routing.start()
+
+# Single workspace: retrieve channel object from Slack API before the first event
+if installation_store is None:
+    DEFAULT_TEAM_ID = bolt_app.client.auth_test()["team_id"]
+    workspaces.get(DEFAULT_TEAM_ID)
+else:
+    DEFAULT_TEAM_ID = None
+
+
+def team_channels(team_id):
+    """Return the channel directory of a workspace, or None if unknown."""
+    team_id = team_id or DEFAULT_TEAM_ID
+    if not team_id:
+        return None
+    try:
+        return workspaces.get(team_id).channels
+    except LookupError:
+        return None
+
+
+# Message events in no multichannel group and without a keyword, and the
+# bot's own events, are acknowledged before listener matching
+event_filter = EventFilter(
+    lambda: routing.current,
+    team_channels,
+    commands=["Meousage", "Meoutbox", "Meoroute"],
+)
+
+# DeepL rate limiter shared by all threads
+deepl_client.limiter = AdaptiveLimiter(
+    initial_limit=DEEPL_MAX_IN_FLIGHT / 2, max_limit=DEEPL_MAX_IN_FLIGHT
+)
+
+# Translation backends
+translation_router = BackendRouter(
+    [DeeplBackend(deepl_auth_key, resolve_endpoint(e)) for e in DEEPL_ENDPOINTS],
+    hedge=DEEPL_HEDGE == "True",
+    concurrency=TRANSLATION_WORKERS,
+)
+
+# Coalescing of identical in-flight translations
+single_flight = SingleFlight(
+    max_keys=SINGLE_FLIGHT_MAX_KEYS, timeout=SINGLE_FLIGHT_TIMEOUT
+)
+
+# Translation workers shared by on-demand, fan-out and replay work
+scheduler = TranslationScheduler(workers=TRANSLATION_WORKERS)
+scheduler.start()
+
+# Consumption counters for Meousage top
+usage_stats = UsageStats(USAGE_STATS_PATH, retention_days=USAGE_STATS_RETENTION_DAYS)
+
+# Outbox
+outbox = Outbox(OUTBOX_PATH, max_jobs=OUTBOX_MAX_JOBS) if OUTBOX_PATH else None
+
+# Shared files are translated on the first DeepL endpoint, which keeps the
+# uploaded document until it is downloaded
+if DOCUMENT_TRANSLATION == "True":
+    document_translator = DocumentTranslator(
+        deepl_auth_key,
+        resolve_endpoint(DEEPL_ENDPOINTS[0]),
+        max_bytes=DOCUMENT_MAX_BYTES,
+        poll_interval=DOCUMENT_POLL_INTERVAL,
+        on_billed=usage_stats.record,
+    )
+    document_translator.start()
+else:
+    document_translator = None
+
+if TRAFFIC_RECORD_PATH:
+    traffic_recorder = TrafficRecorder(
+        TRAFFIC_RECORD_PATH,
+        sample_rate=TRAFFIC_RECORD_SAMPLE_RATE,
+        max_bytes=TRAFFIC_RECORD_MAX_BYTES,
+        backups=TRAFFIC_RECORD_BACKUPS,
+    )
+    traffic_recorder.start()
+else:
+    traffic_recorder = None
 
 ############ END Initialization ############
 ############
@@ -96,13 +356,89 @@ if DEBUG == "True":
 
 ### DeepL ###
 # Post DeepL translation API request
-def deepl(text, tr_to_lang):
+def deepl(
+    text,
+    tr_to_lang,
+    hedge=False,
+    formality=None,
+    source_channel="",
+    user="",
+    team_id="",
+):
     """
     Translate text using DeepL API via the robust client.
 
     Args:
         text: Text to translate
         tr_to_lang: Target language code
+        hedge: Allow a hedged duplicate request (for interactive translations)
+        formality: DeepL formality option, if any
+        source_channel: Channel ID the consumption is attributed to
+        user: User ID the consumption is attributed to
+        team_id: Slack team ID the consumption is attributed to
+
+    Returns:
+        Translated text
+
+    Raises:
+        DeeplClientError: If translation fails
+    """
+    # Callers translating the same text at the same time share one request
+    try:
+        translated_text, shared = single_flight.do(
+            content_key(text, tr_to_lang, formality),
+            deepl_request,
+            text,
+            tr_to_lang,
+            hedge=hedge,
+            formality=formality,
+            # A hedged duplicate DeepL completed is billed as well
+            on_billed=lambda characters: record_billed(
+                characters, tr_to_lang, source_channel, user, team_id
+            ),
+        )
+    except SingleFlightTimeout as e:
+        raise DeeplClientError("Timed out waiting for an identical translation") from e
+    if shared:
+        # Not billed again
+        return translated_text
+
+    record_billed(len(text), tr_to_lang, source_channel, user, team_id)
+    return translated_text
+
+
+def record_billed(characters, tr_to_lang, source_channel="", user="", team_id=""):
+    """Count characters sent to DeepL for Meousage and Meousage top."""
+    # Count characters sent to DeepL today
+    state.incr(
+        f"usage:characters:{time.strftime('%Y-%m-%d')}", characters, ttl=86400 * 2
+    )
+    usage_stats.record(characters, tr_to_lang, source_channel, user, team_id)
+
+
+def deepl_request(text, tr_to_lang, hedge=False, formality=None, on_billed=None):
+    """Send one translation request to DeepL within the shared rate limit."""
+    # Rate limit shared by all workers
+    if DEEPL_RATE_LIMIT:
+        while not state.take_token("bucket:deepl", DEEPL_RATE_LIMIT, DEEPL_RATE_LIMIT):
+            time.sleep(1 / DEEPL_RATE_LIMIT)
+
+    return translation_router.translate(
+        text, tr_to_lang, hedge=hedge, formality=formality, on_billed=on_billed
+    )
+
+
+def deepl_scheduled(text, tr_to_lang, priority, channel, hedge=False, team_id=""):
+    """
+    Translate text on the translation worker pool and wait for the result.
+
+    Args:
+        text: Text to translate
+        tr_to_lang: Target language code
+        priority: Scheduler priority class (ONDEMAND, FANOUT or BACKFILL)
+        channel: Channel ID the work belongs to, used for fairness
+        hedge: Allow a hedged duplicate request (for interactive translations)
+        team_id: Slack team ID the consumption is attributed to
 
     Returns:
         Translated text
@@ -110,7 +446,16 @@ def deepl(text, tr_to_lang):
     Raises:
         DeeplClientError: If translation fails
     """
-    return deepl_client.translate_text(deepl_auth_key, text, tr_to_lang)
+    return scheduler.submit(
+        priority,
+        channel,
+        deepl,
+        text,
+        tr_to_lang,
+        hedge=hedge,
+        source_channel=channel,
+        team_id=team_id,
+    ).result()
 
 
 def deepl_usage():
@@ -123,43 +468,430 @@ def deepl_usage():
     Raises:
         DeeplClientError: If usage retrieval fails
     """
-    return deepl_client.get_usage(deepl_auth_key)
+    return translation_router.usage()
 
 
-### Dirty hack of slack formatting ###
-def replace_markdown(text_block):
+### Slack ###
+# Block Kit limits
+SECTION_TEXT_LIMIT = 3000
+MAX_BLOCKS = 50
+# Mentions, links and code that must not be split over two sections
+MRKDWN_MARKUP = re.compile(r"```.*?```|`[^`\n]+`|<[^<>\n]*>", re.DOTALL)
+
 
-    text_block = re.sub("<", "&lt;", text_block)
-    text_block = re.sub(">", "&gt;", text_block)
-    text_block = re.sub("\*", "<bd></bd>", text_block)
-    # Slack treat bullet point as bullet point....
-    text_block = re.sub("•", "<ls></ls>", text_block)
-    text_block = re.sub("_", "<it></it>", text_block)
-    text_block = re.sub("~", "<st></st>", text_block)
-    text_block = re.sub("```", "<cb></cb>", text_block)
-    text_block = re.sub("`", "<cd></cd>", text_block)
+def split_mrkdwn(text, limit):
+    """
+    Split mrkdwn text into chunks of at most limit characters.
 
-    return text_block
+    Chunks end after a newline, or else after a space, outside of mentions,
+    links and code. Markup longer than limit is cut at the limit.
 
+    Args:
+        text: mrkdwn text
+        limit: Maximum chunk length
+
+    Returns:
+        List of chunks that join back into text
+    """
+    spans = [m.span() for m in MRKDWN_MARKUP.finditer(text)]
+
+    def markup_start(pos):
+        for span_start, span_end in spans:
+            if span_start < pos < span_end:
+                return span_start
+        return None
+
+    chunks = []
+    start = 0
+    while len(text) - start > limit:
+        end = start + limit
+        cut = None
+        for separator in ("\n", " "):
+            index = text.rfind(separator, start, end)
+            while index >= start and markup_start(index + 1) is not None:
+                index = text.rfind(separator, start, markup_start(index + 1))
+            if index >= start:
+                cut = index + 1
+                break
+        if cut is None:
+            # No break point; keep markup that straddles the limit whole
+            span_start = markup_start(end)
+            cut = span_start if span_start is not None and span_start > start else end
+        chunks.append(text[start:cut])
+        start = cut
+    chunks.append(text[start:])
+    return chunks
+
+
+def translation_blocks(speaker, translations):
+    """
+    Build a Block Kit message with one section per translated language.
 
-def revert_markdown(text_block):
+    Args:
+        speaker: Display name of the original speaker
+        translations: List of (target_lang, translated_text) tuples
 
-    text_block = re.sub("<bd></bd>", "*", text_block)
-    # Slack treat bullet point as bullet point....
-    text_block = re.sub("<ls></ls>", "•", text_block)
-    text_block = re.sub("<it></it>", "_", text_block)
-    text_block = re.sub("<st></st>", "~", text_block)
-    text_block = re.sub("<cb></cb>", "```", text_block)
-    text_block = re.sub("<cd></cd>", "`", text_block)
-    text_block = re.sub("&lt;", "<", text_block)
-    text_block = re.sub("&gt;", ">", text_block)
+    Returns:
+        Tuple of (blocks, fallback_text)
+    """
+    blocks = [
+        {
+            "type": "context",
+            "elements": [{"type": "mrkdwn", "text": f"{speaker} said:"}],
+        }
+    ]
+    for tr_to_lang, translated_text in translations:
+        header = f"*{tr_to_lang}*\n"
+        # Long translations are split over several sections
+        chunks = split_mrkdwn(translated_text, SECTION_TEXT_LIMIT - len(header))
+        for index, chunk in enumerate(chunks):
+            blocks.append(
+                {
+                    "type": "section",
+                    "text": {
+                        "type": "mrkdwn",
+                        "text": (header if index == 0 else "") + chunk,
+                    },
+                }
+            )
+    if len(blocks) > MAX_BLOCKS:
+        logging.warning(
+            "Translation truncated to %d of %d blocks", MAX_BLOCKS, len(blocks)
+        )
 
-    return text_block
+    fallback = f"{speaker} said:\n" + "\n".join(
+        f"[{tr_to_lang}] {translated_text}"
+        for tr_to_lang, translated_text in translations
+    )
+    return blocks[:MAX_BLOCKS], fallback
 
 
-### END Text manipulation ###
+def first_delivery(message, kind):
+    """
+    Check whether a message is seen for the first time by any worker.
+
+    Slack redelivers events that were not acknowledged in time, possibly to
+    another worker process; the shared dedup set keeps them from being
+    translated and posted twice.
+
+    Args:
+        message: Slack message event
+        kind: Handler name, so different handlers don't dedup each other
+
+    Returns:
+        True if the message has not been handled yet
+    """
+    return state.add_if_absent(
+        f"event:{kind}:{message['channel']}:{message['ts']}", ttl=EVENT_DEDUP_TTL
+    )
+
+
+### Outbox ###
+def enqueue_translation(message, speaker, target_channel, tr_to_lang, team_id=""):
+    """
+    Store a multichannel translation job in the outbox for later replay.
+
+    Args:
+        message: Original Slack message event
+        speaker: Display name of the original speaker
+        target_channel: Channel ID the translation should be posted to
+        tr_to_lang: Target language code
+        team_id: Slack team ID of the workspace
+
+    Returns:
+        True if the job was stored
+    """
+    if outbox is None:
+        return False
+
+    return outbox.enqueue(
+        make_job_key(message["channel"], message["ts"], target_channel),
+        message["channel"],
+        target_channel,
+        tr_to_lang,
+        speaker,
+        message["text"],
+        team_id=team_id,
+    )
+
+
+def deliver_outbox_job(job: OutboxJob):
+    """
+    Translate and post a job replayed from the outbox.
+
+    Raises:
+        DeeplClientError: If DeepL is still unavailable
+        PermanentDeliveryError: If Slack rejects the post for good
+        DeferredDeliveryError: If the scheduler stopped before translating it
+    """
+    try:
+        translated_text = deepl_scheduled(
+            replace_markdown(job.text),
+            job.target_lang,
+            BACKFILL,
+            job.source_channel,
+            team_id=job.team_id,
+        )
+    except (RuntimeError, CancelledError) as e:
+        if not scheduler.stopped:
+            raise
+        # Draining for shutdown; the job is kept for the next instance
+        raise DeferredDeliveryError("scheduler stopped") from e
+    workspace = workspaces.get(job.team_id or DEFAULT_TEAM_ID)
+    try:
+        workspace.client.chat_postMessage(
+            channel=job.target_channel,
+            text=f"{job.speaker} said:\n{revert_markdown(translated_text)}",
+        )
+    except SlackApiError as e:
+        if permanent_error(e):
+            raise PermanentDeliveryError(e.response.get("error")) from e
+        raise
+
+
+if outbox is not None:
+    # Only one worker process replays the outbox at a time
+    outbox_replayer = OutboxReplayer(
+        outbox,
+        deliver_outbox_job,
+        lease=lambda: state.acquire_lease(
+            "lease:outbox-replayer", f"{socket.gethostname()}:{os.getpid()}", ttl=60
+        ),
+    )
+    outbox_replayer.start()
+
+
+### Health ###
+# DeepL and Slack latency, probed in the background and cached
+health_monitor = HealthMonitor(
+    [
+        # Bypasses the DeepL limiter: throttling and the quota are
+        # account-wide and must not take every instance out of rotation
+        LatencyProbe("deepl", translation_router.probe),
+        LatencyProbe("slack", lambda: bolt_app.client.api_test()),
+    ],
+    interval=HEALTH_PROBE_INTERVAL or 30,
+)
+if HEALTH_PROBE_INTERVAL:
+    health_monitor.start()
+
+
+def readiness():
+    """
+    Check whether this instance can translate, from cached state only.
+
+    Returns:
+        Tuple of (ready, report)
+    """
+    now = time.time()
+    directories = {}
+    for team_id in workspaces.team_ids():
+        workspace = workspaces.peek(team_id)
+        channels = workspace.channels
+        directories[team_id] = {
+            "channels": len(channels.id_dict),
+            "age": now - channels.loaded_at if channels.loaded_at else None,
+            "retry_in": max(0.0, workspace.retry_at - time.monotonic()),
+        }
+    queue_depth = scheduler.queue_depth()
+    limiter_stats = deepl_client.limiter.stats()
+
+    # Unloaded directories are reported, not checked: their loads are retried
+    # on the next events of the workspace, and a Slack outage would take
+    # every instance out of rotation at once
+    checks = {
+        "accepting": not shutdown_coordinator.shutting_down,
+        "queue": sum(queue_depth.values()) <= READY_MAX_QUEUE_DEPTH,
+        "probes": health_monitor.healthy(
+            READY_MAX_LATENCY, 3 * health_monitor.interval
+        ),
+    }
+    report = {
+        "ready": all(checks.values()),
+        "checks": checks,
+        "directories": directories,
+        "queue_depth": queue_depth,
+        # Queue wait and run time per priority class
+        "scheduler": scheduler.stats(),
+        # DeepL throttling is account-wide, so an open breaker is reported
+        # but does not take this instance out of rotation
+        "breaker": "open" if limiter_stats["paused_for"] > 0 else "closed",
+        "limiter": limiter_stats,
+        "backends": translation_router.stats(),
+        "single_flight": single_flight.stats(),
+        "slack_api": slack_transport.stats(),
+        "event_filter": event_filter.stats(),
+        "probes": health_monitor.snapshot(),
+    }
+    if document_translator is not None:
+        report["documents"] = document_translator.stats()
+    if burst_coalescer is not None:
+        report["bursts"] = burst_coalescer.stats()
+    return report["ready"], report
+
+
+### Multichannel ###
+def translate_and_post(message, speaker, target_channel, tr_to_lang, say, team_id=""):
+    """
+    Translate a multichannel message and post it to one target channel.
+
+    Failures are logged and, when DeepL is unavailable, the job is queued in
+    the outbox instead of being posted as an error.
+    """
+    try:
+        # Hit translation API
+        translated_text = deepl(
+            replace_markdown(message["text"]),
+            tr_to_lang,
+            source_channel=message["channel"],
+            user=message.get("user", ""),
+            team_id=team_id,
+        )
+
+        # Post message
+        say(
+            channel=target_channel,
+            text=f"{speaker} said:\n{revert_markdown(translated_text)}",
+        )
+    except DeeplClientError as e:
+        logging.error("Failed to translate multichannel message: %s", type(e).__name__)
+        # Don't post error to other channels, queue it for replay
+        enqueue_translation(message, speaker, target_channel, tr_to_lang, team_id)
+    except SlackApiError as e:
+        logging.error(
+            "Failed to post multichannel message: %s", e.response.get("error")
+        )
+        # Still rate limited after the retries: replay it later
+        if e.response.status_code == 429:
+            enqueue_translation(message, speaker, target_channel, tr_to_lang, team_id)
+    except Exception as e:
+        logging.error(
+            "Unexpected error in multichannel translation: %s", type(e).__name__
+        )
+
+
+def fan_out(message, speaker, targets, say, team_id=""):
+    """
+    Queue the translation of a multichannel message to its target channels.
+
+    Args:
+        message: Slack message event, possibly a merged burst
+        speaker: Display name of the speaker
+        targets: (channel name, channel ID, language) of the target channels
+        say: Bolt say() of the event
+        team_id: Slack team ID of the workspace
+
+    Returns:
+        Futures of the queued translations
+    """
+    futures = []
+    for _, target_channel, tr_to_lang in targets:
+        # Keep the channel in order while earlier translations are queued
+        if outbox is not None and outbox.has_pending(target_channel):
+            enqueue_translation(message, speaker, target_channel, tr_to_lang, team_id)
+            continue
+
+        # Translate and post on the worker pool
+        try:
+            futures.append(
+                scheduler.submit(
+                    FANOUT,
+                    message["channel"],
+                    translate_and_post,
+                    message,
+                    speaker,
+                    target_channel,
+                    tr_to_lang,
+                    say,
+                    team_id,
+                )
+            )
+        except RuntimeError:
+            # Shutting down: keep the job for the next instance
+            if enqueue_translation(
+                message, speaker, target_channel, tr_to_lang, team_id
+            ):
+                shutdown_coordinator.count("rejected", "persisted")
+            else:
+                logging.error("Dropped multichannel translation while shutting down")
+                shutdown_coordinator.count("rejected", "dropped")
+    return futures
+
+
+if BURST_WINDOW:
+    # A burst is translated and posted as one message per target channel
+    burst_coalescer = BurstCoalescer(
+        lambda message, context: fan_out(message, *context),
+        window=BURST_WINDOW,
+        max_latency=BURST_MAX_LATENCY,
+    )
+    burst_coalescer.start()
+else:
+    burst_coalescer = None
+
+
+### Shutdown ###
+shutdown_coordinator = ShutdownCoordinator(deadline=SHUTDOWN_DEADLINE)
+
+
+def drain_scheduler(remaining):
+    """
+    Run queued translations until the deadline and persist the rest.
+
+    Multichannel translations still queued at the deadline go to the outbox;
+    replayed jobs stay in the outbox anyway. On-demand translations are
+    dropped, since the user can simply ask again.
+    """
+    leftover = scheduler.drain(remaining)
+    persisted = dropped = 0
+    for priority, task in leftover:
+        if task.fn is translate_and_post:
+            message, speaker, target_channel, tr_to_lang, _, team_id = task.args
+            if enqueue_translation(
+                message, speaker, target_channel, tr_to_lang, team_id
+            ):
+                persisted += 1
+                continue
+        elif priority == BACKFILL:
+            persisted += 1
+            continue
+        dropped += 1
+    return {
+        "queued": len(leftover),
+        "persisted": persisted,
+        "dropped": dropped,
+        "unfinished": scheduler.in_flight(),
+    }
+
+
+def stop_replayer(remaining):
+    outbox_replayer.stop(remaining)
+    return {"pending": outbox.depth()}
+
+
+# Stop accepting work, drain, then flush counters and logs
+shutdown_coordinator.add_step("scheduler", drain_scheduler)
+if burst_coalescer is not None:
+    # Open bursts are queued before the scheduler drains
+    shutdown_coordinator.add_step(
+        "bursts", lambda remaining: burst_coalescer.stop(remaining), first=True
+    )
+if outbox is not None:
+    shutdown_coordinator.add_step("outbox", stop_replayer)
+if document_translator is not None:
+    shutdown_coordinator.add_step("documents", document_translator.stop)
+shutdown_coordinator.add_step("routing", lambda remaining: routing.stop(remaining))
+shutdown_coordinator.add_step(
+    "health", lambda remaining: health_monitor.stop(remaining)
+)
+shutdown_coordinator.add_step("usage_stats", lambda remaining: usage_stats.flush())
+if traffic_recorder is not None:
+    shutdown_coordinator.add_step(
+        "traffic_recorder", lambda remaining: traffic_recorder.stop()
+    )
+shutdown_coordinator.add_step("logging", lambda remaining: stop_logging())
+shutdown_coordinator.install_signal_handler()
 
-### Slack ###
 
 ############ END Functions ############
 ############
@@ -169,10 +901,21 @@ def revert_markdown(text_block):
 
 
 @bolt_app.message("Meousage")
-def usage(ack: Ack, message, say):
+def usage(ack: Ack, message, say, context):
     ack()
 
     try:
+        # Consumption report: "Meousage top [days]"
+        top = re.search(r"Meousage\s+top(?:\s+(\d+))?", message.get("text", ""))
+        if top:
+            # Admin command
+            if GUARDIAN_UID and message.get("user") != GUARDIAN_UID:
+                return
+            # Counters are only kept for the retention period
+            days = min(max(int(top.group(1) or 30), 1), USAGE_STATS_RETENTION_DAYS)
+            say(usage_top_report(context["team_id"], days))
+            return
+
         # Check DeepL usage
         count, limit = deepl_usage()
 
@@ -182,114 +925,254 @@ def usage(ack: Ack, message, say):
             + f"Current meowximum number of characters that can be translated per billing purriod is {limit}.\n"
             + f"{count/limit*100:.2f} % used."
         )
-        say("Translation keyword:\n    Nyan:JP\n    Meow:EN\n    Miaou:FR\n    Мяу:RU")
+        today = state.get(f"usage:characters:{time.strftime('%Y-%m-%d')}") or 0
+        coalescing = single_flight.stats()
+        say(
+            f"{today} characters sent by this bot today.\n"
+            + f"{coalescing['coalesced']} of {coalescing['calls']} translations "
+            + f"({coalescing['coalescing_rate']*100:.1f} %) shared an identical request."
+        )
+        say(routing.current.triggers.keyword_list())
     except DeeplClientError as e:
-        logging.error(f"Failed to retrieve DeepL usage: {type(e).__name__}")
+        logging.error("Failed to retrieve DeepL usage: %s", type(e).__name__)
         say("Translation service is temporarily unavailable. Please try again later.")
     except Exception as e:
-        logging.error(f"Unexpected error in usage handler: {type(e).__name__}")
+        logging.error("Unexpected error in usage handler: %s", type(e).__name__)
         say("An error occurred. Please try again later.")
 
     time.sleep(1)
 
 
-@bolt_app.message(re.compile("(Nyan|Meow|Miaou|Мяу)"))
+def usage_top_report(team_id, days=30):
+    """
+    Report the channels, users and languages that used the most characters.
+
+    Args:
+        team_id: Slack team ID of the workspace
+        days: Number of days counted
+    """
+    workspace = workspaces.get(team_id)
+
+    def name_of(dimension, key):
+        if dimension == "channel":
+            return "#" + workspace.channels.id_dict.get(key, key)
+        if dimension == "user":
+            try:
+                return workspace.speaker_name(key)
+            except Exception:
+                return key
+        return key
+
+    return format_top(usage_stats, days, team_id, name_of)
+
+
+@bolt_app.message("Meoutbox")
+def outbox_status(ack: Ack, message, say, context):
+    ack()
+
+    # Admin command
+    if GUARDIAN_UID and message.get("user") != GUARDIAN_UID:
+        return
+
+    if outbox is None:
+        say("Outbox is disabled.")
+        return
+
+    id_dict = workspaces.get(context["team_id"]).channels.id_dict
+    lines = [f"{outbox.depth()} translations waiting in the outbox."]
+    dead = outbox.dead_depth()
+    if dead:
+        lines.append(f"{dead} translations given up after repeated failures.")
+    for channel_id, depth in sorted(outbox.depth_by_channel().items()):
+        lines.append(f"    #{id_dict.get(channel_id, channel_id)}: {depth}")
+    say("\n".join(lines))
+
+
+@bolt_app.message("Meoroute")
+def routing_admin(ack: Ack, message, say, context):
+    ack()
+
+    # "Meoroute", "Meoroute reload" or "Meoroute groups general,random"
+    command = re.search(
+        r"Meoroute(?:\s+(reload|groups)(?:\s+(\S+))?)?", message.get("text", "")
+    )
+    action, argument = command.group(1), command.group(2)
+    if action is None:
+        say(routing.current.describe())
+        return
+
+    # Admin command
+    if GUARDIAN_UID and message.get("user") != GUARDIAN_UID:
+        return
+
+    build = None
+    if action == "groups":
+        if not argument:
+            say("Usage: Meoroute groups general,random")
+            return
+        groups = argument.split(",")
+        current = routing.current
+
+        def build():
+            changed = Routing(
+                groups,
+                current.suffixes,
+                current.base_lang,
+                current.triggers,
+                source=ROUTING_PATH or "Meoroute",
+            )
+            # Saved only once valid; other workers reload the file
+            if ROUTING_PATH:
+                save_groups(ROUTING_PATH, groups)
+            return changed
+
+    # Rebuilt on the routing thread; the reply follows the swap
+    def report(future):
+        if future.exception() is not None:
+            say(f"Routing not changed: {future.exception()}")
+        else:
+            say(future.result().describe())
+
+    routing.request(build).add_done_callback(report)
+
+
+def has_trigger(message):
+    """Listener matcher: the message contains a keyword of the current routing."""
+    return bool(routing.current.triggers.pattern.search(message.get("text", "")))
+
+
+@bolt_app.message(matchers=[has_trigger])
 def ondemand_translate(ack: Ack, message, say, context):
     ack()
 
-    # Determine target language to be translated
-    if re.match("Nyan", context["matches"][0]):
-        tr_to_lang = "JA"
-    elif re.match("Meow", context["matches"][0]):
-        tr_to_lang = "EN"
-    elif re.match("Miaou", context["matches"][0]):
-        tr_to_lang = "FR"
-    elif re.match("Мяу", context["matches"][0]):
-        tr_to_lang = "RU"
-    else:
+    # Determine target languages to be translated
+    triggers = routing.current.triggers.find(message["text"])
+    if not triggers:
+        return
+
+    # Ignore redelivered events
+    if not first_delivery(message, "ondemand"):
         return
 
+    # Hit translation API for every requested language concurrently
+    text = replace_markdown(message["text"])
     try:
-        # Hit translation API
-        translated_text = deepl(replace_markdown(message["text"]), tr_to_lang)
+        futures = [
+            scheduler.submit(
+                ONDEMAND,
+                message["channel"],
+                deepl,
+                text,
+                trigger.target_lang,
+                hedge=True,
+                formality=trigger.formality,
+                source_channel=message["channel"],
+                user=message.get("user", ""),
+                team_id=context.get("team_id", ""),
+            )
+            for trigger in triggers
+        ]
+    except RuntimeError:
+        # The scheduler stops accepting work while the instance shuts down
+        say("Translation service is restarting. Please try again in a moment.")
+        return
 
+    try:
         # retrieve username from userid
-        speaker = client.users_info(user=message["user"]).data["user"]["name"]
-
-        # Post message
-        say(f"{speaker} said:\n{revert_markdown(translated_text)}")
+        speaker = workspaces.get(context["team_id"]).speaker_name(message["user"])
+
+        # Collect translations in trigger order; one failed language doesn't
+        # hold back the others
+        translations, error = [], None
+        for trigger, future in zip(triggers, futures):
+            try:
+                translations.append(
+                    (trigger.target_lang, revert_markdown(future.result()))
+                )
+            except DeeplClientError as e:
+                error = e
+        if not translations:
+            raise error
+
+        # Post a single message with one section per language
+        blocks, fallback = translation_blocks(speaker, translations)
+        say(text=fallback, blocks=blocks)
+    except DeeplQuotaExceededError:
+        logging.error("DeepL quota exceeded while translating message")
+        say("Translation quota for this billing purriod is exhausted.")
     except DeeplClientError as e:
-        logging.error(f"Failed to translate message: {type(e).__name__}")
+        logging.error("Failed to translate message: %s", type(e).__name__)
         say("Translation service is temporarily unavailable. Please try again later.")
     except Exception as e:
-        logging.error(f"Unexpected error in translation handler: {type(e).__name__}")
+        logging.error("Unexpected error in translation handler: %s", type(e).__name__)
         say("An error occurred during translation. Please try again later.")
 
-    time.sleep(1)
-
 
 # catcher for multichannel translation
 @bolt_app.event({"type": "message", "subtype": None})
-def multichannel_translate(ack: Ack, message, say):
+@bolt_app.event({"type": "message", "subtype": "file_share"})
+def multichannel_translate(ack: Ack, message, say, context):
     ack()
 
+    # Ignore redelivered events
+    if not first_delivery(message, "multichannel"):
+        return
+
+    workspace = workspaces.get(context["team_id"])
+    name_dict = workspace.channels.name_dict
+
     # Convert channel ID to channel name
-    channelname = id_dict[message["channel"]]
-
-    # list_channel_basename contains a list of basename ("foobar" of foobar_en/foobar_fr/foobar) of channels,
-    # where all conversations should be translated automatically.
-    for channel_basename in list_channel_basename:
-        # Check if the message is posted on specific channel name
-        if re.search(channel_basename, channelname):
-            # retrieve username from userid
-            speaker = client.users_info(user=message["user"]).data["user"]["name"]
-            # if it receives a message from designated channel, it populate translated messages to remaining channels
-            for i in name_dict:
-                # skip if channel names are the same = it is the channel the message was originally posted
-                if i == channelname:
-                    pass
-                # determine translation target language based on suffix of chanel name (_en/_fr/nothing=jp)
-                elif re.search(channel_basename, i):
-                    if re.search("-en$", i):
-                        tr_to_lang = "EN"
-                    elif re.search("-fr$", i):
-                        tr_to_lang = "FR"
-                    elif re.match(channel_basename, i):
-                        tr_to_lang = "JA"
-                    else:
-                        continue
-
-                    try:
-                        # Hit translation API
-                        translated_text = deepl(
-                            replace_markdown(message["text"]), tr_to_lang
-                        )
-
-                        # Post message
-                        say(
-                            channel=name_dict[i],
-                            text=f"{speaker} said:\n{revert_markdown(translated_text)}",
-                        )
-                    except DeeplClientError as e:
-                        logging.error(
-                            f"Failed to translate multichannel message: {type(e).__name__}"
-                        )
-                        # Don't post error to other channels, just log it
-                    except Exception as e:
-                        logging.error(
-                            f"Unexpected error in multichannel translation: {type(e).__name__}"
-                        )
-
-                else:
-                    pass
-
-            time.sleep(1)
-            return
-        # if not, do nothing since it is not a target channel of translation
-        else:
+    channelname = workspace.channels.id_dict[message["channel"]]
+
+    # Other channels of the group (basenames from the routing configuration,
+    # e.g. "foobar" of foobar/foobar-en/foobar-fr) and their languages
+    targets = routing.current.targets(channelname, name_dict)
+    if not targets:
+        return
+
+    # retrieve username from userid
+    speaker = workspace.speaker_name(message["user"])
+
+    # Quick consecutive messages of the speaker are posted together later
+    if burst_coalescer is not None and burst_coalescer.add(
+        message, (speaker, targets, say, workspace.team_id)
+    ):
+        return
+
+    # Messages with only files have no text to translate
+    futures = []
+    if message.get("text"):
+        futures = fan_out(message, speaker, targets, say, workspace.team_id)
+
+    # target language -> channel IDs, for shared files
+    languages = {}
+    for _, target_channel, tr_to_lang in targets:
+        languages.setdefault(tr_to_lang, []).append(target_channel)
+
+    # Files are translated in the background, one document per language
+    if document_translator is not None:
+        for file in message.get("files", []):
+            for tr_to_lang, channel_ids in languages.items():
+                document_translator.submit(
+                    workspace.client,
+                    file,
+                    tr_to_lang,
+                    channel_ids,
+                    f"{speaker} shared a file:",
+                    source_channel=message["channel"],
+                    user=message.get("user", ""),
+                    team_id=workspace.team_id,
+                )
+
+    # Wait for all target channels before handling the next message
+    for future in futures:
+        try:
+            future.result()
+        except CancelledError:
+            # Persisted to the outbox by the shutdown drain
             pass
 
-    return
+    time.sleep(1)
 
 
 @bolt_app.event({"type": "message", "subtype": "message_deleted"})
@@ -307,17 +1190,104 @@ def catch_all(ack: Ack, message):
     ack()
 
 
+@bolt_app.event("channel_created")
+@bolt_app.event("channel_rename")
+@bolt_app.event("channel_archive")
+@bolt_app.event("channel_unarchive")
+@bolt_app.event("channel_deleted")
+def channels_changed(ack: Ack, context):
+    ack()
+
+    # The channel directory is reloaded on the next event of the workspace
+    workspaces.invalidate(context.team_id or DEFAULT_TEAM_ID)
+
+
+@bolt_app.middleware
+def use_slack_transport(context, next):
+    # Listeners and say() use the shared client of the token instead of the
+    # one Bolt creates for every request
+    if context.token:
+        context["client"] = slack_transport.client(context.token, context.team_id or "")
+    return next()
+
+
 @bolt_app.middleware  # or app.use(log_request)
 def log_request(logger, body, next):
-    logger.debug(body)
+    # Tag every log record of this event, including DeepL and Slack calls.
+    # The ID is not reset here: listeners run after next() returns, in a copy
+    # of this context, and handle_slack_request discards it afterwards.
+    correlation_id.set(new_correlation_id(body))
+    # Request bodies are sampled and message content is redacted
+    if sampled(LOG_BODY_SAMPLE_RATE) and logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Slack request", extra={"body": redact(body)})
+    return next()
+
+
+# Envelope of the Slack request being handled, if sampled for the corpus
+traffic_sample = contextvars.ContextVar("traffic_sample", default=None)
+
+
+@bolt_app.middleware
+def record_traffic(body, next):
+    # A sample of event envelopes goes to the replay corpus, anonymized and
+    # written on the recorder's thread. next() returns before the listener
+    # acknowledges, so handle_slack_request times and records the request.
+    if traffic_recorder is not None and traffic_recorder.sampled(body):
+        traffic_sample.set(body)
     return next()
 
 
+@bolt_app.middleware
+def filter_events(body, context, next):
+    event = body.get("event")
+    if event is None:
+        return next()
+    reason = event_filter.check(
+        event, context.team_id, context.bot_id, context.bot_user_id
+    )
+    if reason is None:
+        return next()
+    # Acknowledged without running any listener
+    logging.debug("Event dropped: %s", reason)
+    return BoltResponse(status=200, body="")
+
+
 # error handling
 @bolt_app.error
 def custom_error_handler(error, body, logger):
-    logger.exception(f"Error: {error}")
-    logger.info(f"Request body: {body}")
+    logger.exception("Error: %s", error)
+    logger.info("Request body", extra={"body": redact(body)})
+
+
+def handle_slack_request(handle):
+    """
+    Run one Slack request through Bolt in a context of its own.
+
+    Context variables set by the middleware, such as the correlation ID, are
+    copied to the listener threads and dropped when the request is done
+    instead of leaking into the next request on the same thread. Requests
+    sampled by record_traffic are recorded with the time Bolt took to
+    acknowledge them, including authorization, every middleware, listener
+    matching and any wait for the listener's ack().
+
+    Args:
+        handle: Callable dispatching the request to bolt_app
+
+    Returns:
+        The return value of handle
+    """
+
+    def run():
+        received_at = time.time()
+        started = time.monotonic()
+        try:
+            return handle()
+        finally:
+            body = traffic_sample.get()
+            if body is not None:
+                traffic_recorder.record(body, received_at, time.monotonic() - started)
+
+    return contextvars.copy_context().run(run)
 
 
 ############ END Bolt handlers ############
@@ -330,6 +1300,17 @@ def custom_error_handler(error, body, logger):
 # Call bolt handler
 @app.route("/slack/events", methods=["POST"])
 def slack_events():
+    return handle_slack_request(lambda: handler.handle(request))
+
+
+# OAuth installation flow (multiple workspaces)
+@app.route("/slack/install", methods=["GET"])
+def slack_install():
+    return handler.handle(request)
+
+
+@app.route("/slack/oauth_redirect", methods=["GET"])
+def slack_oauth_redirect():
     return handler.handle(request)
 
 
@@ -341,6 +1322,19 @@ def slack_events():
 # return "", 200, {}
 
 
+# Liveness: the process is serving requests
+@app.route("/healthz")
+def healthz():
+    return "ok", 200, {}
+
+
+# Readiness: dependencies are reachable and the queue is not backed up
+@app.route("/readyz")
+def readyz():
+    ready, report = readiness()
+    return jsonify(report), 200 if ready else 503
+
+
 @app.route("/_ah/start")
 def spinup():
 
@@ -351,7 +1345,8 @@ def spinup():
 @app.route("/_ah/stop")
 def spindown():
 
-    # Google App Engine
+    # Google App Engine: drain before the instance is shut down
+    shutdown_coordinator.shutdown("/_ah/stop")
     return "", 200, {}
 
 
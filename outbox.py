@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Durable local outbox for translations that could not be delivered.
+
+When DeepL is unavailable, multichannel translation jobs are written to a
+local SQLite database instead of being dropped. A background replayer drains
+the outbox with exponential backoff once DeepL recovers, keeping the original
+order of messages per target channel.
+
+A job that fails permanently (PermanentDeliveryError) or too many times is
+moved to a bounded dead-letter table, so that it does not hold back the
+later jobs of its channel forever.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from deepl_client import DeeplClientError
+
+
+class PermanentDeliveryError(Exception):
+    """
+    Raised by a deliver callable when retrying the job cannot succeed
+    (e.g. the target channel was deleted or the message is too long).
+    """
+
+    pass
+
+
+class DeferredDeliveryError(Exception):
+    """
+    Raised by a deliver callable when the job was not attempted, e.g. because
+    the translation scheduler is stopped while the process shuts down.
+    """
+
+    pass
+
+
+@dataclass
+class OutboxJob:
+    """
+    A single pending translation job.
+
+    Attributes:
+        job_id: Row ID in the outbox, increasing in enqueue order
+        key: Idempotency key of the job
+        source_channel: Channel ID the original message was posted in
+        target_channel: Channel ID the translation should be posted to
+        target_lang: Target language code (e.g., 'EN', 'FR', 'JA')
+        speaker: Display name of the original speaker
+        text: Original (untranslated) message text
+        attempts: Number of failed delivery attempts so far
+        team_id: Slack team ID of the workspace ('' for the default workspace)
+    """
+
+    job_id: int
+    key: str
+    source_channel: str
+    target_channel: str
+    target_lang: str
+    speaker: str
+    text: str
+    attempts: int = 0
+    team_id: str = ""
+
+
+def make_job_key(source_channel: str, source_ts: str, target_channel: str) -> str:
+    """
+    Build the idempotency key of a translation job.
+
+    Slack message timestamps are unique per channel, so the triple of source
+    channel, message timestamp and target channel identifies a job even when
+    Slack redelivers the same event.
+    """
+    return f"{source_channel}:{source_ts}:{target_channel}"
+
+
+class Outbox:
+    """
+    Bounded, append-only SQLite outbox of failed translation jobs.
+
+    The outbox is safe to share between threads. Delivered keys are kept in a
+    bounded table so that a redelivered event cannot be posted twice.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_jobs: int = 1000,
+        max_delivered: int = 10000,
+        max_dead: int = 1000,
+    ):
+        """
+        Open (or create) an outbox.
+
+        Args:
+            path: Path of the SQLite database file
+            max_jobs: Maximum number of pending jobs; new jobs are rejected when full
+            max_delivered: Number of delivered idempotency keys to remember
+            max_dead: Number of given-up jobs to keep for inspection
+        """
+        self.max_jobs = max_jobs
+        self.max_delivered = max_delivered
+        self.max_dead = max_dead
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " key TEXT UNIQUE NOT NULL,"
+                " source_channel TEXT NOT NULL,"
+                " target_channel TEXT NOT NULL,"
+                " target_lang TEXT NOT NULL,"
+                " speaker TEXT NOT NULL,"
+                " text TEXT NOT NULL,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " created REAL NOT NULL,"
+                " team_id TEXT NOT NULL DEFAULT '')"
+            )
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")]
+            if "team_id" not in columns:
+                # Outboxes created before multi-workspace support
+                self._conn.execute(
+                    "ALTER TABLE jobs ADD COLUMN team_id TEXT NOT NULL DEFAULT ''"
+                )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_target ON jobs (target_channel, id)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS delivered ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " key TEXT UNIQUE NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS dead ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " key TEXT NOT NULL,"
+                " source_channel TEXT NOT NULL,"
+                " target_channel TEXT NOT NULL,"
+                " target_lang TEXT NOT NULL,"
+                " speaker TEXT NOT NULL,"
+                " text TEXT NOT NULL,"
+                " attempts INTEGER NOT NULL,"
+                " team_id TEXT NOT NULL,"
+                " reason TEXT NOT NULL,"
+                " failed REAL NOT NULL)"
+            )
+
+    def enqueue(
+        self,
+        key: str,
+        source_channel: str,
+        target_channel: str,
+        target_lang: str,
+        speaker: str,
+        text: str,
+        team_id: str = "",
+    ) -> bool:
+        """
+        Append a job to the outbox.
+
+        Returns:
+            True if the job was stored, False if it is a duplicate of a pending
+            or already delivered job, or if the outbox is full
+        """
+        with self._lock, self._conn:
+            if self._conn.execute(
+                "SELECT 1 FROM delivered WHERE key = ?", (key,)
+            ).fetchone():
+                return False
+            (depth,) = self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()
+            if depth >= self.max_jobs:
+                logging.warning("Outbox is full, dropping translation job")
+                return False
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO jobs (key, source_channel, target_channel,"
+                " target_lang, speaker, text, team_id, created)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    source_channel,
+                    target_channel,
+                    target_lang,
+                    speaker,
+                    text,
+                    team_id,
+                    time.time(),
+                ),
+            )
+            return cursor.rowcount == 1
+
+    def has_pending(self, target_channel: str) -> bool:
+        """Return True if jobs are waiting to be posted to target_channel."""
+        with self._lock:
+            return (
+                self._conn.execute(
+                    "SELECT 1 FROM jobs WHERE target_channel = ? LIMIT 1",
+                    (target_channel,),
+                ).fetchone()
+                is not None
+            )
+
+    def heads(self) -> List[OutboxJob]:
+        """
+        Return the oldest pending job of every target channel.
+
+        Only the head of each channel may be delivered, which preserves the
+        original message order per channel.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, key, source_channel, target_channel, target_lang,"
+                " speaker, text, attempts, team_id FROM jobs WHERE id IN"
+                " (SELECT MIN(id) FROM jobs GROUP BY target_channel) ORDER BY id"
+            ).fetchall()
+        return [OutboxJob(*row) for row in rows]
+
+    def complete(self, job: OutboxJob) -> None:
+        """Remove a delivered job and remember its idempotency key."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM jobs WHERE id = ?", (job.job_id,))
+            self._conn.execute(
+                "INSERT OR IGNORE INTO delivered (key) VALUES (?)", (job.key,)
+            )
+            self._conn.execute(
+                "DELETE FROM delivered WHERE id <= "
+                "(SELECT MAX(id) FROM delivered) - ?",
+                (self.max_delivered,),
+            )
+
+    def record_failure(self, job: OutboxJob) -> None:
+        """Increment the attempt counter of a job that failed again."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET attempts = attempts + 1 WHERE id = ?", (job.job_id,)
+            )
+
+    def dead_letter(self, job: OutboxJob, reason: str) -> None:
+        """
+        Give up a job: move it from the pending jobs to the dead-letter table.
+
+        Its idempotency key is remembered as delivered, so that a redelivered
+        event does not queue it again.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM jobs WHERE id = ?", (job.job_id,))
+            self._conn.execute(
+                "INSERT INTO dead (key, source_channel, target_channel, target_lang,"
+                " speaker, text, attempts, team_id, reason, failed)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job.key,
+                    job.source_channel,
+                    job.target_channel,
+                    job.target_lang,
+                    job.speaker,
+                    job.text,
+                    job.attempts,
+                    job.team_id,
+                    reason,
+                    time.time(),
+                ),
+            )
+            self._conn.execute(
+                "DELETE FROM dead WHERE id <= (SELECT MAX(id) FROM dead) - ?",
+                (self.max_dead,),
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO delivered (key) VALUES (?)", (job.key,)
+            )
+        logging.error(
+            "Outbox gave up translation job for %s after %s attempts: %s",
+            job.target_channel,
+            job.attempts,
+            reason,
+        )
+
+    def dead_depth(self) -> int:
+        """Return the number of given-up jobs kept in the dead-letter table."""
+        with self._lock:
+            (depth,) = self._conn.execute("SELECT COUNT(*) FROM dead").fetchone()
+        return depth
+
+    def depth(self) -> int:
+        """Return the number of pending jobs."""
+        with self._lock:
+            (depth,) = self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()
+        return depth
+
+    def depth_by_channel(self) -> Dict[str, int]:
+        """Return the number of pending jobs per target channel ID."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT target_channel, COUNT(*) FROM jobs GROUP BY target_channel"
+            ).fetchall()
+        return dict(rows)
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class OutboxReplayer:
+    """
+    Background thread that drains an outbox with exponential backoff.
+
+    Each pass delivers the head job of every target channel. A channel whose
+    head fails is skipped for the rest of the pass, and the replayer backs off
+    before the next pass; a fully successful pass resets the delay. A head
+    that fails permanently or max_attempts times is dead-lettered, which
+    unblocks its channel. A deferred head ends the pass without counting an
+    attempt.
+    """
+
+    def __init__(
+        self,
+        outbox: Outbox,
+        deliver: Callable[[OutboxJob], None],
+        base_delay: float = 5.0,
+        max_delay: float = 300.0,
+        lease: Optional[Callable[[], bool]] = None,
+        max_attempts: int = 10,
+    ):
+        """
+        Args:
+            outbox: Outbox to drain
+            deliver: Callable that translates and posts a job; it raises
+                DeeplClientError while DeepL is still unavailable and
+                DeferredDeliveryError when the job could not be attempted
+            base_delay: Delay in seconds between passes when idle or healthy
+            max_delay: Upper bound of the backoff delay in seconds
+            lease: Callable returning True while this process may drain the
+                outbox; with several workers only the lease holder replays
+            max_attempts: Failed attempts after which a job is given up
+        """
+        self.outbox = outbox
+        self.deliver = deliver
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._delay = base_delay
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the replayer thread."""
+        self._thread = threading.Thread(
+            target=self._run, name="outbox-replayer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Ask the replayer thread to stop and wait for it."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def drain_once(self) -> bool:
+        """
+        Deliver the head job of every target channel once.
+
+        Returns:
+            True if every attempted job was delivered
+        """
+        ok = True
+        while not self._stop.is_set():
+            heads = self.outbox.heads()
+            if not heads:
+                break
+            progressed = False
+            for job in heads:
+                try:
+                    self.deliver(job)
+                except DeferredDeliveryError:
+                    # Nothing was attempted; retry the job on a later pass
+                    return False
+                except PermanentDeliveryError as e:
+                    job.attempts += 1
+                    self.outbox.dead_letter(job, str(e) or type(e).__name__)
+                    progressed = True
+                    continue
+                except Exception as e:
+                    if isinstance(e, DeeplClientError):
+                        logging.warning("Outbox replay failed: %s", type(e).__name__)
+                    else:
+                        logging.error(
+                            "Unexpected error in outbox replay: %s", type(e).__name__
+                        )
+                    job.attempts += 1
+                    if job.attempts >= self.max_attempts:
+                        self.outbox.dead_letter(job, type(e).__name__)
+                    else:
+                        self.outbox.record_failure(job)
+                    ok = False
+                    continue
+                self.outbox.complete(job)
+                progressed = True
+            if not ok or not progressed:
+                break
+        return ok
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if self.lease is not None and not self.lease():
+                self._stop.wait(self.base_delay)
+                continue
+            if self.drain_once():
+                self._delay = self.base_delay
+            else:
+                self._delay = min(self._delay * 2, self.max_delay)
+            self._stop.wait(self._delay)
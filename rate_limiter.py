@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Process-wide adaptive limiter for outbound API requests.
+
+The limiter caps the number of in-flight requests with an AIMD
+(additive-increase, multiplicative-decrease) concurrency limit. A throttled
+response (HTTP 429) halves the limit and pauses every caller until the
+server's Retry-After has passed, so one rate-limit response is honoured by
+all threads instead of each thread retrying on its own.
+"""
+
+import email.utils
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+
+def parse_retry_after(value: Optional[str], default: float = 1.0) -> float:
+    """
+    Parse a Retry-After header value.
+
+    Args:
+        value: Header value, either delay-seconds or an HTTP-date
+        default: Delay in seconds used when the header is missing or invalid
+
+    Returns:
+        Delay in seconds (never negative)
+    """
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    if retry_at is None:
+        return default
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limiter shared by all threads of a process.
+
+    Every successful request raises the limit by 1/limit (about one slot per
+    round trip of a full window) and a throttled request halves it, at most
+    once per Retry-After pause: the other 429s of the same burst were sent
+    before the pause and must not halve it again. The exponentially weighted
+    429 rate is kept for monitoring.
+    """
+
+    def __init__(
+        self,
+        initial_limit: float = 4.0,
+        min_limit: float = 1.0,
+        max_limit: float = 8.0,
+        decrease_factor: float = 0.5,
+    ):
+        """
+        Args:
+            initial_limit: Concurrency limit to start with
+            min_limit: Lower bound of the concurrency limit
+            max_limit: Upper bound of the concurrency limit
+            decrease_factor: Factor applied to the limit on a throttled response
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self._limit = min(max(initial_limit, min_limit), max_limit)
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._throttle_rate = 0.0
+        self._requests = 0
+        self._throttled = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for a request slot.
+
+        Args:
+            timeout: Maximum time to wait in seconds (None waits forever)
+
+        Returns:
+            True if a slot was acquired, False if the wait would exceed timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wake_at = self._paused_until
+                elif self._in_flight < int(self._limit):
+                    self._in_flight += 1
+                    return True
+                else:
+                    wake_at = None
+                if deadline is not None:
+                    # Don't sleep through a pause that outlasts the deadline
+                    if (wake_at or now) >= deadline:
+                        return False
+                    wake_at = min(wake_at or deadline, deadline)
+                self._cond.wait(None if wake_at is None else wake_at - now)
+
+    def release(self) -> None:
+        """Return a request slot."""
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None) -> Iterator[bool]:
+        """
+        Context manager around acquire()/release().
+
+        Yields:
+            The result of acquire(); the slot is only released if acquired
+        """
+        acquired = self.acquire(timeout)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self.release()
+
+    def record_success(self) -> None:
+        """Additively increase the limit after a successful request."""
+        with self._cond:
+            self._requests += 1
+            self._throttle_rate *= 0.95
+            self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+            self._cond.notify_all()
+
+    def record_throttle(self, retry_after: float) -> None:
+        """
+        Multiplicatively decrease the limit and pause all callers.
+
+        Args:
+            retry_after: Delay in seconds requested by the server
+        """
+        now = time.monotonic()
+        with self._cond:
+            self._requests += 1
+            self._throttled += 1
+            self._throttle_rate = self._throttle_rate * 0.95 + 0.05
+            if now >= self._paused_until:
+                self._limit = max(self.min_limit, self._limit * self.decrease_factor)
+            self._paused_until = max(self._paused_until, now + retry_after)
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, float]:
+        """Return a snapshot of the limiter state."""
+        with self._cond:
+            return {
+                "limit": self._limit,
+                "in_flight": self._in_flight,
+                "paused_for": max(0.0, self._paused_until - time.monotonic()),
+                "throttle_rate": self._throttle_rate,
+                "requests": self._requests,
+                "throttled": self._throttled,
+            }
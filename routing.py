@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Hot-reloadable routing of multichannel groups and keyword triggers.
+
+A Routing holds the multichannel group basenames, the channel-name suffix
+of each language and the trigger table, all compiled once. It is never
+modified: a RoutingReloader builds a new Routing on its own thread when the
+routing file changes or an admin asks for it, and swaps it in with a single
+reference assignment. Handlers read the reference once per event, so they
+never see a half-built routing and never wait for a rebuild.
+
+Routing files are JSON objects such as:
+    {
+        "groups": ["general", "random"],
+        "suffixes": {"-en": "EN", "-fr": "FR"},
+        "base_lang": "JA",
+        "triggers": [{"keyword": "Nyan", "target_lang": "JA"}]
+    }
+Missing keys keep their defaults (MULTI_CHANNEL, the built-in suffixes and
+TRIGGERS_PATH).
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Pattern, Tuple
+
+from triggers import TriggerTable, load_trigger_table, parse_triggers
+
+# Channel-name suffix -> target language; other channels of a group get
+# DEFAULT_BASE_LANG
+DEFAULT_SUFFIXES = {"-en": "EN", "-fr": "FR"}
+DEFAULT_BASE_LANG = "JA"
+
+
+class Routing:
+    """
+    Compiled, read-only routing configuration.
+
+    Attributes:
+        groups: Multichannel group basenames (regular expressions)
+        suffixes: Channel-name suffix -> target language
+        base_lang: Language of group channels without a known suffix
+        triggers: Keyword triggers for on-demand translation
+        source: Where the configuration was loaded from
+        loaded_at: Time the routing was built
+    """
+
+    def __init__(
+        self,
+        groups: List[str],
+        suffixes: Dict[str, str],
+        base_lang: str,
+        triggers: TriggerTable,
+        source: str = "environment",
+    ):
+        """
+        Raises:
+            ValueError: If a group basename is not a valid regex
+        """
+        self.groups: Tuple[str, ...] = tuple(g for g in groups if g)
+        self.suffixes = dict(suffixes)
+        self.base_lang = base_lang
+        self.triggers = triggers
+        self.source = source
+        self.loaded_at = time.time()
+        try:
+            self._patterns: List[Tuple[str, Pattern[str]]] = [
+                (group, re.compile(group)) for group in self.groups
+            ]
+        except re.error as e:
+            raise ValueError(f"Invalid group basename: {e}") from e
+
+    def group_of(self, channel_name: str) -> Optional[Pattern[str]]:
+        """Return the pattern of the first group containing a channel."""
+        for _, pattern in self._patterns:
+            if pattern.search(channel_name):
+                return pattern
+        return None
+
+    def target_lang(self, group: Pattern[str], channel_name: str) -> Optional[str]:
+        """Return the language of a channel of a group, or None."""
+        if not group.search(channel_name):
+            return None
+        for suffix, lang in self.suffixes.items():
+            if channel_name.endswith(suffix):
+                return lang
+        if group.match(channel_name):
+            return self.base_lang
+        return None
+
+    def targets(
+        self, channel_name: str, name_dict: Dict[str, str]
+    ) -> List[Tuple[str, str, str]]:
+        """
+        Return the other channels of the group a channel belongs to.
+
+        Args:
+            channel_name: Name of the channel a message was posted in
+            name_dict: Channel name -> channel ID of the workspace
+
+        Returns:
+            List of (channel name, channel ID, target language); empty if the
+            channel is in no group
+        """
+        group = self.group_of(channel_name)
+        if group is None:
+            return []
+        targets = []
+        for name, channel_id in name_dict.items():
+            if name == channel_name:
+                continue
+            lang = self.target_lang(group, name)
+            if lang:
+                targets.append((name, channel_id, lang))
+        return targets
+
+    def describe(self) -> str:
+        """Return the routing summary posted by Meoroute."""
+        suffixes = ", ".join(f"{s}:{lang}" for s, lang in self.suffixes.items())
+        return "\n".join(
+            [
+                f"Routing from {self.source}:",
+                f"    Groups: {', '.join(self.groups) or '(none)'}",
+                f"    Suffixes: {suffixes}, other:{self.base_lang}",
+                f"    Keywords: {len(self.triggers.triggers)}",
+            ]
+        )
+
+
+def load_routing(
+    path: Optional[str],
+    default_groups: List[str],
+    triggers_path: Optional[str] = None,
+) -> Routing:
+    """
+    Build a Routing from a JSON file and defaults.
+
+    Args:
+        path: Routing file; the defaults are used if None or missing
+        default_groups: Group basenames used if the file has none
+        triggers_path: Trigger file used if the file has no triggers
+
+    Raises:
+        ValueError: If the file is not a valid routing configuration
+        OSError: If the file cannot be read
+    """
+    config: dict = {}
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            try:
+                config = json.load(f)
+            except ValueError as e:
+                raise ValueError(f"Invalid routing file: {e}") from e
+        if not isinstance(config, dict):
+            raise ValueError("Invalid routing file: expected an object")
+    else:
+        path = None
+
+    groups = config.get("groups", default_groups)
+    suffixes = config.get("suffixes", DEFAULT_SUFFIXES)
+    base_lang = config.get("base_lang", DEFAULT_BASE_LANG)
+    if not isinstance(groups, list) or not all(isinstance(g, str) for g in groups):
+        raise ValueError("Invalid routing file: groups must be a list of names")
+    if not isinstance(suffixes, dict):
+        raise ValueError("Invalid routing file: suffixes must be an object")
+
+    if "triggers" in config:
+        triggers = TriggerTable(parse_triggers(config["triggers"]))
+    else:
+        triggers = load_trigger_table(triggers_path)
+
+    return Routing(groups, suffixes, base_lang, triggers, source=path or "environment")
+
+
+def save_groups(path: str, groups: List[str]) -> None:
+    """Replace the groups of a routing file atomically, keeping other keys."""
+    config: dict = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+    config["groups"] = groups
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+class RoutingReloader:
+    """
+    Holds the current Routing and rebuilds it on a background thread.
+
+    The routing file is checked for changes every interval seconds, which
+    also propagates admin changes to the other worker processes.
+    """
+
+    def __init__(
+        self,
+        build: Callable[[], Routing],
+        path: Optional[str] = None,
+        interval: float = 30.0,
+        on_change: Optional[Callable[[Routing], None]] = None,
+    ):
+        """
+        Args:
+            build: Builds a Routing from the current configuration
+            path: Routing file watched for changes
+            interval: Seconds between checks of the file (0 disables them)
+            on_change: Called with every routing swapped in by a rebuild
+        """
+        self.build = build
+        self.path = path
+        self.interval = interval
+        self.on_change = on_change
+        self.current: Routing = build()
+        self._mtime = self._file_mtime()
+        self._requests: List[Tuple[Callable[[], Routing], Future]] = []
+        self._wake = threading.Condition()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def _file_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime if self.path else None
+        except OSError:
+            return None
+
+    def start(self) -> None:
+        """Start the background rebuild thread."""
+        self._thread = threading.Thread(
+            target=self._run, name="routing-reloader", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the background thread."""
+        with self._wake:
+            self._stopped = True
+            self._wake.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def request(self, build: Optional[Callable[[], Routing]] = None) -> Future:
+        """
+        Rebuild the routing in the background.
+
+        Args:
+            build: Builder to use instead of the configured one
+
+        Returns:
+            Future resolving to the new Routing, or to the build error
+        """
+        future: Future = Future()
+        with self._wake:
+            self._requests.append((build or self.build, future))
+            self._wake.notify_all()
+        return future
+
+    def rebuild(self, build: Optional[Callable[[], Routing]] = None) -> Routing:
+        """
+        Build a routing and swap it in; the old one stays on failure.
+
+        Raises:
+            ValueError, OSError: If the configuration is invalid
+        """
+        mtime = self._file_mtime()
+        routing = (build or self.build)()
+        # A single reference assignment: readers see the old or the new one
+        self.current = routing
+        self._mtime = mtime
+        if self.on_change is not None:
+            self.on_change(routing)
+        logging.info(
+            "Routing reloaded from %s: %d groups, %d keywords",
+            routing.source,
+            len(routing.groups),
+            len(routing.triggers.triggers),
+        )
+        return routing
+
+    def _run(self) -> None:
+        while True:
+            with self._wake:
+                if not self._requests and not self._stopped:
+                    self._wake.wait(self.interval or None)
+                if self._stopped:
+                    return
+                requests, self._requests = self._requests, []
+
+            for build, future in requests:
+                try:
+                    future.set_result(self.rebuild(build))
+                except Exception as e:
+                    logging.error("Routing reload failed: %s", e)
+                    future.set_exception(e)
+
+            if not requests and self.interval and self._file_mtime() != self._mtime:
+                try:
+                    self.rebuild()
+                except (ValueError, OSError) as e:
+                    logging.error("Routing reload failed: %s", e)
+                    # Don't retry until the file changes again
+                    self._mtime = self._file_mtime()
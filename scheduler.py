@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Priority scheduler for translation work.
+
+Interactive on-demand translations, multichannel fan-out and outbox replay
+share one pool of worker threads. Workers always take work from the highest
+priority class that has any, and within a class they rotate between channels
+so that a single noisy channel cannot starve the others.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+# Priority classes, highest first
+ONDEMAND = 0
+FANOUT = 1
+BACKFILL = 2
+
+PRIORITY_NAMES = {ONDEMAND: "ondemand", FANOUT: "fanout", BACKFILL: "backfill"}
+
+
+class _Task:
+    __slots__ = ("future", "fn", "args", "kwargs", "submitted", "context")
+
+    def __init__(self, fn: Callable, args: tuple, kwargs: dict):
+        self.future: Future = Future()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.submitted = time.monotonic()
+        # Run in the submitter's context (e.g. its log correlation ID)
+        self.context = contextvars.copy_context()
+
+
+class LatencyStats:
+    """
+    Bounded window of latency samples for one priority class.
+
+    Attributes:
+        count: Total number of recorded tasks
+    """
+
+    def __init__(self, window: int = 1000):
+        self.count = 0
+        self._wait: Deque[float] = deque(maxlen=window)
+        self._total: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, wait: float, total: float) -> None:
+        with self._lock:
+            self.count += 1
+            self._wait.append(wait)
+            self._total.append(total)
+
+    @staticmethod
+    def _percentile(samples: List[float], percent: float) -> float:
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+    def snapshot(self) -> Dict[str, float]:
+        """Return count and p50/p95 queue wait and total latency in seconds."""
+        with self._lock:
+            count, wait, total = self.count, list(self._wait), list(self._total)
+        return {
+            "count": count,
+            "wait_p50": self._percentile(wait, 50),
+            "wait_p95": self._percentile(wait, 95),
+            "total_p50": self._percentile(total, 50),
+            "total_p95": self._percentile(total, 95),
+        }
+
+
+class TranslationScheduler:
+    """
+    Worker pool with strict priority classes and per-channel round robin.
+    """
+
+    def __init__(self, workers: int = 4):
+        """
+        Args:
+            workers: Number of worker threads
+        """
+        self.workers = workers
+        # priority -> channel -> FIFO of tasks; channel order is the rotation
+        self._queues: Dict[int, "OrderedDict[str, Deque[_Task]]"] = {
+            priority: OrderedDict() for priority in PRIORITY_NAMES
+        }
+        self._stats = {priority: LatencyStats() for priority in PRIORITY_NAMES}
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+        self._running = 0
+
+    def start(self) -> None:
+        """Start the worker threads."""
+        for n in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f"translation-worker-{n}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the workers after the queued tasks have run."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def drain(self, timeout: float) -> List[Tuple[int, _Task]]:
+        """
+        Stop accepting tasks and keep running the queued ones until timeout.
+
+        Args:
+            timeout: Seconds to run queued and in-flight tasks
+
+        Returns:
+            (priority, task) of the tasks still queued at the deadline; their
+            futures are cancelled
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            while any(self._queues.values()) and time.monotonic() < deadline:
+                self._cond.wait(min(0.05, max(0.0, deadline - time.monotonic())))
+            leftover = []
+            for priority, channels in self._queues.items():
+                for tasks in channels.values():
+                    leftover.extend((priority, task) for task in tasks)
+                channels.clear()
+        for _, task in leftover:
+            task.future.cancel()
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        return leftover
+
+    def in_flight(self) -> int:
+        """Return the number of worker threads still running a task."""
+        with self._cond:
+            return self._running
+
+    @property
+    def stopped(self) -> bool:
+        """True once stop() or drain() has been called."""
+        return self._stopping
+
+    def submit(
+        self, priority: int, channel: str, fn: Callable, *args: Any, **kwargs: Any
+    ) -> Future:
+        """
+        Queue a callable.
+
+        Args:
+            priority: ONDEMAND, FANOUT or BACKFILL
+            channel: Channel the work belongs to, used for fairness
+            fn: Callable to run on a worker thread
+
+        Returns:
+            Future of the callable's result
+        """
+        task = _Task(fn, args, kwargs)
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("Scheduler is stopped")
+            self._queues[priority].setdefault(channel, deque()).append(task)
+            self._cond.notify()
+        return task.future
+
+    def queue_depth(self) -> Dict[str, int]:
+        """Return the number of queued tasks per priority class."""
+        with self._cond:
+            return {
+                PRIORITY_NAMES[priority]: sum(len(q) for q in channels.values())
+                for priority, channels in self._queues.items()
+            }
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Return latency statistics per priority class."""
+        return {
+            PRIORITY_NAMES[priority]: stats.snapshot()
+            for priority, stats in self._stats.items()
+        }
+
+    def _next_task(self) -> Optional[tuple]:
+        # Caller holds self._cond
+        for priority in sorted(self._queues):
+            channels = self._queues[priority]
+            if not channels:
+                continue
+            channel, tasks = next(iter(channels.items()))
+            task = tasks.popleft()
+            if tasks:
+                # Rotate the channel to the back of its class
+                channels.move_to_end(channel)
+            else:
+                del channels[channel]
+            return priority, task
+        return None
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                item = self._next_task()
+                while item is None:
+                    if self._stopping:
+                        return
+                    self._cond.wait()
+                    item = self._next_task()
+                self._running += 1
+            priority, task = item
+            if not task.future.set_running_or_notify_cancel():
+                with self._cond:
+                    self._running -= 1
+                continue
+            started = time.monotonic()
+            try:
+                task.future.set_result(
+                    task.context.run(task.fn, *task.args, **task.kwargs)
+                )
+            except BaseException as e:
+                task.future.set_exception(e)
+            finished = time.monotonic()
+            with self._cond:
+                self._running -= 1
+            self._stats[priority].record(
+                started - task.submitted, finished - task.submitted
+            )
+            logging.debug(
+                "%s task took %.3fs", PRIORITY_NAMES[priority], finished - started
+            )
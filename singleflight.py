@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Single-flight coalescing of identical concurrent calls.
+
+When several threads ask for the same key at once, only the first one calls
+the function; the others wait for its result or its exception. This keeps
+cross-posted messages and near-simultaneous duplicate deliveries from
+sending the same text to DeepL several times before anything is cached.
+"""
+
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class SingleFlightTimeout(TimeoutError):
+    """Raised when the call a waiter joined does not finish in time."""
+
+    pass
+
+
+def content_key(text: str, *parts: Optional[str]) -> str:
+    """Return a key for a text and its options, without keeping the text."""
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return ":".join([digest, *(part or "" for part in parts)])
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key.
+
+    At most max_keys calls are tracked at once; further keys are called
+    directly, so memory stays bounded under a burst of distinct texts.
+    """
+
+    def __init__(self, max_keys: int = 1000, timeout: float = 30.0):
+        """
+        Args:
+            max_keys: Largest number of keys in flight
+            timeout: Seconds a waiter waits for the leading call
+        """
+        self.max_keys = max_keys
+        self.timeout = timeout
+        self._in_flight: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._coalesced = 0
+        self._overflow = 0
+
+    def do(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> Tuple[Any, bool]:
+        """
+        Call fn unless an identical call is in flight, then share its outcome.
+
+        Returns:
+            Tuple of (result, shared), shared being True if the result came
+            from another thread's call
+
+        Raises:
+            SingleFlightTimeout: If the leading call takes longer than timeout
+            Exception: Whatever the leading call raised
+        """
+        with self._lock:
+            self._calls += 1
+            call = self._in_flight.get(key)
+            leader = call is None
+            if call is not None:
+                self._coalesced += 1
+            elif len(self._in_flight) >= self.max_keys:
+                self._overflow += 1
+            else:
+                call = self._in_flight[key] = _Call()
+
+        if call is None:
+            return fn(*args, **kwargs), False
+
+        if not leader:
+            if not call.done.wait(self.timeout):
+                raise SingleFlightTimeout("Timed out waiting for an identical call")
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, float]:
+        """Return call counters and the share of calls that were coalesced."""
+        with self._lock:
+            return {
+                "calls": self._calls,
+                "coalesced": self._coalesced,
+                "overflow": self._overflow,
+                "in_flight": len(self._in_flight),
+                "coalescing_rate": (
+                    self._coalesced / self._calls if self._calls else 0.0
+                ),
+            }
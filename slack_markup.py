@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Protection of Slack formatting through DeepL.
+
+Slack markup characters are replaced with empty XML tags before a text is
+sent to DeepL with tag_handling=xml, and restored in the translation. Shared
+by the bot and the backfill CLI.
+"""
+
+import re
+
+
+### Dirty hack of slack formatting ###
+def replace_markdown(text_block):
+
+    text_block = re.sub("<", "&lt;", text_block)
+    text_block = re.sub(">", "&gt;", text_block)
+    text_block = re.sub("\*", "<bd></bd>", text_block)
+    # Slack treat bullet point as bullet point....
+    text_block = re.sub("•", "<ls></ls>", text_block)
+    text_block = re.sub("_", "<it></it>", text_block)
+    text_block = re.sub("~", "<st></st>", text_block)
+    text_block = re.sub("```", "<cb></cb>", text_block)
+    text_block = re.sub("`", "<cd></cd>", text_block)
+
+    return text_block
+
+
+def revert_markdown(text_block):
+
+    text_block = re.sub("<bd></bd>", "*", text_block)
+    # Slack treat bullet point as bullet point....
+    text_block = re.sub("<ls></ls>", "•", text_block)
+    text_block = re.sub("<it></it>", "_", text_block)
+    text_block = re.sub("<st></st>", "~", text_block)
+    text_block = re.sub("<cb></cb>", "```", text_block)
+    text_block = re.sub("<cd></cd>", "`", text_block)
+    text_block = re.sub("&lt;", "<", text_block)
+    text_block = re.sub("&gt;", ">", text_block)
+
+    return text_block
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Shared Slack Web API transport with rate-limit-aware retries and metrics.
+
+Every WebClient of the app comes from one SlackTransport, which keeps one
+client per token for all threads and requests, and gives each of them the
+same timeout and retry handlers: connection errors and 500/503 responses
+are retried with backoff, and 429 responses after their Retry-After delay.
+
+Rate limits are per workspace and API method (per channel for
+chat.postMessage), so the transport tracks the call rate of each
+(workspace, method) against the method's Slack tier. After a 429, other
+threads calling the same method in that workspace (and channel) wait out
+the Retry-After delay before calling instead of collecting 429s of their
+own. Calls, errors, rate limits, retries and latency are counted per
+method for the readiness report.
+"""
+
+import json
+import logging
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict, defaultdict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from slack_sdk import WebClient
+from slack_sdk.errors import SlackApiError
+from slack_sdk.http_retry.builtin_handlers import (
+    ConnectionErrorRetryHandler,
+    RateLimitErrorRetryHandler,
+    ServerErrorRetryHandler,
+)
+from slack_sdk.http_retry.handler import RetryHandler
+from slack_sdk.http_retry.request import HttpRequest
+from slack_sdk.http_retry.response import HttpResponse
+from slack_sdk.http_retry.state import RetryState
+
+# Web API rate limit tiers of the methods the app calls
+# (https://api.slack.com/docs/rate-limits); chat.postMessage is "special":
+# about one message per second per channel, with short bursts allowed
+METHOD_TIERS = {
+    "apps.connections.open": 1,
+    "conversations.list": 2,
+    "users.list": 2,
+    "conversations.history": 3,
+    "conversations.info": 3,
+    "chat.update": 3,
+    "chat.delete": 3,
+    "api.test": 4,
+    "auth.test": 4,
+    "users.info": 4,
+    "files.info": 4,
+    "files.getUploadURLExternal": 4,
+    "files.completeUploadExternal": 4,
+    "chat.postMessage": "special",
+}
+
+# Calls per minute allowed by each tier, per workspace and method
+TIER_LIMITS = {1: 1, 2: 20, 3: 50, 4: 100, "special": 60}
+
+# Methods without a known tier are assumed to be tier 3
+DEFAULT_TIER = 3
+
+# Methods whose rate limit applies per channel rather than per workspace
+PER_CHANNEL_METHODS = frozenset({"chat.postMessage"})
+
+# Latency samples kept per method
+LATENCY_WINDOW = 500
+
+# Web API errors that retrying the same call cannot fix
+PERMANENT_ERRORS = frozenset(
+    {
+        "channel_not_found",
+        "not_in_channel",
+        "is_archived",
+        "msg_too_long",
+        "no_text",
+        "invalid_blocks",
+        "restricted_action",
+        "account_inactive",
+        "token_revoked",
+    }
+)
+
+
+def method_of(url: str) -> str:
+    """Return the API method of a Web API URL."""
+    return url.split("?", 1)[0].rstrip("/").rsplit("/", 1)[-1]
+
+
+def retry_after(headers: Dict[str, Any]) -> float:
+    """Return the Retry-After delay of response headers (1 s if missing)."""
+    for name, values in headers.items():
+        if name.lower() == "retry-after":
+            try:
+                return float(values[0] if isinstance(values, list) else values)
+            except (TypeError, ValueError):
+                return 1.0
+    return 1.0
+
+
+def channel_of(data: Optional[bytes]) -> Optional[str]:
+    """Return the channel argument of a JSON or form-encoded request body."""
+    if not data:
+        return None
+    try:
+        text = data.decode("utf-8")
+        if text.startswith("{"):
+            channel = json.loads(text).get("channel")
+        else:
+            channel = (urllib.parse.parse_qs(text).get("channel") or [None])[0]
+    except (UnicodeDecodeError, ValueError, AttributeError):
+        return None
+    return channel if isinstance(channel, str) else None
+
+
+def limit_scope(method: str, channel: Optional[str] = None) -> str:
+    """Return the part of a rate-limit key below the workspace."""
+    if channel and method in PER_CHANNEL_METHODS:
+        return f"{method}:{channel}"
+    return method
+
+
+def permanent_error(error: SlackApiError) -> bool:
+    """Return True if a failed Web API call must not be retried."""
+    return error.response.get("error") in PERMANENT_ERRORS
+
+
+class _MethodMetrics:
+    __slots__ = ("calls", "errors", "ratelimited", "retries", "latency")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.ratelimited = 0
+        self.retries = 0
+        self.latency: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+
+class TransportRetryHandler(RetryHandler):
+    """
+    Wraps a built-in retry handler to count retries and share rate limits.
+
+    Rate-limited attempts are only retried if their Retry-After delay is
+    at most the transport's max_retry_after; longer limits fail the call
+    at once rather than holding a listener thread.
+    """
+
+    def __init__(self, inner: RetryHandler, transport: "SlackTransport", key: str):
+        super().__init__(inner.max_retry_count, inner.interval_calculator)
+        self.inner = inner
+        self.transport = transport
+        self.key = key
+
+    def can_retry(
+        self,
+        *,
+        state: RetryState,
+        request: HttpRequest,
+        response: Optional[HttpResponse] = None,
+        error: Optional[Exception] = None,
+    ) -> bool:
+        if response is not None and response.status_code == 429:
+            if retry_after(response.headers) > self.transport.max_retry_after:
+                return False
+        return self.inner.can_retry(
+            state=state, request=request, response=response, error=error
+        )
+
+    def prepare_for_next_attempt(
+        self,
+        *,
+        state: RetryState,
+        request: HttpRequest,
+        response: Optional[HttpResponse] = None,
+        error: Optional[Exception] = None,
+    ) -> None:
+        method = method_of(request.url)
+        self.transport.record_retry(method)
+        if response is not None and response.status_code == 429:
+            channel = (
+                channel_of(request.data) if method in PER_CHANNEL_METHODS else None
+            )
+            self.transport.block(
+                self.key, method, retry_after(response.headers), channel
+            )
+        self.inner.prepare_for_next_attempt(
+            state=state, request=request, response=response, error=error
+        )
+
+
+class TrackedWebClient(WebClient):
+    """WebClient that waits out shared rate limits and reports to a transport."""
+
+    def __init__(self, transport: "SlackTransport", key: str, **kwargs):
+        super().__init__(**kwargs)
+        self.transport = transport
+        self.key = key
+
+    def api_call(self, api_method: str, *args, **kwargs):
+        channel = None
+        if api_method in PER_CHANNEL_METHODS:
+            for name in ("json", "params", "data"):
+                if isinstance(kwargs.get(name), dict):
+                    channel = kwargs[name].get("channel") or channel
+        self.transport.wait(self.key, api_method, channel)
+        started = time.monotonic()
+        try:
+            response = super().api_call(api_method, *args, **kwargs)
+        except SlackApiError as e:
+            status = getattr(e.response, "status_code", None)
+            if status == 429:
+                self.transport.block(
+                    self.key, api_method, retry_after(e.response.headers), channel
+                )
+            self.transport.record(
+                self.key, api_method, time.monotonic() - started, status or "error"
+            )
+            raise
+        except Exception:
+            self.transport.record(
+                self.key, api_method, time.monotonic() - started, "error"
+            )
+            raise
+        self.transport.record(self.key, api_method, time.monotonic() - started)
+        return response
+
+
+class SlackTransport:
+    """
+    Factory and registry of the app's WebClients.
+
+    Clients are created once per (token, workspace) and shared by every
+    thread, so they must not be modified after creation (no token swaps).
+    The least recently used clients are dropped beyond max_clients.
+    """
+
+    def __init__(
+        self,
+        timeout: int = 30,
+        max_retries: int = 2,
+        max_retry_after: float = 30.0,
+        base_url: Optional[str] = None,
+        max_clients: int = 1000,
+    ):
+        """
+        Args:
+            timeout: Seconds to wait for each Web API response
+            max_retries: Retries of each call per kind of failure
+            max_retry_after: Longest Retry-After delay waited out, in seconds
+            base_url: Web API URL (Slack's if None)
+            max_clients: Number of clients kept for reuse
+        """
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_retry_after = max_retry_after
+        self.base_url = base_url
+        self.max_clients = max_clients
+        self._clients: "OrderedDict[Tuple[Optional[str], str], TrackedWebClient]" = (
+            OrderedDict()
+        )
+        self._metrics: Dict[str, _MethodMetrics] = defaultdict(_MethodMetrics)
+        self._calls: Dict[Tuple[str, str], Deque[float]] = {}
+        self._blocked: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def retry_handlers(self, key: str = "") -> List[RetryHandler]:
+        """Return the retry handlers of a client of a workspace."""
+        return [
+            TransportRetryHandler(
+                ConnectionErrorRetryHandler(max_retry_count=self.max_retries),
+                self,
+                key,
+            ),
+            TransportRetryHandler(
+                ServerErrorRetryHandler(max_retry_count=self.max_retries), self, key
+            ),
+            TransportRetryHandler(
+                RateLimitErrorRetryHandler(max_retry_count=self.max_retries),
+                self,
+                key,
+            ),
+        ]
+
+    def client(self, token: Optional[str], team_id: str = "") -> TrackedWebClient:
+        """
+        Return the shared client of a token, creating it on first use.
+
+        Args:
+            token: Bot token (None for clients that only call apps.* methods)
+            team_id: Workspace of the token, used as rate-limit key
+        """
+        with self._lock:
+            client = self._clients.get((token, team_id))
+            if client is not None:
+                self._clients.move_to_end((token, team_id))
+            else:
+                kwargs: Dict[str, Any] = {}
+                if self.base_url:
+                    kwargs["base_url"] = self.base_url
+                client = self._clients[(token, team_id)] = TrackedWebClient(
+                    self,
+                    team_id,
+                    token=token,
+                    timeout=self.timeout,
+                    retry_handlers=self.retry_handlers(team_id),
+                    **kwargs,
+                )
+                # Callers still holding an evicted client keep using it
+                while len(self._clients) > self.max_clients:
+                    self._clients.popitem(last=False)
+            return client
+
+    def wait(self, key: str, method: str, channel: Optional[str] = None) -> float:
+        """
+        Wait until a rate limit of a method seen by another call has passed.
+
+        Returns:
+            Seconds waited
+        """
+        scope = limit_scope(method, channel)
+        with self._lock:
+            delay = self._blocked.get((key, scope), 0.0) - time.monotonic()
+        if delay <= 0:
+            return 0.0
+        delay = min(delay, self.max_retry_after)
+        time.sleep(delay)
+        return delay
+
+    def block(
+        self,
+        key: str,
+        method: str,
+        retry_after: float,
+        channel: Optional[str] = None,
+    ) -> None:
+        """Make calls of a method (in a channel) wait for a Retry-After delay."""
+        until = time.monotonic() + retry_after
+        scope = limit_scope(method, channel)
+        with self._lock:
+            self._blocked[(key, scope)] = max(
+                until, self._blocked.get((key, scope), 0.0)
+            )
+            if len(self._blocked) > 1000:
+                # Per-channel keys add up; expired ones no longer delay anyone
+                now = time.monotonic()
+                self._blocked = {k: t for k, t in self._blocked.items() if t > now}
+            self._metrics[method].ratelimited += 1
+        logging.warning("Slack rate limited %s for %.0f s", method, retry_after)
+
+    def record(self, key: str, method: str, latency: float, error: Any = None) -> None:
+        """Count a finished call of a method."""
+        now = time.monotonic()
+        with self._lock:
+            metrics = self._metrics[method]
+            metrics.calls += 1
+            metrics.latency.append(latency)
+            if error is not None:
+                metrics.errors += 1
+            window = self._calls.get((key, method))
+            if window is None:
+                window = self._calls[(key, method)] = deque(maxlen=1000)
+            window.append(now)
+
+    def record_retry(self, method: str) -> None:
+        """Count a retried attempt of a method."""
+        with self._lock:
+            self._metrics[method].retries += 1
+
+    def rate(self, key: str, method: str) -> int:
+        """Return the calls of a method in a workspace over the last minute."""
+        cutoff = time.monotonic() - 60
+        with self._lock:
+            window = self._calls.get((key, method), ())
+            return sum(1 for at in window if at > cutoff)
+
+    @staticmethod
+    def _percentile(samples: List[float], percent: float) -> float:
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return counters, latency and tier usage per API method.
+
+        Usage is the busiest workspace's calls over the last minute divided
+        by the tier limit.
+        """
+        cutoff = time.monotonic() - 60
+        with self._lock:
+            peak: Dict[str, int] = defaultdict(int)
+            for (_, method), window in self._calls.items():
+                peak[method] = max(peak[method], sum(1 for at in window if at > cutoff))
+            snapshot = {
+                method: (m.calls, m.errors, m.ratelimited, m.retries, list(m.latency))
+                for method, m in self._metrics.items()
+            }
+
+        stats = {}
+        for method, (calls, errors, ratelimited, retries, latency) in sorted(
+            snapshot.items()
+        ):
+            tier = METHOD_TIERS.get(method, DEFAULT_TIER)
+            stats[method] = {
+                "calls": calls,
+                "errors": errors,
+                "ratelimited": ratelimited,
+                "retries": retries,
+                "latency_p50": self._percentile(latency, 50),
+                "latency_p95": self._percentile(latency, 95),
+                "tier": tier,
+                "usage": round(peak[method] / TIER_LIMITS[tier], 2),
+            }
+        return stats
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Socket Mode entry point, an alternative to the HTTP events endpoint.
+
+The same bolt_app listeners, translation scheduler and listener executor as
+the Flask app are driven over Slack's Socket Mode WebSockets instead of
+signed HTTP requests, so no public URL is needed. Several connections are
+opened at once; Slack spreads events over them and keeps delivering to the
+others while one reconnects.
+
+Usage:
+    SLACK_APP_TOKEN=xapp-... SOCKET_MODE_CONNECTIONS=2 python socket_mode.py
+"""
+
+import functools
+import logging
+import os
+import time
+from typing import Any, Callable, List, Optional
+
+from slack_bolt import App
+from slack_bolt.adapter.socket_mode import SocketModeHandler
+from slack_sdk import WebClient
+
+# Slack allows up to 10 Socket Mode connections per app
+MAX_CONNECTIONS = 10
+
+
+class WrappedSocketModeHandler(SocketModeHandler):
+    """SocketModeHandler that runs each request through a wrapper."""
+
+    def __init__(
+        self,
+        *args,
+        request_wrapper: Optional[Callable[[Callable[[], Any]], Any]] = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.request_wrapper = request_wrapper or (lambda handle: handle())
+
+    def handle(self, client, req) -> None:
+        self.request_wrapper(functools.partial(super().handle, client, req))
+
+
+def start_socket_mode(
+    app: App,
+    app_token: str,
+    connections: int = 2,
+    web_client: Optional[WebClient] = None,
+    concurrency: int = 10,
+    request_wrapper: Optional[Callable[[Callable[[], Any]], Any]] = None,
+) -> List[SocketModeHandler]:
+    """
+    Open several Socket Mode connections dispatching to one Bolt app.
+
+    Args:
+        app: Bolt app whose listeners handle the events
+        app_token: App-level token (xapp-...)
+        connections: Number of concurrent connections
+        web_client: Client used for apps.connections.open (app.client if None)
+        concurrency: Threads per connection reading and acknowledging events
+        request_wrapper: Called with a callable dispatching each request to
+            app, e.g. main.handle_slack_request
+
+    Returns:
+        Connected handlers; pass them to stop_socket_mode()
+
+    Raises:
+        ValueError: If connections is out of range
+    """
+    if not 1 <= connections <= MAX_CONNECTIONS:
+        raise ValueError(
+            f"Socket Mode connections must be between 1 and {MAX_CONNECTIONS}"
+        )
+
+    handlers = []
+    for _ in range(connections):
+        handler = WrappedSocketModeHandler(
+            app,
+            app_token,
+            web_client=web_client,
+            concurrency=concurrency,
+            request_wrapper=request_wrapper,
+        )
+        handler.connect()
+        handlers.append(handler)
+    logging.info("Opened %d Socket Mode connections", len(handlers))
+    return handlers
+
+
+def stop_socket_mode(handlers: List[SocketModeHandler]) -> None:
+    """Close Socket Mode connections so that Slack stops sending events."""
+    for handler in handlers:
+        try:
+            handler.close()
+        except Exception as e:
+            logging.warning("Closing Socket Mode connection failed: %s", e)
+
+
+if __name__ == "__main__":
+    import main
+
+    api_url = os.environ.get("SLACK_API_URL")
+    socket_handlers = start_socket_mode(
+        main.bolt_app,
+        os.environ["SLACK_APP_TOKEN"],
+        connections=int(os.environ.get("SOCKET_MODE_CONNECTIONS", "2")),
+        web_client=WebClient(base_url=api_url) if api_url else None,
+        request_wrapper=main.handle_slack_request,
+    )
+    # Stop receiving events before the scheduler drains
+    main.shutdown_coordinator.add_step(
+        "socket_mode", lambda remaining: stop_socket_mode(socket_handlers), first=True
+    )
+
+    try:
+        while not main.shutdown_coordinator.shutting_down:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        main.shutdown_coordinator.shutdown("SIGINT")
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Local stand-in for Slack's Socket Mode, for tests and benchmarks.
+
+The stand-in answers apps.connections.open with a ws:// URL of itself,
+accepts any number of WebSocket connections, and pushes events_api
+envelopes to them round robin, as Slack does. Acknowledgements sent back
+by the app are recorded. Other Web API methods are accepted and recorded
+so that a WebClient pointed at the stand-in can post replies.
+
+Usage:
+    python socket_mode_standin.py --port 8090
+    SLACK_API_URL=http://127.0.0.1:8090/api/ SLACK_APP_TOKEN=xapp-test \\
+        python socket_mode.py
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import socket
+import struct
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+
+# RFC 6455 handshake GUID
+_WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+_TEXT, _CLOSE, _PING, _PONG = 0x1, 0x8, 0x9, 0xA
+
+
+class _Connection:
+    """One WebSocket connection from the app."""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.lock = threading.Lock()
+        self.open = True
+
+    def send(self, opcode: int, payload: bytes) -> None:
+        # Server frames are never masked
+        header = bytes([0x80 | opcode])
+        if len(payload) < 126:
+            header += bytes([len(payload)])
+        elif len(payload) < 65536:
+            header += bytes([126]) + struct.pack("!H", len(payload))
+        else:
+            header += bytes([127]) + struct.pack("!Q", len(payload))
+        with self.lock:
+            self.sock.sendall(header + payload)
+
+    def _read_exact(self, size: int) -> bytes:
+        data = b""
+        while len(data) < size:
+            chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("Connection closed")
+            data += chunk
+        return data
+
+    def receive(self) -> tuple:
+        first, second = self._read_exact(2)
+        opcode = first & 0x0F
+        length = second & 0x7F
+        if length == 126:
+            (length,) = struct.unpack("!H", self._read_exact(2))
+        elif length == 127:
+            (length,) = struct.unpack("!Q", self._read_exact(8))
+        mask = self._read_exact(4) if second & 0x80 else b""
+        payload = self._read_exact(length)
+        if mask:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        return opcode, payload
+
+
+class SocketModeStandin:
+    """
+    Threaded HTTP/WebSocket server emulating Slack's Socket Mode.
+
+    Attributes:
+        acks: Envelope ID -> acknowledgement payload (None if empty)
+        api_calls: Web API calls received, as (method, params)
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.acks: Dict[str, Optional[dict]] = {}
+        self.api_calls: List[tuple] = []
+        self._connections: List[_Connection] = []
+        self._next = 0
+        self._cond = threading.Condition()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def api_url(self) -> str:
+        """Base URL to configure as the WebClient base_url."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/"
+
+    @property
+    def connections(self) -> int:
+        """Number of open WebSocket connections."""
+        with self._cond:
+            return sum(1 for c in self._connections if c.open)
+
+    def start(self) -> "SocketModeStandin":
+        """Serve in a background thread."""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="socket-mode-standin", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Close every connection and stop serving."""
+        with self._cond:
+            connections = list(self._connections)
+        for connection in connections:
+            try:
+                connection.send(_CLOSE, b"")
+            except OSError:
+                pass
+        self._server.shutdown()
+        self._server.server_close()
+
+    def wait_for_connections(self, count: int, timeout: float = 5.0) -> bool:
+        """Wait until count connections are open."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while sum(1 for c in self._connections if c.open) < count:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def send_event(self, event: dict, team_id: str = "T12345") -> str:
+        """
+        Push a message event to the next connection, round robin.
+
+        Returns:
+            Envelope ID to wait for with wait_for_ack()
+        """
+        envelope_id = str(uuid.uuid4())
+        envelope = {
+            "envelope_id": envelope_id,
+            "type": "events_api",
+            "accepts_response_payload": False,
+            "retry_attempt": 0,
+            "retry_reason": "",
+            "payload": {
+                "token": "standin",
+                "team_id": team_id,
+                "api_app_id": "A12345",
+                "event": event,
+                "type": "event_callback",
+                "event_id": f"Ev{uuid.uuid4().hex[:10].upper()}",
+                "event_time": int(time.time()),
+            },
+        }
+        with self._cond:
+            open_connections = [c for c in self._connections if c.open]
+            if not open_connections:
+                raise ConnectionError("No Socket Mode connection")
+            connection = open_connections[self._next % len(open_connections)]
+            self._next += 1
+        connection.send(_TEXT, json.dumps(envelope).encode())
+        return envelope_id
+
+    def wait_for_ack(self, envelope_id: str, timeout: float = 5.0) -> bool:
+        """Wait until the app acknowledges an envelope."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while envelope_id not in self.acks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def _serve_connection(self, connection: _Connection) -> None:
+        with self._cond:
+            self._connections.append(connection)
+            self._cond.notify_all()
+        connection.send(
+            _TEXT,
+            json.dumps({"type": "hello", "num_connections": self.connections}).encode(),
+        )
+        try:
+            while True:
+                opcode, payload = connection.receive()
+                if opcode == _PING:
+                    connection.send(_PONG, payload)
+                elif opcode == _CLOSE:
+                    break
+                elif opcode == _TEXT:
+                    message = json.loads(payload)
+                    with self._cond:
+                        self.acks[message.get("envelope_id")] = message.get("payload")
+                        self._cond.notify_all()
+        except (ConnectionError, OSError, ValueError):
+            pass
+        finally:
+            with self._cond:
+                connection.open = False
+                self._cond.notify_all()
+
+    def _handler_class(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, body: dict) -> None:
+                payload = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length).decode()
+                if self.headers.get("Content-Type", "").startswith("application/json"):
+                    params = json.loads(body or "{}")
+                else:
+                    params = {k: v[0] for k, v in parse_qs(body).items()}
+                method = self.path.rsplit("/", 1)[-1]
+                with standin._cond:
+                    standin.api_calls.append((method, params))
+
+                if method == "apps.connections.open":
+                    host, port = standin._server.server_address[:2]
+                    self._reply(
+                        {"ok": True, "url": f"ws://{host}:{port}/link/?ticket=standin"}
+                    )
+                else:
+                    self._reply({"ok": True, "ts": f"{time.time():.6f}"})
+
+            def do_GET(self):
+                key = self.headers.get("Sec-WebSocket-Key")
+                if self.headers.get("Upgrade", "").lower() != "websocket" or not key:
+                    self.send_error(404)
+                    return
+                accept = base64.b64encode(
+                    hashlib.sha1((key + _WEBSOCKET_GUID).encode()).digest()
+                ).decode()
+                self.send_response(101, "Switching Protocols")
+                self.send_header("Upgrade", "websocket")
+                self.send_header("Connection", "Upgrade")
+                self.send_header("Sec-WebSocket-Accept", accept)
+                self.end_headers()
+                self.wfile.flush()
+                standin._serve_connection(_Connection(self.connection))
+                self.close_connection = True
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Slack Socket Mode stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    args = parser.parse_args()
+
+    standin = SocketModeStandin(args.host, args.port)
+    print(f"Socket Mode stand-in listening on {standin.api_url}")
+    standin.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        standin.stop()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Pluggable state layer shared by gunicorn workers.
+
+Caches, dedup sets, rate-limit buckets, usage counters and leases go
+through one StateBackend interface. MemoryStateBackend keeps state in the
+process; SQLiteStateBackend keeps it in a local SQLite file so that several
+worker processes on the same host see the same state.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+class StateBackend:
+    """
+    Interface of a key-value state backend.
+
+    Keys are plain strings; callers namespace them with a prefix such as
+    'event:' or 'user:'. A ttl of None means the key never expires.
+    """
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the value of key, or None if it is missing or expired."""
+        raise NotImplementedError
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        """Store value under key."""
+        raise NotImplementedError
+
+    def add_if_absent(self, key: str, ttl: Optional[float] = None) -> bool:
+        """
+        Atomically add key if it is missing or expired.
+
+        Returns:
+            True if the key was added, False if it already existed
+        """
+        raise NotImplementedError
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """Atomically add amount to an integer counter and return the new value."""
+        raise NotImplementedError
+
+    def take_token(self, bucket: str, rate: float, capacity: float) -> bool:
+        """
+        Take one token from a token bucket.
+
+        Args:
+            bucket: Bucket name
+            rate: Tokens added per second
+            capacity: Maximum number of tokens in the bucket
+
+        Returns:
+            True if a token was available
+        """
+        raise NotImplementedError
+
+    def acquire_lease(self, key: str, owner: str, ttl: float) -> bool:
+        """
+        Acquire or renew a lease held by owner.
+
+        Returns:
+            True if owner holds the lease for the next ttl seconds
+        """
+        raise NotImplementedError
+
+
+def _refill(
+    state: Optional[str], rate: float, capacity: float, now: float
+) -> Tuple[float, bool]:
+    # Bucket state is "tokens:timestamp"
+    if state is None:
+        tokens = capacity
+    else:
+        stored, updated = state.split(":")
+        tokens = min(capacity, float(stored) + (now - float(updated)) * rate)
+    if tokens >= 1:
+        return tokens - 1, True
+    return tokens, False
+
+
+class MemoryStateBackend(StateBackend):
+    """State backend local to one process."""
+
+    def __init__(self, cleanup_interval: int = 1000):
+        """
+        Args:
+            cleanup_interval: Delete expired keys every this many writes
+        """
+        self.cleanup_interval = cleanup_interval
+        self._writes = 0
+        self._data: Dict[str, Tuple[str, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def _put(self, key: str, value: str, expires: Optional[float], now: float) -> None:
+        # Caller holds self._lock; keys that are never read again (such as
+        # event dedup keys) are only removed by the periodic sweep
+        self._data[key] = (value, expires)
+        self._writes += 1
+        if self._writes % self.cleanup_interval == 0:
+            expired = [
+                k for k, (_, at) in self._data.items() if at is not None and at <= now
+            ]
+            for k in expired:
+                del self._data[k]
+
+    def _get(self, key: str, now: float) -> Optional[str]:
+        # Caller holds self._lock
+        item = self._data.get(key)
+        if item is None:
+            return None
+        if item[1] is not None and item[1] <= now:
+            del self._data[key]
+            return None
+        return item[0]
+
+    @staticmethod
+    def _expires(ttl: Optional[float], now: float) -> Optional[float]:
+        return None if ttl is None else now + ttl
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._get(key, time.time())
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        with self._lock:
+            self._put(key, value, self._expires(ttl, now), now)
+
+    def add_if_absent(self, key: str, ttl: Optional[float] = None) -> bool:
+        now = time.time()
+        with self._lock:
+            if self._get(key, now) is not None:
+                return False
+            self._put(key, "1", self._expires(ttl, now), now)
+            return True
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        now = time.time()
+        with self._lock:
+            current = self._get(key, now)
+            value = int(current or 0) + amount
+            expires = self._data[key][1] if current is not None else None
+            self._put(key, str(value), expires or self._expires(ttl, now), now)
+            return value
+
+    def take_token(self, bucket: str, rate: float, capacity: float) -> bool:
+        now = time.time()
+        with self._lock:
+            tokens, taken = _refill(self._get(bucket, now), rate, capacity, now)
+            self._put(bucket, f"{tokens}:{now}", None, now)
+            return taken
+
+    def acquire_lease(self, key: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            holder = self._get(key, now)
+            if holder is not None and holder != owner:
+                return False
+            self._put(key, owner, now + ttl, now)
+            return True
+
+
+class SQLiteStateBackend(StateBackend):
+    """
+    State backend in a local SQLite file shared by several processes.
+
+    Every read-modify-write runs in a BEGIN IMMEDIATE transaction, which
+    serializes writers across processes. Connections are opened per process,
+    so the backend is safe to create before gunicorn forks its workers.
+    """
+
+    def __init__(self, path: str, cleanup_interval: int = 1000):
+        """
+        Args:
+            path: Path of the SQLite database file
+            cleanup_interval: Delete expired keys every this many writes
+        """
+        self.path = path
+        self.cleanup_interval = cleanup_interval
+        self._writes = 0
+        self._pid: Optional[int] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Caller holds self._lock
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(
+                self.path, timeout=10, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS state ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL)"
+            )
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def _transaction(self, fn):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(conn, time.time())
+                self._writes += 1
+                if self._writes % self.cleanup_interval == 0:
+                    conn.execute(
+                        "DELETE FROM state WHERE expires IS NOT NULL AND expires <= ?",
+                        (time.time(),),
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return result
+
+    @staticmethod
+    def _get(conn: sqlite3.Connection, key: str, now: float) -> Optional[str]:
+        row = conn.execute(
+            "SELECT value FROM state WHERE key = ?"
+            " AND (expires IS NULL OR expires > ?)",
+            (key, now),
+        ).fetchone()
+        return None if row is None else row[0]
+
+    @staticmethod
+    def _put(
+        conn: sqlite3.Connection, key: str, value: str, expires: Optional[float]
+    ) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO state (key, value, expires) VALUES (?, ?, ?)",
+            (key, value, expires),
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._get(self._connection(), key, time.time())
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        def fn(conn, now):
+            self._put(conn, key, value, None if ttl is None else now + ttl)
+
+        self._transaction(fn)
+
+    def add_if_absent(self, key: str, ttl: Optional[float] = None) -> bool:
+        def fn(conn, now):
+            if self._get(conn, key, now) is not None:
+                return False
+            self._put(conn, key, "1", None if ttl is None else now + ttl)
+            return True
+
+        return self._transaction(fn)
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        def fn(conn, now):
+            row = conn.execute(
+                "SELECT value, expires FROM state WHERE key = ?"
+                " AND (expires IS NULL OR expires > ?)",
+                (key, now),
+            ).fetchone()
+            if row is None:
+                value, expires = amount, None if ttl is None else now + ttl
+            else:
+                value, expires = int(row[0]) + amount, row[1]
+            self._put(conn, key, str(value), expires)
+            return value
+
+        return self._transaction(fn)
+
+    def take_token(self, bucket: str, rate: float, capacity: float) -> bool:
+        def fn(conn, now):
+            tokens, taken = _refill(self._get(conn, bucket, now), rate, capacity, now)
+            self._put(conn, bucket, f"{tokens}:{now}", None)
+            return taken
+
+        return self._transaction(fn)
+
+    def acquire_lease(self, key: str, owner: str, ttl: float) -> bool:
+        def fn(conn, now):
+            holder = self._get(conn, key, now)
+            if holder is not None and holder != owner:
+                return False
+            self._put(conn, key, owner, now + ttl)
+            return True
+
+        return self._transaction(fn)
+
+
+def create_state_backend(url: str) -> StateBackend:
+    """
+    Create a state backend from a URL.
+
+    Args:
+        url: 'memory' or 'sqlite:///path/to/state.db'
+
+    Raises:
+        ValueError: If the URL scheme is not supported
+    """
+    if url == "memory":
+        return MemoryStateBackend()
+    if url.startswith("sqlite:///"):
+        return SQLiteStateBackend(url[len("sqlite://") :])
+    raise ValueError(f"Unsupported state backend: {url}")
@@ -16,6 +16,8 @@ os.environ["SLACK_SIGNING_SECRET"] = "test-secret"
 os.environ["DEEPL_TOKEN"] = "test-deepl-token"
 os.environ["MULTI_CHANNEL"] = "general"
 os.environ["DEBUG_MODE"] = "False"
+# No background probes of the real DeepL and Slack APIs
+os.environ["HEALTH_PROBE_INTERVAL"] = "0"
 
 
 def pytest_configure(config):
@@ -36,16 +38,15 @@ def pytest_configure(config):
     # Return at least one channel so the loop in main.py runs and 'i' is defined
     conversations_patcher = patch("slack_sdk.web.client.WebClient.conversations_list")
     mock_conversations = conversations_patcher.start()
-    mock_conversations.return_value = iter(
-        [
-            {
-                "channels": [
-                    {"id": "C12345", "name": "general"},
-                    {"id": "C67890", "name": "general-en"},
-                ]
-            }
-        ]
-    )
+    # A list, so that reloaded channel directories get the same pages
+    mock_conversations.return_value = [
+        {
+            "channels": [
+                {"id": "C12345", "name": "general"},
+                {"id": "C67890", "name": "general-en"},
+            ]
+        }
+    ]
 
     # Store patchers for cleanup
     config._slack_patchers = [auth_patcher, conversations_patcher]
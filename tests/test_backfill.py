@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Unit tests for backfill module
+"""
+
+import os
+import sys
+from unittest.mock import Mock
+
+import pytest
+
+# Add parent directory to path to import backfill
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backfill import BackfillCheckpoint, batches, estimate, run_backfill
+from deepl_standin import DeeplStandin
+from translation_backend import BackendRouter, DeeplBackend
+
+HISTORY = [
+    {
+        "messages": [
+            {"ts": "3.0", "user": "U1", "text": "third"},
+            {"ts": "2.5", "bot_id": "B1", "text": "cat said:\nbot post"},
+            {"ts": "2.0", "user": "U1", "text": "second"},
+        ],
+        "response_metadata": {"next_cursor": "page2"},
+    },
+    {
+        "messages": [
+            {"ts": "1.5", "subtype": "channel_join", "user": "U2", "text": "joined"},
+            {"ts": "1.0", "user": "U2", "text": "first"},
+        ],
+        "response_metadata": {"next_cursor": ""},
+    },
+]
+
+
+def slack_client(history=HISTORY):
+    """A mock WebClient with one source channel and one target channel."""
+    client = Mock()
+    client.conversations_list.return_value = iter(
+        [
+            {
+                "channels": [
+                    {"id": "C1", "name": "general"},
+                    {"id": "C2", "name": "general-de"},
+                ]
+            }
+        ]
+    )
+    client.conversations_history.side_effect = list(history)
+    client.users_info.side_effect = lambda user: Mock(data={"user": {"name": user}})
+    return client
+
+
+@pytest.fixture
+def router():
+    """A router over a local DeepL stand-in."""
+    standin = DeeplStandin().start()
+    yield BackendRouter([DeeplBackend("key", standin.base_url)])
+    standin.stop()
+
+
+class TestBatches:
+    """Test cases for translation batching"""
+
+    def test_split_by_count_and_size(self):
+        """Test that batches respect both the text count and character limits"""
+        messages = [{"text": "a" * 10} for _ in range(5)]
+
+        assert [len(b) for b in batches(messages, batch_size=2)] == [2, 2, 1]
+        assert [len(b) for b in batches(messages, max_characters=25)] == [2, 2, 1]
+
+
+class TestRunBackfill:
+    """Test cases for the backfill run"""
+
+    def test_dry_run_estimates(self):
+        """Test that a dry run estimates characters without posting"""
+        client = slack_client()
+
+        result = run_backfill(
+            client,
+            None,
+            ["general"],
+            "general-de",
+            "DE",
+            BackfillCheckpoint(),
+            dry_run=True,
+        )
+
+        assert result == {"messages": 3, "characters": 16, "requests": 1}
+        assert not client.chat_postMessage.called
+
+    def test_posts_oldest_first(self, router, tmp_path):
+        """Test that history is posted in chronological order"""
+        client = slack_client()
+        checkpoint = BackfillCheckpoint(str(tmp_path / "cp.json"))
+
+        result = run_backfill(
+            client, router, ["general"], "general-de", "DE", checkpoint, post_interval=0
+        )
+
+        assert result == {"posted": 3, "total": 3}
+        texts = [c[1]["text"] for c in client.chat_postMessage.call_args_list]
+        assert texts == [
+            "U2 said:\n[DE] first",
+            "U1 said:\n[DE] second",
+            "U1 said:\n[DE] third",
+        ]
+        assert {c[1]["channel"] for c in client.chat_postMessage.call_args_list} == {
+            "C2"
+        }
+
+    def test_resume_after_interruption(self, router, tmp_path):
+        """Test that a resumed backfill continues from the checkpoint"""
+        path = str(tmp_path / "cp.json")
+        client = slack_client()
+        client.chat_postMessage.side_effect = [None, RuntimeError("interrupted")]
+
+        with pytest.raises(RuntimeError):
+            run_backfill(
+                client,
+                router,
+                ["general"],
+                "general-de",
+                "DE",
+                BackfillCheckpoint(path),
+                post_interval=0,
+            )
+
+        # The scan is complete, so history is not read again
+        client = slack_client(history=[])
+        result = run_backfill(
+            client,
+            router,
+            ["general"],
+            "general-de",
+            "DE",
+            BackfillCheckpoint(path),
+            post_interval=0,
+        )
+
+        assert result == {"posted": 2, "total": 3}
+        assert not client.conversations_history.called
+        assert client.chat_postMessage.call_args_list[0][1]["text"].endswith("second")
+
+    def test_scan_resumes_from_cursor(self, tmp_path):
+        """Test that an interrupted scan restarts from the saved cursor"""
+        path = str(tmp_path / "cp.json")
+        client = slack_client(history=[HISTORY[0], RuntimeError("interrupted")])
+
+        with pytest.raises(RuntimeError):
+            run_backfill(
+                client, None, ["general"], "general-de", "DE", BackfillCheckpoint(path)
+            )
+
+        assert BackfillCheckpoint(path).cursors == {"C1": "page2"}
+        client = slack_client(history=[HISTORY[1]])
+        checkpoint = BackfillCheckpoint(path)
+        run_backfill(
+            client, None, ["general"], "general-de", "DE", checkpoint, dry_run=True
+        )
+
+        assert client.conversations_history.call_args[1]["cursor"] == "page2"
+        assert [m["text"] for m in checkpoint.messages()] == [
+            "first",
+            "second",
+            "third",
+        ]
+
+    def test_respooled_page_posted_once(self, router, tmp_path):
+        """Test that a page spooled again after a crash is not posted twice"""
+        checkpoint = BackfillCheckpoint(str(tmp_path / "cp.json"))
+        scan = slack_client(history=[HISTORY[0], RuntimeError("crash")])
+        with pytest.raises(RuntimeError):
+            run_backfill(
+                scan, router, ["general"], "general-de", "DE", checkpoint, dry_run=True
+            )
+        # The crash hit after spooling page1 but before saving its cursor
+        checkpoint.cursors.clear()
+
+        client = slack_client()
+        result = run_backfill(
+            client, router, ["general"], "general-de", "DE", checkpoint, post_interval=0
+        )
+
+        assert result == {"posted": 3, "total": 3}
+        texts = [c[1]["text"] for c in client.chat_postMessage.call_args_list]
+        assert len(texts) == len(set(texts)) == 3
+
+    def test_resume_checkpoints_last_posted_ts(self, router, tmp_path):
+        """Test that messages spooled after a post do not shift the resume point"""
+        path = str(tmp_path / "cp.json")
+        checkpoint = BackfillCheckpoint(path)
+        checkpoint.add_messages(
+            [
+                {"ts": "1.0", "channel": "C1", "user": "U1", "text": "first"},
+                {"ts": "3.0", "channel": "C1", "user": "U1", "text": "third"},
+            ]
+        )
+        checkpoint.mark_posted(checkpoint.messages()[0])
+        # A second source adds an older message before the resume
+        checkpoint.add_messages(
+            [{"ts": "0.5", "channel": "C3", "user": "U3", "text": "zeroth"}]
+        )
+
+        assert BackfillCheckpoint(path).last_posted == ["1.0", "C1"]
+        assert [m["text"] for m in BackfillCheckpoint(path).pending()] == ["third"]
+
+
+class TestEstimate:
+    """Test cases for the billed-character estimate"""
+
+    def test_markup_counted(self):
+        """Test that markup placeholders sent to DeepL are counted"""
+        assert estimate([{"text": "*hi*"}])["characters"] == len("<bd></bd>hi<bd></bd>")
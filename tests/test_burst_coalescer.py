@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Unit tests for burst_coalescer module
+"""
+
+import os
+import sys
+import time
+from unittest.mock import Mock
+
+# Add parent directory to path to import burst_coalescer
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from burst_coalescer import BurstCoalescer, coalescable
+
+
+def message(text, user="U1", channel="C1", ts="1.0", **fields):
+    return {"channel": channel, "user": user, "text": text, "ts": ts, **fields}
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestCoalescable:
+    """Test cases for coalescable"""
+
+    def test_plain_message(self):
+        """Test that top-level text messages can be merged"""
+        assert coalescable(message("hi"))
+
+    def test_other_messages(self):
+        """Test that replies, files, subtypes and empty texts are not merged"""
+        assert not coalescable(message("hi", thread_ts="0.5"))
+        assert not coalescable(message("hi", files=[{"name": "a.txt"}]))
+        assert not coalescable(message("hi", subtype="file_share"))
+        assert not coalescable(message(""))
+
+
+class TestBurstCoalescer:
+    """Test cases for BurstCoalescer"""
+
+    def setup_method(self):
+        self.flushed = []
+        self.coalescer = None
+
+    def teardown_method(self):
+        if self.coalescer is not None:
+            self.coalescer.stop(1)
+
+    def start(self, **kwargs):
+        self.coalescer = BurstCoalescer(
+            lambda merged, context: self.flushed.append((merged, context)), **kwargs
+        )
+        self.coalescer.start()
+        return self.coalescer
+
+    def test_burst_merged_after_window(self):
+        """Test that quick messages are flushed as one after the window"""
+        coalescer = self.start(window=0.2)
+
+        assert coalescer.add(message("one", ts="1.0"), "ctx")
+        assert coalescer.add(message("two", ts="2.0"), "other")
+        assert not self.flushed
+
+        assert wait_for(lambda: self.flushed)
+        merged, context = self.flushed[0]
+        assert merged["text"] == "one\ntwo"
+        assert merged["ts"] == "1.0"
+        assert context == "ctx"
+
+    def test_other_user_flushes(self):
+        """Test that a message of another user flushes the open burst"""
+        coalescer = self.start(window=10)
+
+        coalescer.add(message("one"))
+        coalescer.add(message("two", user="U2"))
+
+        assert [m["text"] for m, _ in self.flushed] == ["one"]
+        assert coalescer.stats()["open"] == 1
+
+    def test_thread_reply_flushes(self):
+        """Test that a thread reply flushes and is left to the caller"""
+        coalescer = self.start(window=10)
+        coalescer.add(message("one"))
+
+        assert not coalescer.add(message("reply", thread_ts="0.5"))
+
+        assert [m["text"] for m, _ in self.flushed] == ["one"]
+        assert coalescer.stats()["open"] == 0
+
+    def test_channels_are_independent(self):
+        """Test that bursts of other channels are left open"""
+        coalescer = self.start(window=10)
+
+        coalescer.add(message("one"))
+        coalescer.add(message("two", user="U2", channel="C2"))
+
+        assert not self.flushed
+        assert coalescer.stats()["open"] == 2
+
+    def test_max_latency(self):
+        """Test that a burst is flushed at max_latency while messages arrive"""
+        coalescer = self.start(window=0.2, max_latency=0.3)
+        started = time.monotonic()
+
+        while not self.flushed and time.monotonic() - started < 2:
+            coalescer.add(message("more"))
+            time.sleep(0.05)
+
+        assert self.flushed
+        assert time.monotonic() - started < 1
+
+    def test_max_messages(self):
+        """Test that a full burst is flushed and a new one started"""
+        coalescer = self.start(window=10, max_messages=2)
+
+        for text in ("one", "two", "three"):
+            coalescer.add(message(text))
+
+        assert [m["text"] for m, _ in self.flushed] == ["one\ntwo"]
+
+    def test_stop_flushes(self):
+        """Test that open bursts are flushed on stop and later messages refused"""
+        coalescer = self.start(window=10)
+        coalescer.add(message("one"))
+        coalescer.add(message("two", channel="C2"))
+
+        assert coalescer.stop(1) == 2
+        assert len(self.flushed) == 2
+        assert not coalescer.add(message("three"))
+
+    def test_flush_error_logged(self):
+        """Test that a failing flush does not break the coalescer"""
+        coalescer = BurstCoalescer(
+            Mock(side_effect=RuntimeError("scheduler stopped")), window=10
+        )
+        coalescer.start()
+        coalescer.add(message("one"))
+
+        assert coalescer.stop(1) == 1
+
+    def test_stats(self):
+        """Test that messages and bursts are counted"""
+        coalescer = self.start(window=10)
+        for text in ("one", "two", "three"):
+            coalescer.add(message(text))
+        coalescer.add(message("four", user="U2"))
+
+        assert coalescer.stats() == {
+            "messages": 4,
+            "bursts": 1,
+            "open": 1,
+            "messages_per_burst": 4.0,
+        }
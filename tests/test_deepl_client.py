@@ -18,6 +18,7 @@ from unittest.mock import Mock, patch
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 import deepl_client
+from rate_limiter import AdaptiveLimiter
 
 
 class TestTranslateText:
@@ -60,6 +61,20 @@ class TestTranslateText:
         call_args = mock_post.call_args
         assert call_args[1]["timeout"] == 30
 
+    @patch("requests.Session.post")
+    def test_translate_text_formality(self, mock_post):
+        """Test that formality is only sent when requested"""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"translations": [{"text": "Hallo"}]}
+        mock_post.return_value = mock_response
+
+        deepl_client.translate_text("test-key", "Hello", "DE")
+        assert "formality" not in mock_post.call_args[1]["data"]
+
+        deepl_client.translate_text("test-key", "Hello", "DE", formality="less")
+        assert mock_post.call_args[1]["data"]["formality"] == "less"
+
     @patch("requests.Session.post")
     def test_translate_text_http_error(self, mock_post):
         """Test translation with HTTP error response"""
@@ -139,6 +154,157 @@ class TestTranslateText:
         assert result == "Translated <tag>text</tag>"
 
 
+class TestTranslateTexts:
+    """Test cases for translate_texts function"""
+
+    @patch("requests.Session.post")
+    def test_batch(self, mock_post):
+        """Test that texts are sent as repeated fields of one request"""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            "translations": [{"text": "Bonjour"}, {"text": "Salut"}]
+        }
+        mock_post.return_value = mock_response
+
+        result = deepl_client.translate_texts("test-key", ["Hello", "Hi"], "FR")
+
+        assert result == ["Bonjour", "Salut"]
+        assert mock_post.call_count == 1
+        assert mock_post.call_args[1]["data"]["text"] == ["Hello", "Hi"]
+
+    @patch("requests.Session.post")
+    def test_count_mismatch(self, mock_post):
+        """Test that a response missing translations is rejected"""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"translations": [{"text": "Bonjour"}]}
+        mock_post.return_value = mock_response
+
+        with pytest.raises(deepl_client.DeeplClientError):
+            deepl_client.translate_texts("test-key", ["Hello", "Hi"], "FR")
+
+    def test_too_many_texts(self):
+        """Test that batches over the DeepL limit are rejected"""
+        texts = ["a"] * (deepl_client.MAX_TEXTS_PER_REQUEST + 1)
+
+        with pytest.raises(ValueError):
+            deepl_client.translate_texts("test-key", texts, "FR")
+
+
+class TestRateLimiting:
+    """Test cases for 429/456 handling through the shared limiter"""
+
+    @pytest.fixture(autouse=True)
+    def limiter(self):
+        """Use a fresh limiter for every test"""
+        with patch("deepl_client.limiter", AdaptiveLimiter()) as limiter:
+            yield limiter
+
+    @patch("requests.Session.post")
+    def test_retry_after_is_honoured(self, mock_post, limiter):
+        """Test that a 429 pauses the limiter and the request is retried"""
+        throttled = Mock()
+        throttled.status_code = 429
+        throttled.headers = {"Retry-After": "0"}
+        success = Mock()
+        success.status_code = 200
+        success.json.return_value = {"translations": [{"text": "Bonjour"}]}
+        mock_post.side_effect = [throttled, success]
+
+        result = deepl_client.translate_text("test-key", "Hello", "FR")
+
+        assert result == "Bonjour"
+        assert mock_post.call_count == 2
+        assert limiter.stats()["throttled"] == 1
+
+    @patch("requests.Session.post")
+    def test_throttle_retries_exhausted(self, mock_post):
+        """Test that persistent 429 responses surface as an HTTP error"""
+        throttled = Mock()
+        throttled.status_code = 429
+        throttled.headers = {"Retry-After": "0"}
+        throttled.raise_for_status.side_effect = requests.exceptions.HTTPError(
+            response=throttled
+        )
+        mock_post.return_value = throttled
+
+        with pytest.raises(deepl_client.DeeplClientError) as exc_info:
+            deepl_client.translate_text("test-key", "Hello", "FR")
+
+        assert "429" in str(exc_info.value)
+        assert mock_post.call_count == deepl_client.MAX_THROTTLE_RETRIES + 1
+
+    @patch("requests.Session.post")
+    def test_quota_exceeded(self, mock_post):
+        """Test that 456 raises DeeplQuotaExceededError without retrying"""
+        mock_response = Mock()
+        mock_response.status_code = 456
+        mock_post.return_value = mock_response
+
+        with pytest.raises(deepl_client.DeeplQuotaExceededError):
+            deepl_client.translate_text("test-key", "Hello", "FR")
+
+        assert mock_post.call_count == 1
+
+    @patch("requests.Session.post")
+    def test_errors_do_not_raise_limit(self, mock_post, limiter):
+        """Test that only successful responses raise the AIMD limit"""
+        for status in (456, 503):
+            failed = Mock()
+            failed.status_code = status
+            failed.raise_for_status.side_effect = requests.exceptions.HTTPError(
+                response=failed
+            )
+            mock_post.return_value = failed
+            with pytest.raises(deepl_client.DeeplClientError):
+                deepl_client.translate_text("test-key", "Hello", "FR")
+
+        assert limiter.stats()["limit"] == 4.0
+
+    @patch("requests.Session.post")
+    def test_no_slot_available(self, mock_post, limiter):
+        """Test that a long Retry-After pause fails fast"""
+        limiter.record_throttle(60)
+
+        with pytest.raises(deepl_client.DeeplClientError):
+            deepl_client.translate_text("test-key", "Hello", "FR", timeout=1)
+
+        assert not mock_post.called
+
+
+class TestProbe:
+    """Test cases for probe function"""
+
+    @patch("requests.Session.post")
+    def test_probe_bypasses_limiter(self, mock_post):
+        """Test that the probe answers while the limiter is paused"""
+        mock_post.return_value = Mock(status_code=200)
+        limiter = AdaptiveLimiter()
+        limiter.record_throttle(60)
+
+        with patch("deepl_client.limiter", limiter):
+            assert deepl_client.probe("test-key", timeout=1) == 200
+
+    @patch("requests.Session.post")
+    def test_probe_throttled_or_quota_is_an_answer(self, mock_post):
+        """Test that 429 and 456 do not fail the probe"""
+        for status in (429, 456):
+            mock_post.return_value = Mock(status_code=status)
+            assert deepl_client.probe("test-key") == status
+
+    @patch("requests.Session.post")
+    def test_probe_errors(self, mock_post):
+        """Test that other errors and network failures fail the probe"""
+        mock_post.return_value = Mock(status_code=403)
+        with pytest.raises(deepl_client.DeeplClientError):
+            deepl_client.probe("test-key")
+
+        mock_post.side_effect = requests.exceptions.ConnectionError("down")
+        with pytest.raises(deepl_client.DeeplClientError):
+            deepl_client.probe("test-key")
+
+
 class TestGetUsage:
     """Test cases for get_usage function"""
 
@@ -259,6 +425,12 @@ class TestDeeplClientError:
         with pytest.raises(deepl_client.DeeplClientError):
             raise deepl_client.DeeplClientError("Test error")
 
+    def test_quota_exceeded_is_client_error(self):
+        """Test that quota errors are caught by DeeplClientError handlers"""
+        assert issubclass(
+            deepl_client.DeeplQuotaExceededError, deepl_client.DeeplClientError
+        )
+
     def test_exception_message(self):
         """Test that exception message is preserved"""
         error_msg = "Custom error message"
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Unit tests for document_translation module, run against the DeepL stand-in
+"""
+
+import io
+import os
+import sys
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+# Add parent directory to path to import document_translation
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import deepl_client
+from deepl_client import DeeplClientError
+from deepl_standin import DeeplStandin
+from document_translation import (
+    DocumentTranslator,
+    document_filename,
+    upload_to_slack,
+)
+
+
+@pytest.fixture
+def standin():
+    server = DeeplStandin(document_polls=1).start()
+    yield server
+    server.stop()
+
+
+def chunked(content, size=4):
+    """Yield content in small chunks, like a streamed download"""
+    for i in range(0, len(content), size):
+        yield content[i : i + size]
+
+
+class TestDocumentFilename:
+    """Test cases for document_filename"""
+
+    def test_supported_extension(self):
+        """Test that DeepL document formats are kept"""
+        assert document_filename({"name": "Report.DOCX"}) == "Report.DOCX"
+
+    def test_unsupported_extension(self):
+        """Test that images and other files are skipped"""
+        assert document_filename({"name": "cat.png"}) is None
+
+    def test_text_snippet(self):
+        """Test that plain-text snippets are uploaded as text files"""
+        file = {"name": "Untitled", "mode": "snippet", "filetype": "text"}
+        assert document_filename(file) == "Untitled.txt"
+
+
+class TestDocumentClient:
+    """Test cases for the deepl_client document functions"""
+
+    def test_round_trip(self, standin):
+        """Test that a streamed upload is translated and downloaded"""
+        content = b"Hello, world"
+        document_id, document_key = deepl_client.upload_document(
+            "key",
+            chunked(content),
+            len(content),
+            "a.txt",
+            "FR",
+            base_url=standin.base_url,
+        )
+
+        status = deepl_client.document_status(
+            "key", document_id, document_key, base_url=standin.base_url
+        )
+        assert status["status"] == "translating"
+        status = deepl_client.document_status(
+            "key", document_id, document_key, base_url=standin.base_url
+        )
+        assert status == {
+            "document_id": document_id,
+            "status": "done",
+            "billed_characters": len(content),
+        }
+
+        result = b"".join(
+            deepl_client.download_document(
+                "key", document_id, document_key, base_url=standin.base_url
+            )
+        )
+        assert result == b"[FR] Hello, world"
+
+    def test_size_mismatch(self, standin):
+        """Test that a stream longer than announced is not sent"""
+        with pytest.raises(DeeplClientError):
+            deepl_client.upload_document(
+                "key", chunked(b"too long"), 3, "a.txt", "FR", base_url=standin.base_url
+            )
+
+    def test_unknown_document(self, standin):
+        """Test that a wrong document key is rejected"""
+        with pytest.raises(DeeplClientError):
+            deepl_client.document_status(
+                "key", "missing", "key", base_url=standin.base_url
+            )
+
+
+class TestDocumentTranslator:
+    """Test cases for DocumentTranslator"""
+
+    def _translator(self, standin, **kwargs):
+        translator = DocumentTranslator(
+            "key", standin.base_url, poll_interval=0.01, **kwargs
+        )
+        translator.start()
+        return translator
+
+    @patch("document_translation.upload_to_slack")
+    @patch("document_translation.slack_file_chunks")
+    def test_translated_file_posted_to_every_channel(
+        self, mock_chunks, mock_upload, standin
+    ):
+        """Test that one translation is streamed to each target channel"""
+        content = b"Nyaa nyaa"
+        mock_chunks.return_value = chunked(content)
+        uploaded = []
+        done = threading.Event()
+
+        def upload(client, channel_id, filename, source, size, comment):
+            uploaded.append((channel_id, filename, source.read(), size))
+            if len(uploaded) == 2:
+                done.set()
+
+        mock_upload.side_effect = upload
+        billed = Mock()
+        translator = self._translator(standin, on_billed=billed)
+        file = {
+            "name": "notes.txt",
+            "size": len(content),
+            "url_private_download": "https://files.slack.com/notes.txt",
+        }
+
+        assert translator.submit(
+            Mock(token="xoxb"), file, "EN", ["C1", "C2"], "cat shared a file:", "C0"
+        )
+
+        assert done.wait(5)
+        assert uploaded == [
+            ("C1", "notes.txt", b"[EN] Nyaa nyaa", 14),
+            ("C2", "notes.txt", b"[EN] Nyaa nyaa", 14),
+        ]
+        billed.assert_called_once_with(len(content), "EN", "C0", "", "")
+        deadline = time.monotonic() + 5
+        while translator.stats()["pending"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert translator.stats()["translated"] == 1
+        translator.stop()
+
+    def test_large_file_rejected(self, standin):
+        """Test that files above the size limit are not uploaded"""
+        translator = self._translator(standin, max_bytes=10)
+        file = {"name": "big.pdf", "size": 11, "url_private_download": "https://x"}
+
+        assert not translator.submit(Mock(), file, "EN", ["C1"], "")
+        assert translator.stats()["rejected"] == 1
+        translator.stop()
+
+    def test_file_without_size_rejected(self, standin):
+        """Test that a file of unknown size is not streamed"""
+        translator = self._translator(standin)
+        file = {"name": "notes.txt", "url_private_download": "https://x"}
+
+        assert not translator.submit(Mock(), file, "EN", ["C1"], "")
+        translator.stop()
+
+    @patch("document_translation.slack_file_chunks")
+    def test_unexpected_error_releases_slot(self, mock_chunks, standin):
+        """Test that an unexpected worker error still finishes the document"""
+        mock_chunks.side_effect = ValueError("bad url")
+        translator = self._translator(standin, max_pending=1)
+        file = {"name": "a.txt", "size": 1, "url_private_download": "https://x"}
+
+        assert translator.submit(Mock(token="t"), file, "EN", ["C1"], "")
+        deadline = time.monotonic() + 5
+        while translator.stats()["pending"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert translator.stats()["failed"] == 1
+        assert translator.submit(Mock(token="t"), file, "FR", ["C2"], "")
+        translator.stop()
+
+    @patch("document_translation.slack_file_chunks")
+    def test_pending_documents_bounded(self, mock_chunks, standin):
+        """Test that documents beyond max_pending are rejected"""
+        release = threading.Event()
+
+        def slow_download(token, url):
+            release.wait(5)
+            yield b"x"
+
+        mock_chunks.side_effect = slow_download
+        translator = self._translator(standin, max_pending=1)
+        file = {"name": "a.txt", "size": 1, "url_private_download": "https://x"}
+
+        assert translator.submit(Mock(token="t"), file, "EN", ["C1"], "")
+        assert not translator.submit(Mock(token="t"), file, "FR", ["C2"], "")
+        release.set()
+        translator.stop()
+
+    @patch("document_translation.slack_file_chunks")
+    def test_stop_cancels_queued_documents(self, mock_chunks, standin):
+        """Test that stop cancels uploads that have not started"""
+        release = threading.Event()
+
+        def slow_download(token, url):
+            release.wait(5)
+            yield b"x"
+
+        mock_chunks.side_effect = slow_download
+        translator = self._translator(standin, workers=1)
+        file = {"name": "a.txt", "size": 1, "url_private_download": "https://x"}
+        for lang in ("EN", "FR", "DE"):
+            assert translator.submit(Mock(token="t"), file, lang, ["C1"], "")
+
+        assert translator.stop(1) == {"abandoned": 3}
+        release.set()
+        translator._pool.shutdown(wait=True)
+        # Only the upload already running went ahead
+        assert mock_chunks.call_count == 1
+
+
+class TestUploadToSlack:
+    """Test cases for upload_to_slack"""
+
+    @patch("document_translation.requests.post")
+    def test_external_upload_flow(self, mock_post):
+        """Test that the file is streamed to the upload URL and shared"""
+        client = Mock()
+        client.files_getUploadURLExternal.return_value = {
+            "upload_url": "https://files.slack.com/upload/v1/abc",
+            "file_id": "F1",
+        }
+
+        upload_to_slack(client, "C1", "a.txt", io.BytesIO(b"data"), 4, "hi")
+
+        client.files_getUploadURLExternal.assert_called_once_with(
+            filename="a.txt", length=4
+        )
+        body = mock_post.call_args[1]["data"]
+        assert len(body) == 4
+        assert b"".join(body) == b"data"
+        client.files_completeUploadExternal.assert_called_once_with(
+            files=[{"id": "F1", "title": "a.txt"}],
+            channel_id="C1",
+            initial_comment="hi",
+        )
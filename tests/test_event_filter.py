@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Unit tests for event_filter module
+"""
+
+import os
+import sys
+
+# Add parent directory to path to import event_filter
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from event_filter import NO_ROUTE, SELF, SUBTYPE, EventFilter
+from routing import Routing
+from triggers import DEFAULT_TRIGGERS, TriggerTable
+from workspace import ChannelDirectory
+
+
+def routing(groups=("general",)):
+    return Routing(list(groups), {"-en": "EN"}, "JA", TriggerTable(DEFAULT_TRIGGERS))
+
+
+def directory():
+    channels = ChannelDirectory()
+    channels.name_dict = {"general": "C1", "general-en": "C2", "random": "C3"}
+    channels.id_dict = {v: k for k, v in channels.name_dict.items()}
+    return channels
+
+
+def message(channel="C3", text="hello", **fields):
+    return {"type": "message", "channel": channel, "text": text, **fields}
+
+
+class TestEventFilter:
+    """Test cases for EventFilter"""
+
+    def setup_method(self):
+        self.routing = routing()
+        self.channels = directory()
+        self.filter = EventFilter(
+            lambda: self.routing,
+            lambda team_id: self.channels if team_id == "T1" else None,
+            ["Meousage"],
+        )
+
+    def test_group_channel_passes(self):
+        """Test that messages in multichannel groups pass"""
+        assert self.filter.check(message("C1"), "T1") is None
+        assert self.filter.check(message("C2", subtype="file_share"), "T1") is None
+
+    def test_unrouted_channel_dropped(self):
+        """Test that messages outside every group are dropped"""
+        assert self.filter.check(message("C3"), "T1") == NO_ROUTE
+
+    def test_keyword_passes(self):
+        """Test that trigger keywords and commands pass anywhere"""
+        assert self.filter.check(message(text="Nyan!"), "T1") is None
+        assert self.filter.check(message(text="show Meousage top"), "T1") is None
+        assert self.filter.check(message(text="Nyanko"), "T1") == NO_ROUTE
+
+    def test_other_subtypes_dropped(self):
+        """Test that edits, deletions and joins are dropped"""
+        edit = message("C1", None, subtype="message_changed")
+
+        assert self.filter.check(edit, "T1") == SUBTYPE
+        assert self.filter.check(message("C1", subtype="channel_join"), "T1") == SUBTYPE
+
+    def test_own_events_dropped(self):
+        """Test that the bot's posts are dropped, even with keywords"""
+        post = message("C1", "Nyan", bot_id="B1")
+
+        assert self.filter.check(post, "T1", bot_id="B1") == SELF
+        assert self.filter.check(message("C1", user="U0"), "T1", None, "U0") == SELF
+        assert self.filter.check(post, "T1", bot_id="B2") is None
+
+    def test_non_message_events_pass(self):
+        """Test that other event types are left to the listeners"""
+        assert self.filter.check({"type": "app_uninstalled"}, "T1") is None
+
+    def test_unknown_workspace_passes(self):
+        """Test that events of unknown workspaces are not dropped"""
+        assert self.filter.check(message("C3"), "T9") is None
+
+    def test_routing_change_rebuilds_sets(self):
+        """Test that a new routing takes effect"""
+        assert self.filter.check(message("C3"), "T1") == NO_ROUTE
+
+        self.routing = routing(["general", "random"])
+
+        assert self.filter.check(message("C3"), "T1") is None
+
+    def test_directory_reload_rebuilds_sets(self):
+        """Test that channels created later are picked up on reload"""
+        self.channels.name_dict = {**self.channels.name_dict, "general-fr": "C4"}
+
+        assert self.filter.check(message("C4"), "T1") is None
+
+    def test_stats(self):
+        """Test that rejects are counted by reason"""
+        self.filter.check(message("C1"), "T1")
+        self.filter.check(message("C3"), "T1")
+        self.filter.check(message("C3"), "T1")
+        self.filter.check(message("C1", bot_id="B1"), "T1", bot_id="B1")
+
+        assert self.filter.stats() == {
+            "passed": 1,
+            "rejected": {NO_ROUTE: 2, SELF: 1},
+        }
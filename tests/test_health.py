@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Unit tests for health module
+"""
+
+import os
+import sys
+import time
+
+# Add parent directory to path to import health
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from health import HealthMonitor, LatencyProbe
+
+
+def failing():
+    raise ConnectionError("down")
+
+
+class TestLatencyProbe:
+    """Test cases for LatencyProbe"""
+
+    def test_not_run(self):
+        """Test that a probe reports no outcome before its first run"""
+        assert LatencyProbe("deepl", lambda: None).snapshot()["ok"] is None
+
+    def test_success_and_failure(self):
+        """Test that the outcome, error and latency of a run are cached"""
+        ok = LatencyProbe("deepl", lambda: time.sleep(0.01))
+        broken = LatencyProbe("slack", failing)
+
+        assert ok.run()
+        assert not broken.run()
+
+        assert ok.snapshot()["latency"] >= 0.01
+        assert broken.snapshot()["error"] == "ConnectionError"
+
+
+class TestHealthMonitor:
+    """Test cases for HealthMonitor"""
+
+    def test_healthy(self):
+        """Test that unprobed and passing probes are healthy"""
+        monitor = HealthMonitor([LatencyProbe("a", lambda: None)])
+        assert monitor.healthy(max_latency=1, max_age=60)
+
+        monitor.run_once()
+        assert monitor.healthy(max_latency=1, max_age=60)
+
+    def test_unhealthy(self):
+        """Test that failed, slow and stale probes are unhealthy"""
+        broken = HealthMonitor([LatencyProbe("a", failing)])
+        broken.run_once()
+        slow = HealthMonitor([LatencyProbe("a", lambda: time.sleep(0.02))])
+        slow.run_once()
+
+        assert not broken.healthy(max_latency=1, max_age=60)
+        assert not slow.healthy(max_latency=0.01, max_age=60)
+        assert not slow.healthy(max_latency=1, max_age=0)
+
+    def test_background_thread(self):
+        """Test that the monitor probes in the background until stopped"""
+        calls = []
+        monitor = HealthMonitor([LatencyProbe("a", lambda: calls.append(1))], 0.01)
+        monitor.start()
+        time.sleep(0.05)
+        monitor.stop(timeout=1)
+
+        assert len(calls) >= 2
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Unit tests for outbox module
+"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# Add parent directory to path to import outbox
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from deepl_client import DeeplClientError
+from outbox import (
+    DeferredDeliveryError,
+    Outbox,
+    OutboxReplayer,
+    PermanentDeliveryError,
+    make_job_key,
+)
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    """Create an outbox backed by a temporary database"""
+    box = Outbox(str(tmp_path / "outbox.db"), max_jobs=3)
+    yield box
+    box.close()
+
+
+def enqueue(box, ts, target="C2", text="hello"):
+    return box.enqueue(make_job_key("C1", ts, target), "C1", target, "EN", "cat", text)
+
+
+class TestOutbox:
+    """Test cases for Outbox"""
+
+    def test_enqueue_and_depth(self, outbox):
+        """Test that enqueued jobs are counted per channel"""
+        assert enqueue(outbox, "1.0")
+        assert enqueue(outbox, "1.0", target="C3")
+
+        assert outbox.depth() == 2
+        assert outbox.depth_by_channel() == {"C2": 1, "C3": 1}
+        assert outbox.has_pending("C2")
+        assert not outbox.has_pending("C4")
+
+    def test_duplicate_key_ignored(self, outbox):
+        """Test that the idempotency key rejects redelivered events"""
+        assert enqueue(outbox, "1.0")
+        assert not enqueue(outbox, "1.0")
+        assert outbox.depth() == 1
+
+    def test_bounded_size(self, outbox):
+        """Test that new jobs are rejected when the outbox is full"""
+        for ts in ("1.0", "2.0", "3.0"):
+            assert enqueue(outbox, ts)
+
+        assert not enqueue(outbox, "4.0")
+        assert outbox.depth() == 3
+
+    def test_delivered_key_not_requeued(self, outbox):
+        """Test that a delivered job cannot be enqueued again"""
+        enqueue(outbox, "1.0")
+        outbox.complete(outbox.heads()[0])
+
+        assert not enqueue(outbox, "1.0")
+        assert outbox.depth() == 0
+
+    def test_heads_are_oldest_per_channel(self, outbox):
+        """Test that only the oldest job of each channel is returned"""
+        enqueue(outbox, "1.0", text="first")
+        enqueue(outbox, "2.0", text="second")
+        enqueue(outbox, "1.0", target="C3", text="other")
+
+        heads = outbox.heads()
+
+        assert [(job.target_channel, job.text) for job in heads] == [
+            ("C2", "first"),
+            ("C3", "other"),
+        ]
+
+    def test_persistence(self, tmp_path):
+        """Test that jobs survive reopening the database"""
+        path = str(tmp_path / "outbox.db")
+        box = Outbox(path)
+        enqueue(box, "1.0")
+        box.close()
+
+        reopened = Outbox(path)
+        assert reopened.depth() == 1
+        reopened.close()
+
+
+class TestOutboxReplayer:
+    """Test cases for OutboxReplayer"""
+
+    def test_drain_preserves_order(self, outbox):
+        """Test that jobs are delivered in enqueue order per channel"""
+        enqueue(outbox, "1.0", text="first")
+        enqueue(outbox, "2.0", text="second")
+        delivered = []
+
+        replayer = OutboxReplayer(outbox, lambda job: delivered.append(job.text))
+
+        assert replayer.drain_once()
+        assert delivered == ["first", "second"]
+        assert outbox.depth() == 0
+
+    def test_failure_keeps_job_and_order(self, outbox):
+        """Test that a failing head blocks later jobs of the same channel"""
+        enqueue(outbox, "1.0", text="first")
+        enqueue(outbox, "2.0", text="second")
+        delivered = []
+
+        def deliver(job):
+            if job.text == "first":
+                raise DeeplClientError("unavailable")
+            delivered.append(job.text)
+
+        replayer = OutboxReplayer(outbox, deliver)
+
+        assert not replayer.drain_once()
+        assert delivered == []
+        assert outbox.depth() == 2
+        assert outbox.heads()[0].attempts == 1
+
+    def test_failing_head_dead_lettered(self, outbox):
+        """Test that a head failing max_attempts times unblocks its channel"""
+        enqueue(outbox, "1.0", text="first")
+        enqueue(outbox, "2.0", text="second")
+        delivered = []
+
+        def deliver(job):
+            if job.text == "first":
+                raise DeeplClientError("unavailable")
+            delivered.append(job.text)
+
+        replayer = OutboxReplayer(outbox, deliver, max_attempts=3)
+        for _ in range(3):
+            replayer.drain_once()
+
+        assert outbox.dead_depth() == 1
+        assert replayer.drain_once()
+        assert delivered == ["second"]
+        assert outbox.depth() == 0
+        assert not enqueue(outbox, "1.0")
+
+    def test_permanent_failure_dead_lettered(self, outbox):
+        """Test that a permanent failure is given up without retries"""
+        enqueue(outbox, "1.0", text="first")
+        enqueue(outbox, "2.0", text="second")
+        delivered = []
+
+        def deliver(job):
+            if job.text == "first":
+                raise PermanentDeliveryError("channel_not_found")
+            delivered.append(job.text)
+
+        replayer = OutboxReplayer(outbox, deliver)
+
+        assert replayer.drain_once()
+        assert delivered == ["second"]
+        assert outbox.dead_depth() == 1
+
+    def test_deferred_job_keeps_attempts(self, outbox):
+        """Test that a job deferred during shutdown is not counted as failed"""
+        enqueue(outbox, "1.0", text="first")
+
+        def deliver(job):
+            raise DeferredDeliveryError("scheduler stopped")
+
+        replayer = OutboxReplayer(outbox, deliver, max_attempts=1)
+
+        assert not replayer.drain_once()
+        assert not replayer.drain_once()
+        assert outbox.depth() == 1
+        assert outbox.dead_depth() == 0
+        assert outbox.heads()[0].attempts == 0
+
+
+class TestOutboxMigration:
+    """Test cases for outboxes created before multi-workspace support"""
+
+    def test_team_id_column_added(self, tmp_path):
+        """Test that an old outbox gains the team_id column"""
+        path = str(tmp_path / "outbox.db")
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "CREATE TABLE jobs (id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " key TEXT UNIQUE NOT NULL, source_channel TEXT NOT NULL,"
+            " target_channel TEXT NOT NULL, target_lang TEXT NOT NULL,"
+            " speaker TEXT NOT NULL, text TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0, created REAL NOT NULL)"
+        )
+        conn.execute(
+            "INSERT INTO jobs (key, source_channel, target_channel, target_lang,"
+            " speaker, text, created) VALUES ('k', 'C1', 'C2', 'EN', 'cat', 'hi', 0)"
+        )
+        conn.commit()
+        conn.close()
+
+        box = Outbox(path)
+        enqueue(box, "2.0", target="C3")
+
+        assert [job.team_id for job in box.heads()] == ["", ""]
+        box.close()
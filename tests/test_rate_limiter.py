@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Unit tests for rate_limiter module
+"""
+
+import email.utils
+import os
+import sys
+import time
+
+# Add parent directory to path to import rate_limiter
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rate_limiter import AdaptiveLimiter, parse_retry_after
+
+
+class TestParseRetryAfter:
+    """Test cases for parse_retry_after function"""
+
+    def test_seconds(self):
+        """Test delay-seconds values"""
+        assert parse_retry_after("3") == 3.0
+
+    def test_missing(self):
+        """Test that a missing header falls back to the default"""
+        assert parse_retry_after(None) == 1.0
+        assert parse_retry_after("", default=2.0) == 2.0
+
+    def test_invalid(self):
+        """Test that garbage falls back to the default"""
+        assert parse_retry_after("soon") == 1.0
+
+    def test_http_date(self):
+        """Test HTTP-date values"""
+        value = email.utils.formatdate(time.time() + 30, usegmt=True)
+        assert 25 < parse_retry_after(value) <= 30
+
+
+class TestAdaptiveLimiter:
+    """Test cases for AdaptiveLimiter"""
+
+    def test_caps_in_flight(self):
+        """Test that no more than limit slots can be held"""
+        limiter = AdaptiveLimiter(initial_limit=2, max_limit=2)
+
+        assert limiter.acquire(timeout=0.01)
+        assert limiter.acquire(timeout=0.01)
+        assert not limiter.acquire(timeout=0.01)
+
+        limiter.release()
+        assert limiter.acquire(timeout=0.01)
+
+    def test_throttle_halves_limit(self):
+        """Test multiplicative decrease on a throttled response"""
+        limiter = AdaptiveLimiter(initial_limit=8, max_limit=8)
+
+        limiter.record_throttle(0)
+
+        assert limiter.stats()["limit"] == 4
+        assert limiter.stats()["throttled"] == 1
+
+    def test_burst_of_throttles_halves_once(self):
+        """Test that the 429s of one burst decrease the limit only once"""
+        limiter = AdaptiveLimiter(initial_limit=8, max_limit=8)
+
+        for _ in range(4):
+            limiter.record_throttle(60)
+
+        assert limiter.stats()["limit"] == 4
+        assert limiter.stats()["throttled"] == 4
+
+    def test_success_increases_limit(self):
+        """Test additive increase up to max_limit"""
+        limiter = AdaptiveLimiter(initial_limit=1, max_limit=2)
+
+        limiter.record_success()
+        assert limiter.stats()["limit"] == 2
+        limiter.record_success()
+        assert limiter.stats()["limit"] == 2
+
+    def test_retry_after_pauses_everyone(self):
+        """Test that Retry-After blocks all callers, not just the throttled one"""
+        limiter = AdaptiveLimiter(initial_limit=4, max_limit=4)
+
+        limiter.record_throttle(0.2)
+
+        # The pause outlasts a short timeout, so the caller gives up at once
+        started = time.monotonic()
+        assert not limiter.acquire(timeout=0.05)
+        assert time.monotonic() - started < 0.05
+        # A long enough wait succeeds after the pause
+        assert limiter.acquire(timeout=1)
+        assert time.monotonic() - started >= 0.2
+
+    def test_slot_releases(self):
+        """Test that the slot context manager returns the slot"""
+        limiter = AdaptiveLimiter(initial_limit=1, max_limit=1)
+
+        with limiter.slot(timeout=0.01) as acquired:
+            assert acquired
+            assert limiter.stats()["in_flight"] == 1
+
+        assert limiter.stats()["in_flight"] == 0
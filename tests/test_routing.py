@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Unit tests for routing module
+"""
+
+import json
+import os
+import sys
+import time
+
+import pytest
+
+# Add parent directory to path to import routing
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from routing import Routing, RoutingReloader, load_routing, save_groups
+from triggers import DEFAULT_TRIGGERS, TriggerTable
+
+CHANNELS = {
+    "general": "C1",
+    "general-en": "C2",
+    "general-fr": "C3",
+    "random": "C4",
+    "random-en": "C5",
+}
+
+
+def default_routing(groups=("general",)):
+    return Routing(
+        list(groups), {"-en": "EN", "-fr": "FR"}, "JA", TriggerTable(DEFAULT_TRIGGERS)
+    )
+
+
+class TestRouting:
+    """Test cases for Routing"""
+
+    def test_targets_of_group(self):
+        """Test that the other channels of a group get their language"""
+        targets = default_routing().targets("general", CHANNELS)
+
+        assert targets == [("general-en", "C2", "EN"), ("general-fr", "C3", "FR")]
+
+    def test_base_channel_gets_base_lang(self):
+        """Test that channels without a known suffix get the base language"""
+        targets = default_routing().targets("general-en", CHANNELS)
+
+        assert ("general", "C1", "JA") in targets
+
+    def test_channel_outside_groups(self):
+        """Test that channels in no group have no targets"""
+        assert default_routing().targets("random", CHANNELS) == []
+
+    def test_custom_suffixes(self):
+        """Test that the suffix mapping is configurable"""
+        routing = Routing(
+            ["random"], {"-en": "EN-US"}, "DE", TriggerTable(DEFAULT_TRIGGERS)
+        )
+
+        assert routing.targets("random", CHANNELS) == [("random-en", "C5", "EN-US")]
+        assert routing.targets("random-en", CHANNELS) == [("random", "C4", "DE")]
+
+    def test_invalid_group(self):
+        """Test that an invalid basename is rejected"""
+        with pytest.raises(ValueError):
+            default_routing(groups=["("])
+
+
+class TestLoadRouting:
+    """Test cases for load_routing"""
+
+    def test_defaults(self):
+        """Test that the environment defaults are used without a file"""
+        routing = load_routing(None, ["general"])
+
+        assert routing.groups == ("general",)
+        assert routing.suffixes == {"-en": "EN", "-fr": "FR"}
+        assert routing.triggers.triggers == DEFAULT_TRIGGERS
+
+    def test_file(self, tmp_path):
+        """Test that a routing file overrides the defaults"""
+        path = tmp_path / "routing.json"
+        path.write_text(
+            json.dumps(
+                {
+                    "groups": ["random"],
+                    "suffixes": {"-de": "DE"},
+                    "triggers": [{"keyword": "Wau", "target_lang": "DE"}],
+                }
+            )
+        )
+
+        routing = load_routing(str(path), ["general"])
+
+        assert routing.groups == ("random",)
+        assert routing.suffixes == {"-de": "DE"}
+        assert routing.triggers.find("Wau!")[0].target_lang == "DE"
+        assert routing.source == str(path)
+
+    def test_invalid_file(self, tmp_path):
+        """Test that an invalid routing file is rejected"""
+        path = tmp_path / "routing.json"
+        path.write_text(json.dumps({"groups": "general"}))
+
+        with pytest.raises(ValueError):
+            load_routing(str(path), ["general"])
+
+    def test_save_groups_keeps_other_keys(self, tmp_path):
+        """Test that saving groups keeps the rest of the file"""
+        path = tmp_path / "routing.json"
+        path.write_text(json.dumps({"base_lang": "DE"}))
+
+        save_groups(str(path), ["random"])
+
+        assert json.loads(path.read_text()) == {"base_lang": "DE", "groups": ["random"]}
+
+
+class TestRoutingReloader:
+    """Test cases for RoutingReloader"""
+
+    def test_background_rebuild_swaps(self, tmp_path):
+        """Test that a requested rebuild replaces the routing"""
+        path = tmp_path / "routing.json"
+        path.write_text(json.dumps({"groups": ["general"]}))
+        reloader = RoutingReloader(lambda: load_routing(str(path), []), str(path), 0)
+        reloader.start()
+        before = reloader.current
+
+        path.write_text(json.dumps({"groups": ["random"]}))
+        routing = reloader.request().result(timeout=5)
+
+        assert reloader.current is routing
+        assert routing.groups == ("random",)
+        assert before.groups == ("general",)
+        reloader.stop()
+
+    def test_rebuild_notifies(self, tmp_path):
+        """Test that on_change is called with every swapped-in routing"""
+        path = tmp_path / "routing.json"
+        path.write_text(json.dumps({"groups": ["general"]}))
+        changes = []
+        reloader = RoutingReloader(
+            lambda: load_routing(str(path), []), str(path), 0, on_change=changes.append
+        )
+
+        routing = reloader.rebuild()
+
+        assert changes == [routing]
+
+    def test_failed_rebuild_keeps_routing(self, tmp_path):
+        """Test that an invalid configuration keeps the current routing"""
+        path = tmp_path / "routing.json"
+        path.write_text(json.dumps({"groups": ["general"]}))
+        reloader = RoutingReloader(lambda: load_routing(str(path), []), str(path), 0)
+        reloader.start()
+        before = reloader.current
+
+        path.write_text("{")
+        with pytest.raises(ValueError):
+            reloader.request().result(timeout=5)
+
+        assert reloader.current is before
+        reloader.stop()
+
+    def test_file_change_detected(self, tmp_path):
+        """Test that a changed file is reloaded without a request"""
+        path = tmp_path / "routing.json"
+        path.write_text(json.dumps({"groups": ["general"]}))
+        reloader = RoutingReloader(lambda: load_routing(str(path), []), str(path), 0.01)
+        reloader.start()
+
+        path.write_text(json.dumps({"groups": ["random", "general"]}))
+        os.utime(path, (0, 0))
+        for _ in range(500):
+            if reloader.current.groups == ("random", "general"):
+                break
+            time.sleep(0.01)
+
+        assert reloader.current.groups == ("random", "general")
+        reloader.stop()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Unit tests for scheduler module
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+# Add parent directory to path to import scheduler
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from scheduler import BACKFILL, FANOUT, ONDEMAND, TranslationScheduler
+
+
+@pytest.fixture
+def blocked_scheduler():
+    """
+    A single-worker scheduler whose worker is held by a blocking task, so
+    that tasks queued afterwards run in scheduling order once released.
+    """
+    scheduler = TranslationScheduler(workers=1)
+    scheduler.start()
+    release = threading.Event()
+    started = threading.Event()
+
+    def block():
+        started.set()
+        release.wait()
+
+    scheduler.submit(BACKFILL, "C0", block)
+    started.wait()
+    yield scheduler, release
+    release.set()
+    scheduler.stop(timeout=1)
+
+
+class TestTranslationScheduler:
+    """Test cases for TranslationScheduler"""
+
+    def test_result_and_exception(self):
+        """Test that futures carry results and exceptions"""
+        scheduler = TranslationScheduler(workers=2)
+        scheduler.start()
+
+        assert scheduler.submit(ONDEMAND, "C1", lambda x: x * 2, 21).result() == 42
+
+        def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            scheduler.submit(FANOUT, "C1", fail).result(timeout=1)
+        scheduler.stop(timeout=1)
+
+    def test_priority_order(self, blocked_scheduler):
+        """Test that on-demand work runs before fan-out and backfill"""
+        scheduler, release = blocked_scheduler
+        order = []
+        futures = [
+            scheduler.submit(BACKFILL, "C1", order.append, "backfill"),
+            scheduler.submit(FANOUT, "C1", order.append, "fanout"),
+            scheduler.submit(ONDEMAND, "C1", order.append, "ondemand"),
+        ]
+
+        release.set()
+        for future in futures:
+            future.result(timeout=1)
+
+        assert order == ["ondemand", "fanout", "backfill"]
+
+    def test_channel_fairness(self, blocked_scheduler):
+        """Test that a noisy channel is interleaved with other channels"""
+        scheduler, release = blocked_scheduler
+        order = []
+        futures = [
+            scheduler.submit(FANOUT, "noisy", order.append, "n") for _ in range(3)
+        ]
+        futures.append(scheduler.submit(FANOUT, "quiet", order.append, "q"))
+
+        assert scheduler.queue_depth()["fanout"] == 4
+        release.set()
+        for future in futures:
+            future.result(timeout=1)
+
+        assert order == ["n", "q", "n", "n"]
+
+    def test_latency_stats(self):
+        """Test that latency is recorded per priority class"""
+        scheduler = TranslationScheduler(workers=1)
+        scheduler.start()
+        scheduler.submit(ONDEMAND, "C1", lambda: None).result(timeout=1)
+        scheduler.stop(timeout=1)
+
+        stats = scheduler.stats()
+
+        assert stats["ondemand"]["count"] == 1
+        assert stats["fanout"]["count"] == 0
+        assert stats["ondemand"]["total_p95"] >= stats["ondemand"]["wait_p95"]
+
+    def test_submit_after_stop(self):
+        """Test that a stopped scheduler rejects work"""
+        scheduler = TranslationScheduler(workers=1)
+        scheduler.start()
+        scheduler.stop(timeout=1)
+
+        with pytest.raises(RuntimeError):
+            scheduler.submit(ONDEMAND, "C1", lambda: None)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Unit tests for shutdown module
+"""
+
+import os
+import sys
+import time
+
+# Add parent directory to path to import shutdown
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from scheduler import FANOUT, TranslationScheduler
+from shutdown import ShutdownCoordinator
+
+
+class TestShutdownCoordinator:
+    """Test cases for ShutdownCoordinator"""
+
+    def test_steps_run_once_in_order(self):
+        """Test that steps run in order once and the report is reused"""
+        calls = []
+        coordinator = ShutdownCoordinator(deadline=10)
+        coordinator.add_step("a", lambda remaining: calls.append("a"))
+        coordinator.add_step("b", lambda remaining: {"dropped": 2})
+
+        report = coordinator.shutdown("SIGTERM")
+
+        assert coordinator.shutting_down
+        assert calls == ["a"]
+        assert report["reason"] == "SIGTERM"
+        assert report["b"] == {"dropped": 2}
+        assert coordinator.shutdown("/_ah/stop") is report
+        assert calls == ["a"]
+
+    def test_deadline_shared(self):
+        """Test that later steps only get the time left"""
+        remaining_seen = []
+        coordinator = ShutdownCoordinator(deadline=0.2)
+        coordinator.add_step("slow", lambda remaining: time.sleep(0.1))
+        coordinator.add_step("next", lambda remaining: remaining_seen.append(remaining))
+
+        coordinator.shutdown("test")
+
+        assert remaining_seen[0] <= 0.1
+
+    def test_failed_step_reported(self):
+        """Test that a failing step does not stop the others"""
+        coordinator = ShutdownCoordinator()
+        coordinator.add_step("broken", lambda remaining: 1 / 0)
+        coordinator.add_step("ok", lambda remaining: {"flushed": 1})
+
+        report = coordinator.shutdown("test")
+
+        assert report["broken"] == {"error": "ZeroDivisionError"}
+        assert report["ok"] == {"flushed": 1}
+
+    def test_counts_reported(self):
+        """Test that work rejected outside the steps is in the report"""
+        coordinator = ShutdownCoordinator()
+        coordinator.add_step("rejected", lambda remaining: {"steps": 1})
+        coordinator.count("rejected", "dropped")
+        coordinator.count("rejected", "dropped")
+
+        report = coordinator.shutdown("test")
+
+        assert report["rejected"] == {"steps": 1, "dropped": 2}
+
+    def test_step_added_first(self):
+        """Test that a step can be put before the registered ones"""
+        calls = []
+        coordinator = ShutdownCoordinator()
+        coordinator.add_step("drain", lambda remaining: calls.append("drain"))
+        coordinator.add_step(
+            "intake", lambda remaining: calls.append("intake"), first=True
+        )
+
+        coordinator.shutdown("test")
+
+        assert calls == ["intake", "drain"]
+
+
+class TestSchedulerDrain:
+    """Test cases for TranslationScheduler.drain"""
+
+    def test_queued_tasks_run_before_deadline(self):
+        """Test that queued tasks finish when there is time"""
+        scheduler = TranslationScheduler(workers=1)
+        scheduler.start()
+        futures = [scheduler.submit(FANOUT, "C1", time.sleep, 0.01) for _ in range(3)]
+
+        assert scheduler.drain(5) == []
+        assert all(f.done() and not f.cancelled() for f in futures)
+        assert scheduler.stopped
+
+    def test_leftover_cancelled(self):
+        """Test that tasks still queued at the deadline are returned cancelled"""
+        scheduler = TranslationScheduler(workers=1)
+        scheduler.start()
+        scheduler.submit(FANOUT, "C1", time.sleep, 0.2)
+        time.sleep(0.05)
+        queued = scheduler.submit(FANOUT, "C1", time.sleep, 0)
+
+        leftover = scheduler.drain(0)
+
+        assert [task.future for _, task in leftover] == [queued]
+        assert queued.cancelled()
+        assert scheduler.in_flight() == 1
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Unit tests for singleflight module
+"""
+
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# Add parent directory to path to import singleflight
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from singleflight import SingleFlight, SingleFlightTimeout, content_key
+
+
+def blocking(release, calls, value="result"):
+    """Function counting its calls and blocking until released"""
+
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    return fn
+
+
+def wait_for_waiters(flight, count):
+    """Wait until count callers joined the leading call"""
+    while flight.stats()["coalesced"] < count:
+        threading.Event().wait(0.001)
+
+
+class TestContentKey:
+    """Test cases for content_key"""
+
+    def test_same_text_same_key(self):
+        """Test that keys depend on text and options only"""
+        assert content_key("Hello", "FR") == content_key("Hello", "FR")
+        assert content_key("Hello", "FR") != content_key("Hello", "DE")
+        assert content_key("Hello", "FR", None) != content_key("Hello", "FR", "more")
+
+    def test_text_not_kept(self):
+        """Test that the key does not contain the text"""
+        assert "secret" not in content_key("secret message", "FR")
+
+
+class TestSingleFlight:
+    """Test cases for SingleFlight"""
+
+    def test_concurrent_calls_coalesced(self):
+        """Test that identical concurrent calls share one call"""
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+        fn = blocking(release, calls)
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(flight.do, "k", fn) for _ in range(4)]
+            wait_for_waiters(flight, 3)
+            release.set()
+            results = [f.result() for f in futures]
+
+        assert len(calls) == 1
+        assert sorted(results, key=lambda r: r[1]) == [
+            ("result", False),
+            ("result", True),
+            ("result", True),
+            ("result", True),
+        ]
+        stats = flight.stats()
+        assert stats["coalescing_rate"] == 0.75
+        assert stats["in_flight"] == 0
+
+    def test_exception_shared(self):
+        """Test that waiters get the exception of the leading call"""
+        flight = SingleFlight()
+        release = threading.Event()
+        fn = blocking(release, [], ValueError("boom"))
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(flight.do, "k", fn) for _ in range(2)]
+            wait_for_waiters(flight, 1)
+            release.set()
+            for future in futures:
+                with pytest.raises(ValueError):
+                    future.result()
+
+    def test_sequential_calls_not_coalesced(self):
+        """Test that a finished call is not reused"""
+        flight = SingleFlight()
+        calls = []
+
+        flight.do("k", lambda: calls.append(1))
+        flight.do("k", lambda: calls.append(1))
+
+        assert len(calls) == 2
+        assert flight.stats()["coalesced"] == 0
+
+    def test_waiter_timeout(self):
+        """Test that waiters give up after the timeout"""
+        flight = SingleFlight(timeout=0.01)
+        release = threading.Event()
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            leader = pool.submit(flight.do, "k", blocking(release, []))
+            while not flight.stats()["in_flight"]:
+                threading.Event().wait(0.001)
+            with pytest.raises(SingleFlightTimeout):
+                flight.do("k", lambda: "unused")
+            release.set()
+            assert leader.result() == ("result", False)
+
+    def test_pending_keys_bounded(self):
+        """Test that keys beyond max_keys are called directly"""
+        flight = SingleFlight(max_keys=1)
+        release = threading.Event()
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            leader = pool.submit(flight.do, "a", blocking(release, []))
+            while not flight.stats()["in_flight"]:
+                threading.Event().wait(0.001)
+            assert flight.do("b", lambda: "direct") == ("direct", False)
+            release.set()
+            leader.result()
+
+        stats = flight.stats()
+        assert stats["overflow"] == 1
+        assert stats["in_flight"] == 0
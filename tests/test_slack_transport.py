@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Unit tests for slack_transport module, run against a local HTTP server
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from slack_sdk.errors import SlackApiError
+
+# Add parent directory to path to import slack_transport
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from slack_transport import SlackTransport, channel_of, method_of, retry_after
+
+
+@pytest.fixture
+def server():
+    """Web API answering with the queued (status, headers) responses"""
+    responses = []
+    calls = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            calls.append(self.path)
+            status, headers = responses.pop(0) if responses else (200, {})
+            body = json.dumps(
+                {"ok": status == 200, "ts": "1.0"}
+                if status == 200
+                else {"ok": False, "error": "ratelimited"}
+            ).encode()
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.responses = responses
+    httpd.calls = calls
+    httpd.base_url = f"http://127.0.0.1:{httpd.server_address[1]}/api/"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class TestHelpers:
+    """Test cases for the header and URL helpers"""
+
+    def test_method_of(self):
+        """Test that the API method is taken from the URL"""
+        assert method_of("https://slack.com/api/chat.postMessage") == "chat.postMessage"
+
+    def test_retry_after(self):
+        """Test that Retry-After is read case-insensitively"""
+        assert retry_after({"retry-after": ["7"]}) == 7
+        assert retry_after({"Retry-After": "3"}) == 3
+        assert retry_after({}) == 1
+
+
+class TestSlackTransport:
+    """Test cases for SlackTransport"""
+
+    def test_client_shared_per_token(self):
+        """Test that one client is created per token and workspace"""
+        transport = SlackTransport()
+
+        assert transport.client("xoxb-1") is transport.client("xoxb-1")
+        assert transport.client("xoxb-1") is not transport.client("xoxb-2")
+        assert len(transport.client("xoxb-1").retry_handlers) == 3
+        assert transport.client("xoxb-1", "T1").key == "T1"
+        assert transport.client("xoxb-1", "T2").key == "T2"
+
+    def test_clients_bounded(self):
+        """Test that the least recently used clients are dropped"""
+        transport = SlackTransport(max_clients=2)
+        first = transport.client("xoxb-1")
+        transport.client("xoxb-2")
+        transport.client("xoxb-1")
+        transport.client("xoxb-3")
+
+        assert transport.client("xoxb-1") is first
+        assert len(transport._clients) == 2
+        assert ("xoxb-2", "") not in transport._clients
+
+    def test_rate_limit_retried(self, server):
+        """Test that a 429 is retried after its Retry-After delay"""
+        server.responses.append((429, {"Retry-After": "0"}))
+        transport = SlackTransport(base_url=server.base_url)
+        client = transport.client("xoxb-1", "T1")
+
+        response = client.chat_postMessage(channel="C1", text="hi")
+
+        assert response["ok"]
+        assert len(server.calls) == 2
+        stats = transport.stats()["chat.postMessage"]
+        assert stats["calls"] == 1
+        assert stats["errors"] == 0
+        assert stats["ratelimited"] == 1
+        assert stats["retries"] == 1
+        assert stats["tier"] == "special"
+        assert transport.rate("T1", "chat.postMessage") == 1
+
+    def test_server_error_retried(self, server):
+        """Test that a 503 is retried"""
+        server.responses.append((503, {}))
+        transport = SlackTransport(base_url=server.base_url)
+
+        assert transport.client("xoxb-1").users_info(user="U1")["ok"]
+        assert transport.stats()["users.info"]["retries"] == 1
+
+    def test_long_rate_limit_fails_and_blocks(self, server):
+        """Test that a long Retry-After fails the call and delays others"""
+        server.responses.append((429, {"Retry-After": "60"}))
+        transport = SlackTransport(base_url=server.base_url, max_retry_after=0.2)
+        client = transport.client("xoxb-1", "T1")
+
+        with pytest.raises(SlackApiError):
+            client.chat_postMessage(channel="C1", text="hi")
+
+        started = time.monotonic()
+        assert client.chat_postMessage(channel="C1", text="hi")["ok"]
+        assert time.monotonic() - started >= 0.2
+        stats = transport.stats()["chat.postMessage"]
+        assert stats["errors"] == 1
+        assert stats["ratelimited"] == 1
+
+    def test_retries_bounded(self, server):
+        """Test that a method still rate limited after the retries fails"""
+        server.responses.extend([(429, {"Retry-After": "0"})] * 3)
+        transport = SlackTransport(base_url=server.base_url, max_retries=2)
+
+        with pytest.raises(SlackApiError):
+            transport.client("xoxb-1").chat_postMessage(channel="C1", text="hi")
+
+        assert len(server.calls) == 3
+        assert transport.stats()["chat.postMessage"]["retries"] == 2
+
+    def test_block_is_per_workspace(self):
+        """Test that a rate limit only delays the same workspace and method"""
+        transport = SlackTransport()
+        transport.block("T1", "users.info", 5)
+
+        assert transport.wait("T2", "users.info") == 0
+        assert transport.wait("T1", "chat.postMessage") == 0
+
+    def test_post_message_blocked_per_channel(self, server):
+        """Test that a chat.postMessage rate limit only delays its channel"""
+        server.responses.append((429, {"Retry-After": "60"}))
+        transport = SlackTransport(base_url=server.base_url, max_retry_after=0.2)
+        client = transport.client("xoxb-1", "T1")
+
+        with pytest.raises(SlackApiError):
+            client.chat_postMessage(channel="C1", text="hi")
+
+        started = time.monotonic()
+        assert client.chat_postMessage(channel="C2", text="hi")["ok"]
+        assert time.monotonic() - started < 0.2
+        assert transport.wait("T1", "chat.postMessage", "C1") > 0
+
+    def test_channel_of(self):
+        """Test that the channel is read from JSON and form bodies"""
+        assert channel_of(b'{"channel": "C1", "text": "hi"}') == "C1"
+        assert channel_of(b"channel=C2&text=hi") == "C2"
+        assert channel_of(b"text=hi") is None
+        assert channel_of(None) is None
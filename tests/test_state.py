@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Unit tests for state module
+"""
+
+import multiprocessing
+import os
+import sys
+
+import pytest
+
+# Add parent directory to path to import state
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from state import (
+    MemoryStateBackend,
+    SQLiteStateBackend,
+    create_state_backend,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    """Run every test against both backends"""
+    if request.param == "memory":
+        return MemoryStateBackend()
+    return SQLiteStateBackend(str(tmp_path / "state.db"))
+
+
+def add_keys(path, results):
+    backend = SQLiteStateBackend(path)
+    results.put(sum(backend.add_if_absent(f"key:{i}") for i in range(50)))
+
+
+class TestStateBackend:
+    """Test cases shared by all state backends"""
+
+    def test_get_set(self, backend):
+        """Test storing and reading a value"""
+        assert backend.get("a") is None
+        backend.set("a", "1")
+        assert backend.get("a") == "1"
+
+    def test_ttl(self, backend):
+        """Test that expired keys are gone"""
+        backend.set("a", "1", ttl=-1)
+        assert backend.get("a") is None
+
+    def test_add_if_absent(self, backend):
+        """Test the dedup primitive"""
+        assert backend.add_if_absent("event:1", ttl=60)
+        assert not backend.add_if_absent("event:1", ttl=60)
+        assert backend.add_if_absent("event:2", ttl=60)
+
+    def test_add_if_absent_after_expiry(self, backend):
+        """Test that an expired dedup key can be added again"""
+        assert backend.add_if_absent("event:1", ttl=-1)
+        assert backend.add_if_absent("event:1", ttl=60)
+
+    def test_incr(self, backend):
+        """Test counters"""
+        assert backend.incr("count") == 1
+        assert backend.incr("count", 5) == 6
+        assert backend.get("count") == "6"
+
+    def test_take_token(self, backend):
+        """Test that the bucket empties at capacity"""
+        assert backend.take_token("bucket", rate=0.001, capacity=2)
+        assert backend.take_token("bucket", rate=0.001, capacity=2)
+        assert not backend.take_token("bucket", rate=0.001, capacity=2)
+
+    def test_lease(self, backend):
+        """Test that only one owner holds a lease"""
+        assert backend.acquire_lease("lease", "a", ttl=60)
+        assert backend.acquire_lease("lease", "a", ttl=60)
+        assert not backend.acquire_lease("lease", "b", ttl=60)
+
+    def test_expired_lease(self, backend):
+        """Test that an expired lease can be taken over"""
+        assert backend.acquire_lease("lease", "a", ttl=-1)
+        assert backend.acquire_lease("lease", "b", ttl=60)
+
+
+class TestMemoryStateBackend:
+    """Test cases specific to the in-memory backend"""
+
+    def test_expired_keys_swept(self):
+        """Test that expired keys that are never read again are removed"""
+        backend = MemoryStateBackend(cleanup_interval=10)
+        for i in range(9):
+            backend.add_if_absent(f"event:{i}", ttl=-1)
+        backend.set("keep", "1")
+
+        assert list(backend._data) == ["keep"]
+
+
+class TestSQLiteStateBackend:
+    """Test cases specific to the SQLite backend"""
+
+    def test_shared_between_instances(self, tmp_path):
+        """Test that two connections see the same state"""
+        path = str(tmp_path / "state.db")
+        first, second = SQLiteStateBackend(path), SQLiteStateBackend(path)
+
+        assert first.add_if_absent("event:1")
+        assert not second.add_if_absent("event:1")
+
+    def test_dedup_across_processes(self, tmp_path):
+        """Test that each key is added by exactly one process"""
+        path = str(tmp_path / "state.db")
+        SQLiteStateBackend(path).get("init")
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=add_keys, args=(path, results))
+            for _ in range(3)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(30)
+
+        assert sum(results.get(timeout=5) for _ in processes) == 50
+
+
+class TestCreateStateBackend:
+    """Test cases for create_state_backend function"""
+
+    def test_memory(self):
+        """Test the memory URL"""
+        assert isinstance(create_state_backend("memory"), MemoryStateBackend)
+
+    def test_sqlite(self, tmp_path):
+        """Test the sqlite URL"""
+        # tmp_path is absolute, so this gives sqlite:///tmp/...
+        backend = create_state_backend(f"sqlite://{tmp_path}/state.db")
+        assert isinstance(backend, SQLiteStateBackend)
+        assert backend.path == f"{tmp_path}/state.db"
+
+    def test_unsupported(self):
+        """Test that unknown schemes are rejected"""
+        with pytest.raises(ValueError):
+            create_state_backend("redis://localhost")
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Unit tests for structured_logging module
+"""
+
+import json
+import logging
+import os
+import queue
+import sys
+
+# Add parent directory to path to import structured_logging
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from scheduler import ONDEMAND, TranslationScheduler
+from structured_logging import (
+    ContextExecutor,
+    CorrelationFilter,
+    JsonFormatter,
+    RecordQueueHandler,
+    correlation_id,
+    new_correlation_id,
+    redact,
+    sampled,
+)
+
+
+class TestRedact:
+    """Test cases for payload redaction"""
+
+    def test_message_text_redacted(self):
+        """Test that message content is replaced but metadata is kept"""
+        body = {
+            "event_id": "Ev1",
+            "event": {"channel": "C1", "text": "secret", "blocks": [{"x": 1}]},
+        }
+
+        redacted = redact(body)
+
+        assert redacted["event"]["text"] == "<redacted 6 chars>"
+        assert redacted["event"]["blocks"] == "<redacted>"
+        assert redacted["event"]["channel"] == "C1"
+        assert body["event"]["text"] == "secret"
+
+    def test_lists_redacted(self):
+        """Test that payloads nested in lists are redacted"""
+        assert redact([{"text": "ab"}]) == [{"text": "<redacted 2 chars>"}]
+
+
+class TestCorrelation:
+    """Test cases for correlation IDs"""
+
+    def test_event_id_used(self):
+        """Test that Slack's event_id becomes the correlation ID"""
+        assert new_correlation_id({"event_id": "Ev123"}) == "Ev123"
+        assert new_correlation_id({}) != new_correlation_id({})
+
+    def test_context_executor_propagates(self):
+        """Test that listener threads see the submitter's correlation ID"""
+        token = correlation_id.set("Ev1")
+        try:
+            with ContextExecutor(max_workers=1) as executor:
+                assert executor.submit(correlation_id.get).result() == "Ev1"
+        finally:
+            correlation_id.reset(token)
+
+    def test_scheduler_propagates(self):
+        """Test that scheduler workers see the submitter's correlation ID"""
+        scheduler = TranslationScheduler(workers=1)
+        scheduler.start()
+        token = correlation_id.set("Ev2")
+        try:
+            future = scheduler.submit(ONDEMAND, "C1", correlation_id.get)
+            assert future.result(timeout=5) == "Ev2"
+        finally:
+            correlation_id.reset(token)
+            scheduler.stop()
+
+
+class TestJsonFormatter:
+    """Test cases for JSON log lines"""
+
+    def test_fields(self):
+        """Test that a record becomes a JSON object with extra fields"""
+        record = logging.LogRecord(
+            "main", logging.INFO, __file__, 1, "took %s", ("1s",), None
+        )
+        record.body = {"event_id": "Ev1"}
+        token = correlation_id.set("Ev1")
+        try:
+            CorrelationFilter().filter(record)
+        finally:
+            correlation_id.reset(token)
+
+        entry = json.loads(JsonFormatter().format(record))
+
+        assert entry["message"] == "took 1s"
+        assert entry["level"] == "INFO"
+        assert entry["correlation_id"] == "Ev1"
+        assert entry["body"] == {"event_id": "Ev1"}
+
+    def test_exception_through_queue(self):
+        """Test that tracebacks queued for the writer keep their own field"""
+        records = queue.SimpleQueue()
+        logger = logging.getLogger("test_exception_through_queue")
+        logger.propagate = False
+        logger.addHandler(RecordQueueHandler(records))
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            logger.exception("failed %s", "here")
+
+        entry = json.loads(JsonFormatter().format(records.get_nowait()))
+
+        assert entry["message"] == "failed here"
+        assert "ZeroDivisionError" in entry["exception"]
+
+
+class TestSampled:
+    """Test cases for body sampling"""
+
+    def test_bounds(self):
+        """Test that rates 0 and 1 never and always sample"""
+        assert not any(sampled(0) for _ in range(100))
+        assert all(sampled(1) for _ in range(100))
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Unit tests for traffic_recorder module
+"""
+
+import gzip
+import json
+import os
+import random
+import sys
+import unicodedata
+
+# Add parent directory to path to import traffic_recorder
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from traffic_recorder import (
+    TrafficRecorder,
+    anonymize_envelope,
+    surrogate_text,
+    text_stats,
+)
+
+
+def envelope(text, **event):
+    return {
+        "type": "event_callback",
+        "token": "verification-token",
+        "team_id": "T1",
+        "event_id": "Ev1",
+        "event": {
+            "type": "message",
+            "channel": "C1",
+            "user": "U1",
+            "ts": "1.000001",
+            "text": text,
+            **event,
+        },
+    }
+
+
+class TestSurrogateText:
+    """Test cases for surrogate_text"""
+
+    def test_same_length_and_scripts(self):
+        """Test that each character keeps its script and category"""
+        text = "Hello 世界、こんにちは カタカナ 한국어 123 Ünïcode"
+        surrogate = surrogate_text(text, random.Random(1))
+
+        assert len(surrogate) == len(text)
+        assert surrogate != text
+        for original, replaced in zip(text, surrogate):
+            assert unicodedata.category(original) == unicodedata.category(replaced)
+            assert (
+                unicodedata.name(original, "").split()[0]
+                == unicodedata.name(replaced, "").split()[0]
+            )
+
+    def test_markup_kept(self):
+        """Test that Slack markup characters survive"""
+        surrogate = surrogate_text("*bold* <@U123> :cat: `x`", random.Random(1))
+
+        assert text_stats(surrogate)["format"] == 1
+        assert text_stats(surrogate)["mentions"] == 1
+        assert text_stats(surrogate)["emoji"] == 1
+        assert text_stats(surrogate)["code"] == 1
+
+    def test_utf8_size_kept(self):
+        """Test that ASCII stays ASCII and Japanese stays three bytes"""
+        text = "abc ひらがな"
+        surrogate = surrogate_text(text)
+
+        assert len(surrogate.encode("utf-8")) == len(text.encode("utf-8"))
+
+
+class TestTextStats:
+    """Test cases for text_stats"""
+
+    def test_markup_counts(self):
+        """Test that markup is counted by kind"""
+        stats = text_stats("Hi <@U1>, see <https://example.com|this>\n```code```")
+
+        assert stats["chars"] == 51
+        assert stats["lines"] == 2
+        assert stats["mentions"] == 1
+        assert stats["links"] == 1
+        assert stats["code"] == 1
+        assert 0 < stats["markup_ratio"] < 1
+
+    def test_empty(self):
+        """Test that empty texts have no markup"""
+        assert text_stats("")["markup_ratio"] == 0
+
+
+class TestAnonymizeEnvelope:
+    """Test cases for anonymize_envelope"""
+
+    def test_content_removed(self):
+        """Test that the token, blocks and files are dropped"""
+        body = envelope(
+            "secret plans",
+            blocks=[{"type": "rich_text"}],
+            files=[{"name": "plans.pdf"}],
+            user_profile={"real_name": "Cat"},
+        )
+
+        anonymized = anonymize_envelope(body)
+
+        assert "token" not in anonymized
+        assert set(anonymized["event"]) == {"type", "channel", "user", "ts", "text"}
+        assert "secret" not in json.dumps(anonymized)
+        assert anonymized["event"]["channel"] == "C1"
+
+    def test_edited_message(self):
+        """Test that nested message texts are replaced too"""
+        body = envelope(
+            None,
+            subtype="message_changed",
+            message={"text": "new secret"},
+            previous_message={"text": "old secret"},
+        )
+
+        anonymized = anonymize_envelope(body)
+
+        assert "secret" not in json.dumps(anonymized)
+        assert len(anonymized["event"]["message"]["text"]) == len("new secret")
+
+
+class TestTrafficRecorder:
+    """Test cases for TrafficRecorder"""
+
+    def test_record(self, tmp_path):
+        """Test that sampled envelopes are written as JSON lines"""
+        path = tmp_path / "traffic.jsonl"
+        recorder = TrafficRecorder(str(path), sample_rate=1)
+        recorder.start()
+
+        body = envelope("Hello <@U2>")
+        assert recorder.sampled(body)
+        assert not recorder.sampled({"type": "url_verification"})
+        recorder.record(body, 1700000000.12345, 0.0042)
+        recorder.stop()
+
+        entry = json.loads(path.read_text())
+        assert entry["ts"] == 1700000000.123
+        assert entry["ack_ms"] == 4.2
+        assert entry["stats"]["mentions"] == 1
+        assert entry["stats"]["files"] == 0
+        assert len(entry["body"]["event"]["text"]) == len("Hello <@U2>")
+
+    def test_not_sampled(self, tmp_path):
+        """Test that a zero sample rate records nothing"""
+        recorder = TrafficRecorder(str(tmp_path / "traffic.jsonl"), sample_rate=0)
+
+        assert not recorder.sampled(envelope("Hello"))
+
+    def test_rotation_compresses(self, tmp_path):
+        """Test that full corpus files are rotated to gzip files"""
+        path = tmp_path / "traffic.jsonl"
+        recorder = TrafficRecorder(str(path), sample_rate=1, max_bytes=400, backups=2)
+        recorder.start()
+        for _ in range(10):
+            recorder.record(envelope("x" * 100), 1.0, 0.001)
+        recorder.stop()
+
+        rotated = tmp_path / "traffic.jsonl.1.gz"
+        assert rotated.exists()
+        assert not (tmp_path / "traffic.jsonl.3.gz").exists()
+        with gzip.open(rotated, "rt", encoding="utf-8") as f:
+            assert json.loads(f.readline())["stats"]["chars"] == 100
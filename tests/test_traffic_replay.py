@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Unit tests for traffic_replay module, run against a local HTTP server
+"""
+
+import gzip
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from slack_sdk.signature import SignatureVerifier
+
+# Add parent directory to path to import traffic_replay
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from traffic_replay import load_corpus, replay
+
+SECRET = "replay-secret"
+
+
+@pytest.fixture
+def server():
+    """Events endpoint recording the bodies of correctly signed requests"""
+    received = []
+    verifier = SignatureVerifier(SECRET)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            valid = verifier.is_valid(
+                body,
+                self.headers["X-Slack-Request-Timestamp"],
+                self.headers["X-Slack-Signature"],
+            )
+            if valid:
+                received.append(json.loads(body))
+            self.send_response(200 if valid else 401)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.received = received
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}/slack/events"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def entry(ts, event_ts, thread_ts=None):
+    event = {"type": "message", "channel": "C1", "ts": event_ts, "text": "xxx"}
+    if thread_ts:
+        event["thread_ts"] = thread_ts
+    return {
+        "ts": ts,
+        "body": {"type": "event_callback", "event_id": "Ev1", "event": event},
+    }
+
+
+class TestLoadCorpus:
+    """Test cases for load_corpus"""
+
+    def test_plain_and_gzip(self, tmp_path):
+        """Test that rotated and current files are merged in time order"""
+        current = tmp_path / "traffic.jsonl"
+        current.write_text(json.dumps(entry(2.0, "2.0")) + "\n")
+        with gzip.open(tmp_path / "traffic.jsonl.1.gz", "wt") as f:
+            f.write(json.dumps(entry(1.0, "1.0")) + "\n\n")
+
+        corpus = load_corpus([str(current), str(tmp_path / "traffic.jsonl.1.gz")])
+
+        assert [e["ts"] for e in corpus] == [1.0, 2.0]
+
+
+class TestReplay:
+    """Test cases for replay"""
+
+    def test_signed_and_renamed(self, server):
+        """Test that events are signed and get fresh IDs and timestamps"""
+        corpus = [entry(0.0, "1.000001"), entry(0.0, "1.000002", "1.000001")]
+
+        result = replay(corpus, server.url, SECRET, speed=100)
+
+        assert result["sent"] == 2
+        assert result["errors"] == 0
+        assert result["status"] == {"200": 2}
+        parent, reply = sorted(server.received, key=lambda b: b["event"]["ts"])
+        assert parent["event_id"] != "Ev1"
+        assert parent["event"]["ts"] != "1.000001"
+        assert reply["event"]["thread_ts"] == parent["event"]["ts"]
+
+    def test_speed(self, server):
+        """Test that recorded gaps are divided by the speed"""
+        corpus = [entry(0.0, "1.1"), entry(1.0, "1.2")]
+
+        result = replay(corpus, server.url, SECRET, speed=10)
+
+        assert 0.1 <= result["duration"] < 0.9
+        assert result["sent"] == 2
+
+    def test_wrong_secret(self, server):
+        """Test that rejected requests are counted as errors"""
+        result = replay([entry(0.0, "1.1")], server.url, "wrong")
+
+        assert result["errors"] == 1
+        assert result["status"] == {"401": 1}
+
+    def test_invalid_speed(self, server):
+        """Test that a non-positive speed is rejected"""
+        with pytest.raises(ValueError):
+            replay([], server.url, SECRET, speed=0)
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Unit tests for translation_backend module
+"""
+
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# Add parent directory to path to import translation_backend
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import deepl_client
+from deepl_client import DeeplClientError
+from deepl_standin import DeeplStandin
+from translation_backend import (
+    BackendRouter,
+    DeeplBackend,
+    TranslationBackend,
+    resolve_endpoint,
+)
+
+
+class FakeBackend(TranslationBackend):
+    """Backend with a scripted delay and failure"""
+
+    def __init__(self, name, delay=0.0, fail=False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    def translate(self, text, target_lang, timeout=10, formality=None):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise DeeplClientError("unavailable")
+        return f"{self.name}:{text}"
+
+    def usage(self, timeout=10):
+        return (1, 10)
+
+
+@pytest.fixture
+def standin():
+    """Run a local DeepL stand-in"""
+    server = DeeplStandin().start()
+    yield server
+    server.stop()
+
+
+class TestResolveEndpoint:
+    """Test cases for resolve_endpoint function"""
+
+    def test_named_endpoints(self):
+        """Test that pro and free resolve to the DeepL URLs"""
+        assert resolve_endpoint("pro") == deepl_client.DEEPL_PRO_URL
+        assert resolve_endpoint(" Free ") == deepl_client.DEEPL_FREE_URL
+
+    def test_url(self):
+        """Test that URLs are used as-is without a trailing slash"""
+        assert resolve_endpoint("http://localhost:8080/v2/") == (
+            "http://localhost:8080/v2"
+        )
+
+
+class TestBackendRouter:
+    """Test cases for BackendRouter"""
+
+    def test_requires_backend(self):
+        """Test that an empty router is rejected"""
+        with pytest.raises(ValueError):
+            BackendRouter([])
+
+    def test_failover(self):
+        """Test that a failing backend falls over to the next one"""
+        broken = FakeBackend("broken", fail=True)
+        healthy = FakeBackend("healthy")
+        router = BackendRouter([broken, healthy])
+
+        assert router.translate("Hello", "FR") == "healthy:Hello"
+        # The failure ranks the broken backend down
+        assert router.ranked()[0] is healthy
+
+    def test_all_backends_fail(self):
+        """Test that the last error is raised when every backend fails"""
+        router = BackendRouter([FakeBackend("a", fail=True)])
+
+        with pytest.raises(DeeplClientError):
+            router.translate("Hello", "FR")
+
+    def test_latency_aware_selection(self):
+        """Test that the faster backend is preferred once measured"""
+        slow = FakeBackend("slow", delay=0.05)
+        fast = FakeBackend("fast")
+        router = BackendRouter([slow, fast])
+
+        router.translate("a", "FR")
+        router.translate("b", "FR")
+
+        assert router.ranked()[0] is fast
+
+    def test_failures_not_in_hedge_delay(self):
+        """Test that failed calls do not push up the p95 hedge delay"""
+        backend = FakeBackend("a")
+        router = BackendRouter([backend], min_hedge_delay=0)
+        for _ in range(30):
+            router.translate("Hello", "FR")
+        backend.fail = True
+        for _ in range(5):
+            with pytest.raises(DeeplClientError):
+                router.translate("Hello", "FR")
+
+        assert router.hedge_delay(backend) < 1
+
+    def test_hedge_wins_on_slow_primary(self):
+        """Test that a hedged duplicate answers when the primary is slow"""
+        slow = FakeBackend("slow", delay=0.5)
+        fast = FakeBackend("fast")
+        router = BackendRouter([slow, fast], hedge=True, default_hedge_delay=0.05)
+
+        result = router._translate_hedged("Hello", "FR")
+
+        assert result == "fast:Hello"
+        assert router.stats()["hedges"] == 1
+        assert router.stats()["hedge_wins"] == 1
+
+    def test_losing_hedge_billed(self):
+        """Test that a losing request DeepL completed is reported as billed"""
+        slow = FakeBackend("slow", delay=0.3)
+        fast = FakeBackend("fast")
+        router = BackendRouter([slow, fast], hedge=True, default_hedge_delay=0.05)
+        billed = []
+        done = threading.Event()
+
+        def on_billed(characters):
+            billed.append(characters)
+            done.set()
+
+        assert router.translate("Hello", "FR", hedge=True, on_billed=on_billed) == (
+            "fast:Hello"
+        )
+
+        assert done.wait(5)
+        assert billed == [5]
+        assert router.stats()["hedge_billed_characters"] == 5
+
+    def test_concurrent_hedges_not_serialized(self):
+        """Test that concurrent hedged calls do not queue behind each other"""
+        slow = FakeBackend("slow", delay=0.3)
+        other = FakeBackend("other", delay=0.3)
+        router = BackendRouter(
+            [slow, other], hedge=True, default_hedge_delay=0.05, concurrency=8
+        )
+        started = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(
+                pool.map(lambda i: router._translate_hedged(str(i), "FR"), range(8))
+            )
+
+        assert len(results) == 8
+        assert time.monotonic() - started < 0.6
+
+    def test_hedged_failover_on_early_failure(self):
+        """Test that a primary failing before the hedge delay fails over"""
+        broken = FakeBackend("broken", fail=True)
+        healthy = FakeBackend("healthy")
+        router = BackendRouter([broken, healthy], hedge=True, default_hedge_delay=1)
+
+        assert router._translate_hedged("Hello", "FR") == "healthy:Hello"
+
+    def test_no_hedge_when_disabled(self):
+        """Test that hedge=True is ignored when hedging is disabled"""
+        slow = FakeBackend("slow", delay=0.1)
+        fast = FakeBackend("fast")
+        router = BackendRouter([slow, fast], default_hedge_delay=0.01)
+
+        assert router.translate("Hello", "FR", hedge=True) == "slow:Hello"
+        assert fast.calls == 0
+
+    def test_no_hedge_for_fast_primary(self):
+        """Test that no duplicate is sent when the primary answers in time"""
+        primary = FakeBackend("primary")
+        other = FakeBackend("other")
+        router = BackendRouter([primary, other], hedge=True)
+
+        assert router.translate("Hello", "FR", hedge=True) == "primary:Hello"
+        assert other.calls == 0
+        assert router.stats()["hedges"] == 0
+
+
+class TestDeeplStandin:
+    """Test cases for the DeepL backend against the local stand-in"""
+
+    def test_translate_and_usage(self, standin):
+        """Test a round trip through the HTTP client"""
+        backend = DeeplBackend("test-key", standin.base_url)
+
+        assert backend.translate("Hello", "FR") == "[FR] Hello"
+        assert backend.usage() == (5, 500000)
+
+    def test_batch_in_one_request(self, standin):
+        """Test that a batch of texts is translated in a single request"""
+        router = BackendRouter([DeeplBackend("test-key", standin.base_url)])
+
+        assert router.translate_texts(["a", "b", "c"], "DE") == [
+            "[DE] a",
+            "[DE] b",
+            "[DE] c",
+        ]
+        assert standin.requests == 1
+
+    def test_batch_failover(self):
+        """Test that batches fall over and default to one call per text"""
+        router = BackendRouter([FakeBackend("broken", fail=True), FakeBackend("ok")])
+
+        assert router.translate_texts(["a", "b"], "DE") == ["ok:a", "ok:b"]
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Unit tests for triggers module
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+# Add parent directory to path to import triggers
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from triggers import DEFAULT_TRIGGERS, Trigger, TriggerTable, load_trigger_table
+
+
+@pytest.fixture
+def table():
+    """The built-in trigger table"""
+    return TriggerTable(DEFAULT_TRIGGERS)
+
+
+class TestTriggerTable:
+    """Test cases for TriggerTable"""
+
+    def test_single_trigger(self, table):
+        """Test that a keyword resolves to its language"""
+        assert [t.target_lang for t in table.find("Hello there Nyan")] == ["JA"]
+
+    def test_cyrillic_trigger(self, table):
+        """Test that non-Latin keywords match as whole words"""
+        assert [t.target_lang for t in table.find("Мяу, hello")] == ["RU"]
+        assert table.find("Мяукать") == []
+
+    def test_word_boundary(self, table):
+        """Test that keywords inside other words do not trigger"""
+        assert table.find("Meowing cats and Nyanko") == []
+        assert table.pattern.search("Meowing") is None
+
+    def test_multiple_triggers(self, table):
+        """Test that every trigger is found once, in order of appearance"""
+        triggers = table.find("Nyan Meow Miaou Meow")
+
+        assert [t.target_lang for t in triggers] == ["JA", "EN", "FR"]
+
+    def test_prefix_keywords(self):
+        """Test that a keyword which prefixes another does not shadow it"""
+        table = TriggerTable([Trigger("Meow", "EN"), Trigger("Meow-UK", "EN-GB")])
+
+        assert [t.target_lang for t in table.find("hi Meow-UK")] == ["EN-GB"]
+
+    def test_keyword_list(self, table):
+        """Test that the Meousage help is generated from the table"""
+        assert table.keyword_list() == (
+            "Translation keyword:\n    Nyan:JA\n    Meow:EN\n    Miaou:FR\n    Мяу:RU"
+        )
+
+    def test_empty_table(self):
+        """Test that an empty table is rejected"""
+        with pytest.raises(ValueError):
+            TriggerTable([])
+
+
+class TestLoadTriggerTable:
+    """Test cases for load_trigger_table function"""
+
+    def test_default(self):
+        """Test that no path gives the built-in table"""
+        assert load_trigger_table(None).triggers == DEFAULT_TRIGGERS
+
+    def test_file(self, tmp_path):
+        """Test loading triggers with options from JSON"""
+        path = tmp_path / "triggers.json"
+        path.write_text(
+            json.dumps(
+                [
+                    {"keyword": "Wan", "target_lang": "DE", "formality": "less"},
+                    {"keyword": "Meow", "target_lang": "EN"},
+                ]
+            )
+        )
+
+        table = load_trigger_table(str(path))
+
+        assert table.find("Wan") == [Trigger("Wan", "DE", "less")]
+
+    def test_invalid_file(self, tmp_path):
+        """Test that entries without a language are rejected"""
+        path = tmp_path / "triggers.json"
+        path.write_text(json.dumps([{"keyword": "Wan"}]))
+
+        with pytest.raises(ValueError):
+            load_trigger_table(str(path))
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Unit tests for usage_stats module
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add parent directory to path to import usage_stats
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from usage_stats import UsageStats, format_top
+
+
+@pytest.fixture
+def stats():
+    """Usage counters with translations in two workspaces"""
+    stats = UsageStats(flush_interval=3600)
+    stats.record(100, "EN", "C1", "U1", "T1")
+    stats.record(50, "FR", "C1", "U2", "T1")
+    stats.record(300, "EN", "C2", "U2", "T1")
+    stats.record(1000, "JA", "C9", "U9", "T2")
+    yield stats
+    stats.close()
+
+
+class TestUsageStats:
+    """Test cases for UsageStats"""
+
+    def test_top_per_dimension(self, stats):
+        """Test that keys are ranked by characters within a workspace"""
+        assert stats.top("channel", team_id="T1") == [("C2", 300, 1), ("C1", 150, 2)]
+        assert stats.top("user", team_id="T1") == [("U2", 350, 2), ("U1", 100, 1)]
+        assert stats.top("lang", team_id="T1", limit=1) == [("EN", 400, 2)]
+
+    def test_team_totals(self, stats):
+        """Test that workspaces are ranked across all teams"""
+        assert stats.top("team") == [("T2", 1000, 1), ("T1", 450, 3)]
+        assert stats.total(team_id="T1") == 450
+
+    def test_buffered_until_flush(self):
+        """Test that counts are merged into the database in batches"""
+        stats = UsageStats(flush_interval=3600)
+        stats.record(10, "EN", "C1", "U1")
+
+        assert stats._pending
+        assert stats.total() == 10
+        assert not stats._pending
+
+    def test_shared_file(self, tmp_path):
+        """Test that counters in a file are seen by another instance"""
+        path = str(tmp_path / "usage.db")
+        writer = UsageStats(path, flush_interval=0)
+        writer.record(10, "EN", "C1")
+
+        assert UsageStats(path).top("channel") == [("C1", 10, 1)]
+
+    def test_retention(self, stats):
+        """Test that days before the retention period are dropped"""
+        stats._conn.execute(
+            "INSERT INTO usage VALUES (?, 'T1', 'lang', 'EN', 5, 1)",
+            (stats._day(stats.retention_days + 1),),
+        )
+        stats.record(1, "EN")
+        stats.flush()
+
+        assert stats.total(days=1000, team_id="T1") == 450
+
+    def test_unknown_dimension(self, stats):
+        """Test that unknown dimensions are rejected"""
+        with pytest.raises(ValueError):
+            stats.top("emoji")
+
+
+class TestFormatTop:
+    """Test cases for the Meousage top report"""
+
+    def test_report(self, stats):
+        """Test that the report lists each dimension with display names"""
+        report = format_top(
+            stats, team_id="T1", name_of=lambda dimension, key: key.lower(), limit=1
+        )
+
+        assert report.splitlines() == [
+            "450 characters translated in the last 30 days.",
+            "Top channels:",
+            "    c2: 300 characters, 1 requests (66.7 %)",
+            "Top users:",
+            "    u2: 350 characters, 2 requests (77.8 %)",
+            "Top languages:",
+            "    en: 400 characters, 2 requests (88.9 %)",
+        ]
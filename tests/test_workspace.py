@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Unit tests for workspace module
+"""
+
+import os
+import sys
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+from slack_sdk.errors import SlackApiError
+
+# Add parent directory to path to import workspace
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from workspace import ChannelDirectory, UserCache, WorkspaceRegistry
+
+
+def make_client(channels):
+    """Create a WebClient mock serving channels in pages of two"""
+    client = Mock()
+    client.conversations_list.return_value = [
+        {"channels": channels[i : i + 2]} for i in range(0, len(channels), 2)
+    ]
+    client.users_info.side_effect = lambda user: Mock(
+        data={"user": {"name": f"name-{user}"}}
+    )
+    return client
+
+
+CHANNELS = [
+    {"id": "C1", "name": "general"},
+    {"id": "C2", "name": "general-en"},
+    {"id": "C3", "name": "random"},
+]
+
+
+class TestChannelDirectory:
+    """Test cases for ChannelDirectory"""
+
+    def test_load(self):
+        """Test that every page is loaded into both maps"""
+        directory = ChannelDirectory()
+
+        directory.load(make_client(CHANNELS))
+
+        assert directory.name_dict == {
+            "general": "C1",
+            "general-en": "C2",
+            "random": "C3",
+        }
+        assert directory.id_dict["C2"] == "general-en"
+        assert directory.loaded_at > 0
+
+    def test_cap(self):
+        """Test that channels beyond the cap are ignored"""
+        directory = ChannelDirectory(max_channels=2)
+
+        directory.load(make_client(CHANNELS))
+
+        assert len(directory.name_dict) == 2
+
+    def test_error_keeps_previous_directory(self):
+        """Test that a failed reload keeps the last good directory"""
+        directory = ChannelDirectory()
+        directory.load(make_client(CHANNELS))
+        client = Mock()
+        client.conversations_list.side_effect = SlackApiError("boom", {})
+
+        directory.load(client)
+
+        assert directory.id_dict["C1"] == "general"
+
+
+class TestUserCache:
+    """Test cases for UserCache"""
+
+    def test_cached(self):
+        """Test that users.info is called once per user"""
+        cache = UserCache()
+        client = make_client([])
+
+        assert cache.name(client, "U1") == "name-U1"
+        assert cache.name(client, "U1") == "name-U1"
+        assert client.users_info.call_count == 1
+
+    def test_lru_cap(self):
+        """Test that the least recently used user is evicted"""
+        cache = UserCache(max_users=2)
+        client = make_client([])
+
+        cache.name(client, "U1")
+        cache.name(client, "U2")
+        cache.name(client, "U1")
+        cache.name(client, "U3")
+
+        assert len(cache) == 2
+        cache.name(client, "U1")
+        assert client.users_info.call_count == 3
+
+    def test_ttl(self):
+        """Test that expired names are fetched again"""
+        cache = UserCache(ttl=0)
+        client = make_client([])
+
+        cache.name(client, "U1")
+        cache.name(client, "U1")
+
+        assert client.users_info.call_count == 2
+
+
+class TestWorkspaceRegistry:
+    """Test cases for WorkspaceRegistry"""
+
+    def test_partitioned_per_team(self):
+        """Test that every team gets its own client and directory"""
+        clients = {"T1": make_client(CHANNELS[:1]), "T2": make_client(CHANNELS[2:])}
+        registry = WorkspaceRegistry(clients.get)
+
+        first = registry.get("T1")
+        second = registry.get("T2")
+
+        assert first.client is clients["T1"]
+        assert first.channels.id_dict == {"C1": "general"}
+        assert second.channels.id_dict == {"C3": "random"}
+        assert registry.get("T1") is first
+        assert sorted(registry.team_ids()) == ["T1", "T2"]
+
+    def test_failed_load_retried(self):
+        """Test that a failed directory load is retried after the backoff"""
+        client = make_client(CHANNELS)
+        pages = client.conversations_list.return_value
+        client.conversations_list.side_effect = SlackApiError("boom", {})
+        registry = WorkspaceRegistry(lambda team_id: client, retry_delay=0.05)
+
+        workspace = registry.get("T1")
+        assert workspace.channels.id_dict == {}
+
+        client.conversations_list.side_effect = None
+        client.conversations_list.return_value = pages
+        assert registry.get("T1").channels.id_dict == {}
+        time.sleep(0.06)
+
+        assert registry.get("T1") is workspace
+        assert workspace.channels.id_dict["C1"] == "general"
+
+    def test_load_outside_registry_lock(self):
+        """Test that loading one team does not block lookups of another"""
+        started = threading.Event()
+        release = threading.Event()
+        slow = make_client(CHANNELS[:1])
+        pages = slow.conversations_list.return_value
+
+        def conversations_list(limit):
+            started.set()
+            release.wait(2)
+            return pages
+
+        slow.conversations_list.side_effect = conversations_list
+        clients = {"T1": slow, "T2": make_client(CHANNELS[2:])}
+        registry = WorkspaceRegistry(clients.get)
+        thread = threading.Thread(target=registry.get, args=("T1",))
+        thread.start()
+        started.wait(2)
+
+        assert registry.get("T2").channels.id_dict == {"C3": "random"}
+        release.set()
+        thread.join(2)
+        assert registry.get("T1").channels.id_dict == {"C1": "general"}
+
+    def test_invalidate_reloads_directory(self):
+        """Test that a channel created after the load is found once invalidated"""
+        client = make_client(CHANNELS[:1])
+        registry = WorkspaceRegistry(lambda team_id: client)
+        assert "general-de" not in registry.get("T1").channels.name_dict
+
+        client.conversations_list.return_value = [
+            {"channels": CHANNELS[:1] + [{"id": "C4", "name": "general-de"}]}
+        ]
+        assert "general-de" not in registry.get("T1").channels.name_dict
+        registry.invalidate("T1")
+
+        assert registry.get("T1").channels.name_dict["general-de"] == "C4"
+        assert client.conversations_list.call_count == 2
+
+    def test_old_directory_reloaded(self):
+        """Test that a directory older than max_age is reloaded"""
+        client = make_client(CHANNELS[:1])
+        registry = WorkspaceRegistry(lambda team_id: client, max_age=0.05)
+        registry.get("T1")
+
+        registry.get("T1")
+        assert client.conversations_list.call_count == 1
+        time.sleep(0.06)
+        registry.get("T1")
+
+        assert client.conversations_list.call_count == 2
+
+    def test_reload_does_not_block_lookups(self):
+        """Test that lookups use the loaded directory while it is reloaded"""
+        client = make_client(CHANNELS[:1])
+        registry = WorkspaceRegistry(lambda team_id: client)
+        workspace = registry.get("T1")
+        started = threading.Event()
+        release = threading.Event()
+        pages = client.conversations_list.return_value
+
+        def conversations_list(limit):
+            started.set()
+            release.wait(2)
+            return pages
+
+        client.conversations_list.side_effect = conversations_list
+        registry.invalidate()
+        thread = threading.Thread(target=registry.get, args=("T1",))
+        thread.start()
+        started.wait(2)
+
+        assert registry.get("T1").channels.id_dict == {"C1": "general"}
+        release.set()
+        thread.join(2)
+        assert not workspace.stale
+
+    def test_unknown_team(self):
+        """Test that a team without installation is rejected"""
+        registry = WorkspaceRegistry(lambda team_id: None)
+
+        with pytest.raises(LookupError):
+            registry.get("T9")
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Sampled recording of Slack event traffic for replay.
+
+Event envelopes are written as compact JSON lines to a rotating file, with
+their arrival time, acknowledgement latency and text/markup statistics.
+Message text is replaced with a surrogate of the same length: every letter
+or digit becomes a random character of the same script and category, while
+whitespace, punctuation and Slack markup characters are kept, so the corpus
+has the size and markup density of real traffic without its content.
+Blocks, attachments, files and user profiles are dropped; channel and user
+IDs are kept so that replays fan out and burst like the original.
+
+Anonymizing and writing happen on a background thread; the request path
+only samples and enqueues. Rotated files are gzip-compressed.
+"""
+
+import functools
+import gzip
+import json
+import logging
+import os
+import queue
+import random
+import re
+import shutil
+import unicodedata
+from logging.handlers import QueueListener, RotatingFileHandler
+from typing import Any, Dict, Optional, Tuple
+
+from structured_logging import REDACTED_KEYS, sampled
+
+# Top-level envelope keys kept in the corpus (the verification token is not)
+ENVELOPE_KEYS = frozenset(
+    {
+        "type",
+        "team_id",
+        "enterprise_id",
+        "api_app_id",
+        "event_id",
+        "event_time",
+        "authorizations",
+        "is_ext_shared_channel",
+        "event",
+    }
+)
+
+# Event keys dropped from the corpus; "text" is replaced with a surrogate
+DROPPED_KEYS = (REDACTED_KEYS - {"text"}) | {"user_profile"}
+
+# Surrogate characters are drawn from the same 128-code-point block
+_BLOCK_SIZE = 128
+
+MARKUP_PATTERNS = {
+    "mentions": re.compile(r"<[@!][^>\s]*>"),
+    "channels": re.compile(r"<#[^>\s]*>"),
+    "links": re.compile(r"<(?:https?|mailto):[^>\s]*>"),
+    "emoji": re.compile(r":[a-z0-9_+'-]+:"),
+    "code": re.compile(r"```.*?```|`[^`\n]+`", re.DOTALL),
+    "format": re.compile(r"(?<!\w)([*_~])[^*_~\n]+\1(?!\w)"),
+}
+
+
+def _script(char: str) -> str:
+    # First word of the Unicode name: LATIN, HIRAGANA, CJK, HANGUL, DIGIT...
+    return unicodedata.name(char, "").split(" ", 1)[0]
+
+
+@functools.lru_cache(maxsize=512)
+def _candidates(block: int, category: str, script: str) -> Tuple[str, ...]:
+    return tuple(
+        char
+        for char in map(chr, range(block * _BLOCK_SIZE, (block + 1) * _BLOCK_SIZE))
+        if unicodedata.category(char) == category and _script(char) == script
+    )
+
+
+def surrogate_text(text: str, rng: Optional[random.Random] = None) -> str:
+    """
+    Return a text of the same length with letters and digits replaced.
+
+    Each letter or digit becomes a random character of the same Unicode
+    category and script from the same block, so Japanese stays Japanese
+    and ASCII stays ASCII; everything else is kept as is.
+
+    Args:
+        text: Original text
+        rng: Random generator (the random module if None)
+    """
+    rng = rng or random
+    chars = []
+    for char in text:
+        category = unicodedata.category(char)
+        if category[0] in "LN":
+            char = rng.choice(
+                _candidates(ord(char) // _BLOCK_SIZE, category, _script(char))
+            )
+        chars.append(char)
+    return "".join(chars)
+
+
+def text_stats(text: str) -> Dict[str, Any]:
+    """
+    Return the size and Slack markup counts of a message text.
+
+    Returns:
+        Dict with chars, bytes, lines, the count of each MARKUP_PATTERNS
+        kind and markup_ratio, the share of characters inside markup
+    """
+    stats: Dict[str, Any] = {
+        "chars": len(text),
+        "bytes": len(text.encode("utf-8")),
+        "lines": text.count("\n") + 1 if text else 0,
+    }
+    markup_chars = 0
+    for kind, pattern in MARKUP_PATTERNS.items():
+        matches = [m.group(0) for m in pattern.finditer(text)]
+        stats[kind] = len(matches)
+        markup_chars += sum(len(m) for m in matches)
+    stats["markup_ratio"] = round(min(markup_chars / len(text), 1.0), 3) if text else 0
+    return stats
+
+
+def _anonymize(value: Any, rng: random.Random) -> Any:
+    if isinstance(value, dict):
+        anonymized = {}
+        for key, item in value.items():
+            if key in DROPPED_KEYS:
+                continue
+            if key == "text" and isinstance(item, str):
+                anonymized[key] = surrogate_text(item, rng)
+            else:
+                anonymized[key] = _anonymize(item, rng)
+        return anonymized
+    if isinstance(value, list):
+        return [_anonymize(item, rng) for item in value]
+    return value
+
+
+def anonymize_envelope(body: dict, rng: Optional[random.Random] = None) -> dict:
+    """Return the replayable part of an event envelope with surrogate text."""
+    rng = rng or random.Random()
+    return _anonymize({k: v for k, v in body.items() if k in ENVELOPE_KEYS}, rng)
+
+
+def corpus_entry(
+    body: dict, received_at: float, ack_seconds: float, rng: random.Random
+) -> Dict[str, Any]:
+    """
+    Build the corpus entry of an event envelope.
+
+    Args:
+        body: Slack event envelope
+        received_at: Epoch time the event arrived
+        ack_seconds: Time Bolt took to acknowledge it
+        rng: Random generator for the surrogate text
+    """
+    event = body.get("event") or {}
+    # Edits carry the new text in a nested message
+    text = event.get("text") or (event.get("message") or {}).get("text") or ""
+    stats = text_stats(text)
+    stats["files"] = len(event.get("files") or [])
+    return {
+        "ts": round(received_at, 3),
+        "ack_ms": round(ack_seconds * 1000, 1),
+        "stats": stats,
+        "body": anonymize_envelope(body, rng),
+    }
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+class _EntryFormatter(logging.Formatter):
+    """Turn queued envelopes into corpus lines on the writer thread."""
+
+    def __init__(self):
+        super().__init__()
+        self.rng = random.Random()
+
+    def format(self, record: logging.LogRecord) -> str:
+        # The rotating handler formats each record twice (size check, write)
+        if not hasattr(record, "line"):
+            entry = corpus_entry(
+                record.body, record.received_at, record.ack_seconds, self.rng
+            )
+            record.line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+        return record.line
+
+
+class TrafficRecorder:
+    """
+    Writes a sample of event envelopes to a rotating JSONL corpus.
+
+    Only event_callback envelopes are recorded; URL verifications, slash
+    commands and interactions are not.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        sample_rate: float = 0.1,
+        max_bytes: int = 10 * 1024 * 1024,
+        backups: int = 5,
+    ):
+        """
+        Args:
+            path: Corpus file; rotated files get .1.gz, .2.gz... suffixes
+            sample_rate: Fraction (0-1) of events recorded
+            max_bytes: Size at which the corpus file is rotated
+            backups: Number of rotated files kept
+        """
+        self.path = path
+        self.sample_rate = sample_rate
+        handler = RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True
+        )
+        handler.namer = lambda name: f"{name}.gz"
+        handler.rotator = _gzip_rotator
+        handler.setFormatter(_EntryFormatter())
+        self._queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        self._handler = handler
+        self._listener = QueueListener(self._queue, handler)
+        self._started = False
+
+    def start(self) -> None:
+        """Start the background writer thread."""
+        self._listener.start()
+        self._started = True
+
+    def stop(self) -> None:
+        """Write the queued entries and close the corpus file."""
+        if not self._started:
+            return
+        self._started = False
+        self._listener.stop()
+        self._handler.close()
+
+    def sampled(self, body: dict) -> bool:
+        """Return True if an envelope should be recorded."""
+        return body.get("type") == "event_callback" and sampled(self.sample_rate)
+
+    def record(self, body: dict, received_at: float, ack_seconds: float) -> None:
+        """
+        Queue an envelope for anonymizing and writing.
+
+        Args:
+            body: Slack event envelope, which must not be modified afterwards
+            received_at: Epoch time the event arrived
+            ack_seconds: Time Bolt took to acknowledge it
+        """
+        self._queue.put(
+            logging.makeLogRecord(
+                {"body": body, "received_at": received_at, "ack_seconds": ack_seconds}
+            )
+        )
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Replay of a recorded traffic corpus against /slack/events.
+
+Entries written by the traffic recorder are sent in their recorded order,
+spaced by their recorded arrival times divided by the speed, so a replay at
+10x keeps the burstiness of production traffic at ten times its rate. Each
+request is signed with the signing secret of the target instance. Event IDs
+and message timestamps are renamed per run so that the target's dedup set
+does not drop repeated replays; thread replies keep pointing at their
+(renamed) parent. Sends run on a worker pool, so a slow response does not
+delay the next event.
+
+Usage:
+    SLACK_SIGNING_SECRET=... python traffic_replay.py traffic.jsonl \\
+        --url http://localhost:8080/slack/events --speed 10
+"""
+
+import argparse
+import gzip
+import itertools
+import json
+import os
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import requests
+from slack_sdk.signature import SignatureVerifier
+
+# Event keys holding message timestamps, which the app uses to dedup
+TS_KEYS = frozenset({"ts", "event_ts", "thread_ts", "deleted_ts"})
+
+
+def load_corpus(paths: List[str]) -> List[dict]:
+    """
+    Read corpus entries from JSONL files, gzip-compressed or not.
+
+    Returns:
+        Entries of all files, oldest first
+    """
+    entries = []
+    for path in paths:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            entries.extend(json.loads(line) for line in f if line.strip())
+    entries.sort(key=lambda entry: entry["ts"])
+    return entries
+
+
+def _percentile(samples: List[float], percent: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+class _Renamer:
+    """Gives replayed events fresh IDs and timestamps, consistently per run."""
+
+    def __init__(self):
+        self.run_id = uuid.uuid4().hex[:8]
+        self._counter = itertools.count(1)
+        self._ts: Dict[str, str] = {}
+
+    def _new_ts(self, ts: str) -> str:
+        if ts not in self._ts:
+            self._ts[ts] = f"{int(time.time())}.{next(self._counter):06d}"
+        return self._ts[ts]
+
+    def _rename(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            return {
+                key: (
+                    self._new_ts(item)
+                    if key in TS_KEYS and isinstance(item, str)
+                    else self._rename(item)
+                )
+                for key, item in value.items()
+            }
+        if isinstance(value, list):
+            return [self._rename(item) for item in value]
+        return value
+
+    def body(self, body: dict) -> dict:
+        renamed = dict(body)
+        renamed["event_id"] = f"{body.get('event_id', 'Ev')}-{self.run_id}"
+        if "event" in body:
+            renamed["event"] = self._rename(body["event"])
+        return renamed
+
+
+def signed_headers(body: bytes, signing_secret: str) -> Dict[str, str]:
+    """Return the headers of a Slack request signed now."""
+    timestamp = str(int(time.time()))
+    return {
+        "Content-Type": "application/json",
+        "X-Slack-Request-Timestamp": timestamp,
+        "X-Slack-Signature": SignatureVerifier(signing_secret).generate_signature(
+            timestamp=timestamp, body=body
+        ),
+    }
+
+
+def replay(
+    entries: List[dict],
+    url: str,
+    signing_secret: str,
+    speed: float = 1.0,
+    workers: int = 32,
+    timeout: float = 10.0,
+    session: Optional[requests.Session] = None,
+) -> Dict[str, Any]:
+    """
+    Send corpus entries to an events endpoint at their recorded pace.
+
+    Args:
+        entries: Corpus entries, oldest first
+        url: URL of the target's /slack/events
+        signing_secret: Signing secret of the target app
+        speed: Replay speed; 10 sends ten times as fast as recorded
+        workers: Largest number of requests in flight
+        timeout: Seconds to wait for each response
+        session: HTTP session (a new one if None)
+
+    Returns:
+        Dict with sent, errors, status code counts, duration and rate, and
+        p50/p95/max response latency and max send lag in seconds
+
+    Raises:
+        ValueError: If speed is not positive
+    """
+    if speed <= 0:
+        raise ValueError("speed must be positive")
+    session = session or requests.Session()
+    renamer = _Renamer()
+
+    def send(body: bytes, lag: float):
+        started = time.monotonic()
+        try:
+            response = session.post(
+                url,
+                data=body,
+                headers=signed_headers(body, signing_secret),
+                timeout=timeout,
+            )
+            status = str(response.status_code)
+        except requests.RequestException as e:
+            status = type(e).__name__
+        return status, time.monotonic() - started, lag
+
+    started = time.monotonic()
+    futures = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        first_ts = entries[0]["ts"] if entries else 0
+        for entry in entries:
+            delay = started + (entry["ts"] - first_ts) / speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            body = json.dumps(renamer.body(entry["body"])).encode("utf-8")
+            futures.append(pool.submit(send, body, max(0.0, -delay)))
+        results = [future.result() for future in futures]
+    duration = time.monotonic() - started
+
+    statuses = Counter(status for status, _, _ in results)
+    latencies = [latency for _, latency, _ in results]
+    return {
+        "sent": len(results),
+        "errors": sum(n for status, n in statuses.items() if status != "200"),
+        "status": dict(statuses),
+        "duration": round(duration, 3),
+        "rate": round(len(results) / duration, 2) if duration else 0.0,
+        "latency_p50": round(_percentile(latencies, 50), 4),
+        "latency_p95": round(_percentile(latencies, 95), 4),
+        "latency_max": round(max(latencies, default=0.0), 4),
+        "lag_max": round(max((lag for _, _, lag in results), default=0.0), 4),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Replay a recorded traffic corpus against /slack/events"
+    )
+    parser.add_argument("corpus", nargs="+", help="Corpus files (.jsonl or .gz)")
+    parser.add_argument("--url", default="http://localhost:8080/slack/events")
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--limit", type=int, help="Only replay the first N events")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)[: args.limit]
+    result = replay(
+        corpus,
+        args.url,
+        os.environ["SLACK_SIGNING_SECRET"],
+        speed=args.speed,
+        workers=args.workers,
+    )
+    print(json.dumps(result))
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Pluggable translation backends with latency-aware routing and hedging.
+
+A BackendRouter picks the backend with the lowest observed latency, fails
+over to the next one when a request fails, and can optionally hedge
+interactive requests: if the first request has not answered after the p95
+latency of its backend, a duplicate is sent and whichever answers first wins.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Deque, List, Optional, Tuple
+
+import deepl_client
+from deepl_client import DeeplClientError
+
+# Named endpoints accepted by resolve_endpoint()
+ENDPOINTS = {"pro": deepl_client.DEEPL_PRO_URL, "free": deepl_client.DEEPL_FREE_URL}
+
+
+def resolve_endpoint(name: str) -> str:
+    """
+    Resolve an endpoint name to a base URL.
+
+    Args:
+        name: 'pro', 'free', or a base URL such as a local stand-in
+            ('http://127.0.0.1:8080/v2')
+
+    Returns:
+        DeepL API base URL
+    """
+    name = name.strip()
+    return ENDPOINTS.get(name.lower(), name.rstrip("/"))
+
+
+class TranslationBackend:
+    """
+    Interface of a translation backend.
+
+    Attributes:
+        name: Name used in logs and metrics
+    """
+
+    name = "backend"
+
+    def translate(
+        self,
+        text: str,
+        target_lang: str,
+        timeout: int = 10,
+        formality: Optional[str] = None,
+    ) -> str:
+        """Translate text, raising DeeplClientError on failure."""
+        raise NotImplementedError
+
+    def translate_texts(
+        self,
+        texts: List[str],
+        target_lang: str,
+        timeout: int = 30,
+        formality: Optional[str] = None,
+    ) -> List[str]:
+        """Translate several texts, one request per text unless overridden."""
+        return [
+            self.translate(text, target_lang, timeout=timeout, formality=formality)
+            for text in texts
+        ]
+
+    def usage(self, timeout: int = 10) -> Tuple[int, int]:
+        """Return (character_count, character_limit)."""
+        raise NotImplementedError
+
+    def probe(self, timeout: int = 10) -> None:
+        """Check that the backend answers, raising DeeplClientError if not."""
+        self.usage(timeout=timeout)
+
+
+class DeeplBackend(TranslationBackend):
+    """Backend for a DeepL-compatible HTTP endpoint."""
+
+    def __init__(self, auth_key: str, base_url: str = deepl_client.DEEPL_PRO_URL):
+        """
+        Args:
+            auth_key: DeepL API authentication key
+            base_url: DeepL API base URL
+        """
+        self.auth_key = auth_key
+        self.base_url = base_url
+        self.name = base_url
+
+    def translate(
+        self,
+        text: str,
+        target_lang: str,
+        timeout: int = 10,
+        formality: Optional[str] = None,
+    ) -> str:
+        return deepl_client.translate_text(
+            self.auth_key,
+            text,
+            target_lang,
+            timeout=timeout,
+            base_url=self.base_url,
+            formality=formality,
+        )
+
+    def translate_texts(
+        self,
+        texts: List[str],
+        target_lang: str,
+        timeout: int = 30,
+        formality: Optional[str] = None,
+    ) -> List[str]:
+        return deepl_client.translate_texts(
+            self.auth_key,
+            texts,
+            target_lang,
+            timeout=timeout,
+            base_url=self.base_url,
+            formality=formality,
+        )
+
+    def usage(self, timeout: int = 10) -> Tuple[int, int]:
+        return deepl_client.get_usage(
+            self.auth_key, timeout=timeout, base_url=self.base_url
+        )
+
+    def probe(self, timeout: int = 10) -> None:
+        deepl_client.probe(self.auth_key, timeout=timeout, base_url=self.base_url)
+
+
+class _LatencyTracker:
+    """Window of recent latencies of one backend."""
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._ewma: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, failed: bool = False) -> None:
+        with self._lock:
+            # Failures only rank the backend down; they are kept out of the
+            # samples so that errors do not inflate the p95 hedge delay
+            if not failed:
+                self._samples.append(latency)
+            if self._ewma is None:
+                self._ewma = latency
+            else:
+                self._ewma = 0.8 * self._ewma + 0.2 * latency
+
+    def ewma(self) -> float:
+        # Untried backends sort first so that every backend gets measured
+        return 0.0 if self._ewma is None else self._ewma
+
+    def p95(self) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < 20:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[int(len(ordered) * 0.95)]
+
+
+class BackendRouter:
+    """
+    Latency-aware router over one or more translation backends.
+    """
+
+    def __init__(
+        self,
+        backends: List[TranslationBackend],
+        hedge: bool = False,
+        default_hedge_delay: float = 1.0,
+        min_hedge_delay: float = 0.05,
+        timeout: int = 10,
+        concurrency: int = 4,
+    ):
+        """
+        Args:
+            backends: Backends in order of preference
+            hedge: Whether hedged requests are allowed at all
+            default_hedge_delay: Hedge delay until enough latencies are known
+            min_hedge_delay: Lower bound of the p95-based hedge delay
+            timeout: Request timeout in seconds
+            concurrency: Number of threads that may translate at once (the
+                scheduler's workers); each hedged call can hold two requests
+        """
+        if not backends:
+            raise ValueError("At least one backend is required")
+        self.backends = backends
+        self.hedge = hedge
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.timeout = timeout
+        self._latency = {id(backend): _LatencyTracker() for backend in backends}
+        self._hedges = 0
+        self._hedge_wins = 0
+        self._hedge_billed = 0
+        self._stats_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=2 * concurrency, thread_name_prefix="hedge"
+        )
+
+    def ranked(self) -> List[TranslationBackend]:
+        """Return the backends ordered by observed latency, fastest first."""
+        return sorted(self.backends, key=lambda b: self._latency[id(b)].ewma())
+
+    def hedge_delay(self, backend: TranslationBackend) -> float:
+        """Return how long to wait before hedging a request to backend."""
+        p95 = self._latency[id(backend)].p95()
+        if p95 is None:
+            return self.default_hedge_delay
+        return max(self.min_hedge_delay, p95)
+
+    def _call(
+        self,
+        backend: TranslationBackend,
+        text: str,
+        target_lang: str,
+        formality: Optional[str] = None,
+    ) -> str:
+        started = time.monotonic()
+        try:
+            result = backend.translate(
+                text, target_lang, timeout=self.timeout, formality=formality
+            )
+        except DeeplClientError:
+            # Failures count as a full timeout so the backend is ranked down
+            self._latency[id(backend)].record(self.timeout, failed=True)
+            raise
+        self._latency[id(backend)].record(time.monotonic() - started)
+        return result
+
+    def translate(
+        self,
+        text: str,
+        target_lang: str,
+        hedge: bool = False,
+        formality: Optional[str] = None,
+        on_billed: Optional[Callable[[int], None]] = None,
+    ) -> str:
+        """
+        Translate text on the best backend, failing over on errors.
+
+        Args:
+            text: Text to translate
+            target_lang: Target language code
+            hedge: Send a hedged duplicate request if hedging is enabled
+            formality: Formality option passed to the backend
+            on_billed: Called with the characters of a losing hedged request
+                that DeepL completed, and so billed, after this call returned
+
+        Raises:
+            DeeplClientError: If every backend failed
+        """
+        if hedge and self.hedge:
+            return self._translate_hedged(text, target_lang, formality, on_billed)
+        return self._failover(self.ranked(), text, target_lang, formality)
+
+    def _failover(
+        self,
+        backends: List[TranslationBackend],
+        text: str,
+        target_lang: str,
+        formality: Optional[str] = None,
+    ) -> str:
+        error: Optional[DeeplClientError] = None
+        for backend in backends:
+            try:
+                return self._call(backend, text, target_lang, formality)
+            except DeeplClientError as e:
+                logging.warning("Translation backend failed: %s", type(e).__name__)
+                error = e
+        assert error is not None
+        raise error
+
+    def translate_texts(
+        self,
+        texts: List[str],
+        target_lang: str,
+        formality: Optional[str] = None,
+        timeout: int = 30,
+    ) -> List[str]:
+        """
+        Translate a batch of texts in one request, failing over on errors.
+
+        Batches are bulk work, so they are never hedged and their latency is
+        not recorded against the backend.
+
+        Raises:
+            DeeplClientError: If every backend failed
+        """
+        error: Optional[DeeplClientError] = None
+        for backend in self.ranked():
+            try:
+                return backend.translate_texts(
+                    texts, target_lang, timeout=timeout, formality=formality
+                )
+            except DeeplClientError as e:
+                logging.warning("Translation backend failed: %s", type(e).__name__)
+                error = e
+        assert error is not None
+        raise error
+
+    def _translate_hedged(
+        self,
+        text: str,
+        target_lang: str,
+        formality: Optional[str] = None,
+        on_billed: Optional[Callable[[int], None]] = None,
+    ) -> str:
+        ranked = self.ranked()
+        primary = ranked[0]
+        # With a single backend the duplicate goes to the same endpoint
+        secondary = ranked[1] if len(ranked) > 1 else primary
+
+        first = self._executor.submit(self._call, primary, text, target_lang, formality)
+        done, _ = wait([first], timeout=self.hedge_delay(primary))
+        if done:
+            if first.exception() is None or len(ranked) == 1:
+                return first.result()
+            # The primary failed before the hedge delay: fail over at once
+            logging.warning(
+                "Translation backend failed: %s", type(first.exception()).__name__
+            )
+            return self._failover(ranked[1:], text, target_lang, formality)
+
+        with self._stats_lock:
+            self._hedges += 1
+        second = self._executor.submit(
+            self._call, secondary, text, target_lang, formality
+        )
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    self._settle_loser(
+                        second if future is first else first, len(text), on_billed
+                    )
+                    if future is second:
+                        with self._stats_lock:
+                            self._hedge_wins += 1
+                    return future.result()
+                error = future.exception()
+        assert error is not None
+        if len(ranked) > 2:
+            return self._failover(ranked[2:], text, target_lang, formality)
+        raise error
+
+    def _settle_loser(
+        self,
+        future: Future,
+        characters: int,
+        on_billed: Optional[Callable[[int], None]],
+    ) -> None:
+        # A request already on the wire cannot be aborted; its result is
+        # dropped, but DeepL bills it once it completes
+        if future.cancel():
+            return
+
+        def billed(done: Future) -> None:
+            if done.exception() is not None:
+                return
+            with self._stats_lock:
+                self._hedge_billed += characters
+            if on_billed is not None:
+                on_billed(characters)
+
+        future.add_done_callback(billed)
+
+    def usage(self) -> Tuple[int, int]:
+        """Return the usage of the first configured backend."""
+        return self.backends[0].usage(timeout=self.timeout)
+
+    def probe(self) -> None:
+        """Check that the first configured backend answers."""
+        self.backends[0].probe(timeout=self.timeout)
+
+    def stats(self) -> dict:
+        """Return hedging counters and the latency estimate of each backend."""
+        with self._stats_lock:
+            hedges, wins, billed = self._hedges, self._hedge_wins, self._hedge_billed
+        return {
+            "hedges": hedges,
+            "hedge_wins": wins,
+            # Characters of losing hedged requests that DeepL billed
+            "hedge_billed_characters": billed,
+            "latency": {
+                backend.name: self._latency[id(backend)].ewma()
+                for backend in self.backends
+            },
+        }
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Configurable keyword triggers for on-demand translation.
+
+A trigger table maps keywords to a target language (plus DeepL options such
+as formality). The table is compiled into a single regex with one named
+group per trigger, matching keywords only as whole words, so one scan of a
+message finds every trigger it contains.
+
+Trigger files are JSON lists such as:
+    [
+        {"keyword": "Nyan", "target_lang": "JA"},
+        {"keyword": "Meow", "target_lang": "EN", "formality": "less"}
+    ]
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Pattern
+
+
+@dataclass(frozen=True)
+class Trigger:
+    """
+    A keyword that requests a translation.
+
+    Attributes:
+        keyword: Word that triggers the translation
+        target_lang: Target language code (e.g., 'EN', 'FR', 'JA')
+        formality: DeepL formality option, if any
+    """
+
+    keyword: str
+    target_lang: str
+    formality: Optional[str] = None
+
+
+DEFAULT_TRIGGERS = [
+    Trigger("Nyan", "JA"),
+    Trigger("Meow", "EN"),
+    Trigger("Miaou", "FR"),
+    Trigger("Мяу", "RU"),
+]
+
+
+class TriggerTable:
+    """
+    Trigger table compiled into one word-boundary regex.
+
+    Attributes:
+        triggers: Triggers in table order
+        pattern: Compiled regex; group 't<n>' matches triggers[n]
+    """
+
+    def __init__(self, triggers: List[Trigger]):
+        if not triggers:
+            raise ValueError("At least one trigger is required")
+        self.triggers = list(triggers)
+        # Longer keywords first, so that a keyword which is a prefix of
+        # another one does not shadow it
+        order = sorted(
+            range(len(self.triggers)), key=lambda n: -len(self.triggers[n].keyword)
+        )
+        alternatives = "|".join(
+            f"(?P<t{n}>{re.escape(self.triggers[n].keyword)})" for n in order
+        )
+        # \w is Unicode-aware, so this also bounds Cyrillic keywords
+        self.pattern: Pattern[str] = re.compile(rf"(?<!\w)(?:{alternatives})(?!\w)")
+
+    def find(self, text: str) -> List[Trigger]:
+        """
+        Return the distinct triggers in text, in order of appearance.
+        """
+        found: List[Trigger] = []
+        for match in self.pattern.finditer(text):
+            trigger = self.triggers[int(match.lastgroup[1:])]
+            if trigger not in found:
+                found.append(trigger)
+        return found
+
+    def keyword_list(self) -> str:
+        """Return the keyword help text posted by Meousage."""
+        lines = ["Translation keyword:"]
+        for trigger in self.triggers:
+            lines.append(f"    {trigger.keyword}:{trigger.target_lang}")
+        return "\n".join(lines)
+
+
+def load_trigger_table(path: Optional[str] = None) -> TriggerTable:
+    """
+    Load a trigger table from a JSON file.
+
+    Args:
+        path: Path of the JSON file, or None for DEFAULT_TRIGGERS
+
+    Raises:
+        ValueError: If the file is not a valid trigger list
+    """
+    if not path:
+        return TriggerTable(DEFAULT_TRIGGERS)
+
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+    return TriggerTable(parse_triggers(entries))
+
+
+def parse_triggers(entries: list) -> List[Trigger]:
+    """
+    Build triggers from decoded JSON entries.
+
+    Raises:
+        ValueError: If an entry is not a valid trigger
+    """
+    try:
+        return [
+            Trigger(
+                keyword=entry["keyword"],
+                target_lang=entry["target_lang"],
+                formality=entry.get("formality"),
+            )
+            for entry in entries
+        ]
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Invalid trigger table: {e}") from e
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Per-channel, per-user and per-language DeepL consumption counters.
+
+Characters sent to DeepL are aggregated into one row per day, workspace,
+dimension ('channel', 'user' or 'lang') and key. Counts are buffered in
+memory on the translation path and merged into SQLite every few seconds, so
+top-N queries read a few hundred precomputed rows instead of scanning logs.
+Days older than the retention period are dropped.
+"""
+
+import datetime
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Dimensions counted for every translation
+DIMENSIONS = ("channel", "user", "lang")
+
+
+class UsageStats:
+    """
+    Rolling daily consumption counters in SQLite.
+
+    Safe to share between threads. With a file path the counters are shared
+    by every worker process on the host; with ':memory:' they are per process.
+    """
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        retention_days: int = 92,
+        flush_interval: float = 5.0,
+    ):
+        """
+        Args:
+            path: Path of the SQLite database file, or ':memory:'
+            retention_days: Number of daily buckets kept
+            flush_interval: Seconds between merges of buffered counts
+        """
+        self.retention_days = retention_days
+        self.flush_interval = flush_interval
+        # (day, team_id, dimension, key) -> [characters, requests]
+        self._pending: Dict[Tuple[str, str, str, str], List[int]] = {}
+        self._pending_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS usage ("
+                " day TEXT NOT NULL,"
+                " team_id TEXT NOT NULL,"
+                " dimension TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " characters INTEGER NOT NULL,"
+                " requests INTEGER NOT NULL,"
+                " PRIMARY KEY (day, team_id, dimension, key))"
+            )
+
+    @staticmethod
+    def _day(offset: int = 0) -> str:
+        return (datetime.date.today() - datetime.timedelta(days=offset)).isoformat()
+
+    def record(
+        self,
+        characters: int,
+        target_lang: str,
+        channel: str = "",
+        user: str = "",
+        team_id: str = "",
+    ) -> None:
+        """
+        Count characters sent to DeepL for one translation.
+
+        Empty channel or user IDs are not counted in their dimension.
+        """
+        day = self._day()
+        keys = {"channel": channel, "user": user, "lang": target_lang}
+        with self._pending_lock:
+            for dimension in DIMENSIONS:
+                if not keys[dimension]:
+                    continue
+                counts = self._pending.setdefault(
+                    (day, team_id, dimension, keys[dimension]), [0, 0]
+                )
+                counts[0] += characters
+                counts[1] += 1
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        """Merge buffered counts into the database and drop expired days."""
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO usage (day, team_id, dimension, key, characters, requests)"
+                " VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (day, team_id, dimension, key) DO UPDATE SET"
+                " characters = characters + excluded.characters,"
+                " requests = requests + excluded.requests",
+                [(*key, counts[0], counts[1]) for key, counts in pending.items()],
+            )
+            self._conn.execute(
+                "DELETE FROM usage WHERE day <= ?", (self._day(self.retention_days),)
+            )
+
+    def top(
+        self,
+        dimension: str,
+        days: int = 30,
+        team_id: Optional[str] = None,
+        limit: int = 5,
+    ) -> List[Tuple[str, int, int]]:
+        """
+        Return the keys that used the most characters.
+
+        Args:
+            dimension: 'channel', 'user', 'lang' or 'team'
+            days: Number of days counted, including today
+            team_id: Only count this workspace (all workspaces if None)
+            limit: Maximum number of keys returned
+
+        Returns:
+            List of (key, characters, requests), largest first
+        """
+        if dimension not in DIMENSIONS + ("team",):
+            raise ValueError(f"Unknown usage dimension: {dimension}")
+        self.flush()
+
+        # Every translation has exactly one language, so team totals are the
+        # sum of their language rows
+        column = "team_id" if dimension == "team" else "key"
+        query = (
+            f"SELECT {column}, SUM(characters), SUM(requests) FROM usage"
+            " WHERE dimension = ? AND day > ?"
+        )
+        params: list = ["lang" if dimension == "team" else dimension, self._day(days)]
+        if team_id is not None:
+            query += " AND team_id = ?"
+            params.append(team_id)
+        query += f" GROUP BY {column} ORDER BY SUM(characters) DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            return self._conn.execute(query, params).fetchall()
+
+    def total(self, days: int = 30, team_id: Optional[str] = None) -> int:
+        """Return the characters counted over the last days."""
+        self.flush()
+        query = "SELECT SUM(characters) FROM usage WHERE dimension = 'lang' AND day > ?"
+        params: list = [self._day(days)]
+        if team_id is not None:
+            query += " AND team_id = ?"
+            params.append(team_id)
+        with self._lock:
+            (total,) = self._conn.execute(query, params).fetchone()
+        return total or 0
+
+    def close(self) -> None:
+        """Flush buffered counts and close the database connection."""
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+
+def format_top(
+    stats: UsageStats,
+    days: int = 30,
+    team_id: Optional[str] = None,
+    name_of: Optional[Callable[[str, str], str]] = None,
+    limit: int = 5,
+) -> str:
+    """
+    Format the Meousage top report.
+
+    Args:
+        stats: Usage counters
+        days: Number of days counted
+        team_id: Workspace to report on
+        name_of: Returns the display name of a (dimension, key)
+        limit: Number of entries per dimension
+    """
+    total = stats.total(days, team_id)
+    lines = [f"{total} characters translated in the last {days} days."]
+    for dimension, title in (
+        ("channel", "Top channels"),
+        ("user", "Top users"),
+        ("lang", "Top languages"),
+    ):
+        rows = stats.top(dimension, days, team_id, limit)
+        if not rows:
+            continue
+        lines.append(f"{title}:")
+        for key, characters, requests in rows:
+            name = name_of(dimension, key) if name_of else key
+            share = characters / total * 100 if total else 0
+            lines.append(
+                f"    {name}: {characters} characters, {requests} requests ({share:.1f} %)"
+            )
+    return "\n".join(lines)
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 icecake0141
+# This file contains LLM-generated code that has been reviewed and approved by humans.
+
+"""
+Per-workspace state for serving several Slack workspaces from one process.
+
+Every workspace (team_id) gets its own pooled WebClient, channel directory
+and user-name cache, each with its own memory cap, so that one large
+workspace cannot evict the state of the others.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from slack_sdk import WebClient
+from slack_sdk.errors import SlackApiError
+
+from state import StateBackend
+
+
+class ChannelDirectory:
+    """
+    Bidirectional channel name <-> ID map of one workspace.
+
+    Attributes:
+        name_dict: Channel name -> channel ID
+        id_dict: Channel ID -> channel name
+        loaded_at: time.time() of the last successful load (0 if never)
+    """
+
+    def __init__(self, max_channels: int = 5000):
+        self.max_channels = max_channels
+        self.name_dict: Dict[str, str] = {}
+        self.id_dict: Dict[str, str] = {}
+        self.loaded_at = 0.0
+
+    def load(self, client: WebClient, page_size: int = 200) -> bool:
+        """
+        Page through conversations.list and replace the directory.
+
+        The new maps are built aside and swapped in at once, so readers never
+        see a half-loaded directory. Channels beyond max_channels are ignored.
+
+        Returns:
+            True if the directory was loaded; on errors the previous maps are kept
+        """
+        channels: List[dict] = []
+        try:
+            # Call the conversations.list method using the built-in WebClient
+            for paginated_response in client.conversations_list(limit=page_size):
+                channels += paginated_response["channels"]
+                if len(channels) >= self.max_channels:
+                    logging.warning("Channel directory is full, ignoring channels")
+                    channels = channels[: self.max_channels]
+                    break
+        except SlackApiError as e:
+            logging.error("Error fetching conversations: {}".format(e))
+            return False
+
+        name_dict = {channel["name"]: channel["id"] for channel in channels}
+        id_dict = {channel["id"]: channel["name"] for channel in channels}
+        self.name_dict, self.id_dict = name_dict, id_dict
+        self.loaded_at = time.time()
+        return True
+
+
+class UserCache:
+    """
+    LRU cache of user ID -> user name with a size cap and TTL.
+
+    With a shared StateBackend, names fetched by one worker process are
+    reused by the others before users.info is called.
+    """
+
+    def __init__(
+        self,
+        max_users: int = 1000,
+        ttl: float = 3600.0,
+        state: Optional[StateBackend] = None,
+        namespace: str = "",
+    ):
+        self.max_users = max_users
+        self.ttl = ttl
+        self.state = state
+        self.namespace = namespace
+        self._names: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def name(self, client: WebClient, user_id: str) -> str:
+        """
+        Return the user name of user_id, calling users.info on a cache miss.
+
+        Raises:
+            SlackApiError: If users.info fails
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._names.get(user_id)
+            if cached is not None and cached[1] > now:
+                self._names.move_to_end(user_id)
+                return cached[0]
+
+        shared_key = f"user:{self.namespace}:{user_id}"
+        name = self.state.get(shared_key) if self.state is not None else None
+        if name is None:
+            # retrieve username from userid
+            name = client.users_info(user=user_id).data["user"]["name"]
+            if self.state is not None:
+                self.state.set(shared_key, name, ttl=self.ttl)
+
+        with self._lock:
+            self._names[user_id] = (name, now + self.ttl)
+            self._names.move_to_end(user_id)
+            while len(self._names) > self.max_users:
+                self._names.popitem(last=False)
+        return name
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+class Workspace:
+    """
+    State of one Slack workspace.
+
+    Attributes:
+        team_id: Slack team ID
+        client: Pooled WebClient authorized for the workspace
+        channels: Channel directory
+        users: User-name cache
+        load_lock: Serializes loads of the channel directory
+        retry_at: time.monotonic() before which a failed load is not retried
+        retry_delay: Backoff of the next failed load, in seconds
+        stale: True if the channel directory must be reloaded on next use
+    """
+
+    def __init__(
+        self,
+        team_id: str,
+        client: WebClient,
+        max_channels: int = 5000,
+        max_users: int = 1000,
+        state: Optional[StateBackend] = None,
+    ):
+        self.team_id = team_id
+        self.client = client
+        self.channels = ChannelDirectory(max_channels)
+        self.users = UserCache(max_users, state=state, namespace=team_id)
+        self.load_lock = threading.Lock()
+        self.retry_at = 0.0
+        self.retry_delay = 0.0
+        self.stale = False
+
+    def speaker_name(self, user_id: str) -> str:
+        """Return the user name of user_id."""
+        return self.users.name(self.client, user_id)
+
+
+class WorkspaceRegistry:
+    """
+    Thread-safe registry of Workspace objects keyed by team_id.
+
+    Workspaces are created on first use with a WebClient from client_factory,
+    and their channel directory is loaded on first use. A failed load is
+    retried on later lookups with exponential backoff; until then lookups
+    return the workspace with its empty directory. Directories are reloaded
+    when older than max_age or after invalidate(); lookups keep using the
+    loaded directory while one thread reloads it.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[str], Optional[WebClient]],
+        max_channels: int = 5000,
+        max_users: int = 1000,
+        state: Optional[StateBackend] = None,
+        retry_delay: float = 5.0,
+        max_retry_delay: float = 300.0,
+        max_age: float = 3600.0,
+    ):
+        """
+        Args:
+            client_factory: Returns a WebClient for a team_id, or None if the
+                app is not installed in that workspace
+            max_channels: Channel directory cap per workspace
+            max_users: User-name cache cap per workspace
+            state: Shared state backend for the user-name caches
+            retry_delay: Delay before retrying a failed directory load, in seconds
+            max_retry_delay: Upper bound of the retry backoff, in seconds
+            max_age: Seconds after which a channel directory is reloaded
+        """
+        self.client_factory = client_factory
+        self.max_channels = max_channels
+        self.max_users = max_users
+        self.state = state
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.max_age = max_age
+        self._workspaces: Dict[str, Workspace] = {}
+        self._lock = threading.Lock()
+
+    def get(self, team_id: str) -> Workspace:
+        """
+        Return the workspace of team_id, creating and loading it if needed.
+
+        Raises:
+            LookupError: If no client is available for team_id
+        """
+        workspace = self._workspaces.get(team_id)
+        if workspace is None:
+            with self._lock:
+                workspace = self._workspaces.get(team_id)
+                if workspace is None:
+                    client = self.client_factory(team_id)
+                    if client is None:
+                        raise LookupError(f"No installation for team {team_id}")
+                    workspace = Workspace(
+                        team_id, client, self.max_channels, self.max_users, self.state
+                    )
+                    self._workspaces[team_id] = workspace
+
+        if self._needs_load(workspace):
+            self._load(workspace)
+        return workspace
+
+    def invalidate(self, team_id: Optional[str] = None) -> None:
+        """
+        Reload the channel directory of team_id on its next lookup.
+
+        Args:
+            team_id: Workspace whose channels changed, or None for all of them
+        """
+        if team_id is None:
+            workspaces = list(self._workspaces.values())
+        elif team_id in self._workspaces:
+            workspaces = [self._workspaces[team_id]]
+        else:
+            workspaces = []
+        for workspace in workspaces:
+            workspace.stale = True
+            workspace.retry_at = 0.0
+
+    def _needs_load(self, workspace: Workspace) -> bool:
+        loaded_at = workspace.channels.loaded_at
+        return (
+            not loaded_at or workspace.stale or time.time() - loaded_at > self.max_age
+        )
+
+    def _load(self, workspace: Workspace) -> None:
+        # Loads hold the workspace's own lock, so paging conversations.list
+        # of one team does not block lookups of the others. Once a directory
+        # is loaded, lookups do not wait for its reload either.
+        if time.monotonic() < workspace.retry_at:
+            return
+        if not workspace.load_lock.acquire(blocking=not workspace.channels.loaded_at):
+            return
+        try:
+            if not self._needs_load(workspace) or time.monotonic() < workspace.retry_at:
+                return
+            # An invalidate() during the load marks it stale again
+            workspace.stale = False
+            if workspace.channels.load(workspace.client):
+                workspace.retry_delay = 0.0
+                return
+            workspace.stale = True
+            workspace.retry_delay = min(
+                self.max_retry_delay, max(self.retry_delay, 2 * workspace.retry_delay)
+            )
+            workspace.retry_at = time.monotonic() + workspace.retry_delay
+            logging.warning(
+                "Channel directory of %s not loaded, retrying in %.0f s",
+                workspace.team_id,
+                workspace.retry_delay,
+            )
+        finally:
+            workspace.load_lock.release()
+
+    def peek(self, team_id: str) -> Optional[Workspace]:
+        """Return the workspace of team_id if it exists, without loading it."""
+        return self._workspaces.get(team_id)
+
+    def team_ids(self) -> List[str]:
+        """Return the team IDs of the loaded workspaces."""
+        return list(self._workspaces)